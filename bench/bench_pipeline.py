@@ -0,0 +1,226 @@
+# Times each stage of processing a synthetic sysdiagnose archive (tar scan, extraction, decode, parse,
+# serialise, write), plus the whole archive end to end, and compares the timings against a baseline
+#
+# Run from the project root:
+#   python -m bench.bench_pipeline --ps-txt-rows 200000 --powerlog-rows 500000 --save bench-results.json
+#   python -m bench.bench_pipeline --ps-txt-rows 200000 --powerlog-rows 500000 --baseline bench-results.json --threshold 0.1
+#
+# Exits with an error listing the regressed stages if any stage is slower than the baseline by more than the threshold
+import argparse
+import json
+import os
+import platform
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bench.synthetic_archive import write_synthetic_archive
+from consts.FileProcessing import POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN, PS_TXT_FILE_NAME_MATCH_PATTERN
+from consts.SQLiteDB import QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE
+from models.DBLogEvent import DB_LOG_EVENT_FIELD_NAMES
+from models.TxtLogEvent import TXT_LOG_EVENT_FIELD_NAMES
+from services.DBLogService import DBLogService
+from services.TarFileService import extract_powerlog_member, extract_ps_txt_member, process_tar_file_to_result
+from services.TxtLogService import get_txt_log_event_values
+from utils.FileHelper import is_file_path_match, write_to_json_file
+from utils.JsonHelper import convert_rows_to_json_string
+from utils.TxtConverter import get_txt_rows_converter
+
+# Stages that take less than this are too short to compare reliably, so they are never reported as regressions
+MIN_COMPARED_STAGE_SECONDS: float = 0.005
+
+DEFAULT_REGRESSION_THRESHOLD: float = 0.1
+
+
+# Times each stage once, and returns the seconds taken per stage
+def time_pipeline_stages(archive_path: str, output_directory_path: str) -> Dict[str, float]:
+    stage_seconds: Dict[str, float] = {}
+    extraction_seconds: float = 0.0
+    ps_txt_file = None
+    db_log_service: Optional[DBLogService] = None
+
+    # Tar scan and extraction happen in the same forward-only pass, as in process_tar_stream
+    # Time spent inside the extract calls is extraction, and the rest of the pass is tar scanning
+    scan_start_time: float = time.perf_counter()
+
+    with tarfile.open(archive_path, mode='r|*') as tar_file_obj:
+        for member in tar_file_obj:
+            if not member.isfile():
+                continue
+
+            if ps_txt_file is None and is_file_path_match(member.name, PS_TXT_FILE_NAME_MATCH_PATTERN):
+                extraction_start_time: float = time.perf_counter()
+                ps_txt_file = extract_ps_txt_member(tar_file_obj, member)
+                extraction_seconds += time.perf_counter() - extraction_start_time
+            elif db_log_service is None and is_file_path_match(member.name, POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN):
+                extraction_start_time = time.perf_counter()
+                db_log_service = extract_powerlog_member(tar_file_obj, member)
+                extraction_seconds += time.perf_counter() - extraction_start_time
+
+            if ps_txt_file is not None and db_log_service is not None:
+                break
+
+    if ps_txt_file is None or db_log_service is None:
+        sys.exit('Benchmark archive is missing ps.txt or the powerlog DB')
+
+    stage_seconds['tar_scan'] = time.perf_counter() - scan_start_time - extraction_seconds
+    stage_seconds['extraction'] = extraction_seconds
+
+    # ps.txt
+    stage_start_time: float = time.perf_counter()
+    txt_file_header_row: str = next(ps_txt_file).decode('utf-8')
+    txt_file_lines: List[str] = ps_txt_file.read().decode('utf-8').splitlines()
+    ps_txt_file.close()
+    stage_seconds['ps_txt_decode'] = time.perf_counter() - stage_start_time
+
+    stage_start_time = time.perf_counter()
+    txt_log_events, _ = get_txt_rows_converter(txt_file_header_row)(txt_file_lines)
+    stage_seconds['ps_txt_parse'] = time.perf_counter() - stage_start_time
+
+    stage_start_time = time.perf_counter()
+    txt_results_json_string: str = convert_rows_to_json_string(
+        [get_txt_log_event_values(txt_log_event) for txt_log_event in txt_log_events],
+        TXT_LOG_EVENT_FIELD_NAMES
+    ) or ''
+    stage_seconds['ps_txt_serialise'] = time.perf_counter() - stage_start_time
+
+    stage_start_time = time.perf_counter()
+    write_to_json_file(txt_results_json_string, os.path.join(output_directory_path, 'ps.json'))
+    stage_seconds['ps_txt_write'] = time.perf_counter() - stage_start_time
+
+    # Powerlog DB - decoding is opening (or deserialising) the DB, and parsing is reading the rows from the table
+    try:
+        stage_start_time = time.perf_counter()
+        db_client = db_log_service.open_db_client()
+        stage_seconds['powerlog_decode'] = time.perf_counter() - stage_start_time
+
+        with db_client:
+            stage_start_time = time.perf_counter()
+            db_client.execute(QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE)
+            db_log_event_rows: List[Any] = db_client.fetchall()
+            stage_seconds['powerlog_parse'] = time.perf_counter() - stage_start_time
+    finally:
+        if db_log_service.sqlite_db_file_path:
+            os.remove(db_log_service.sqlite_db_file_path)
+
+    stage_start_time = time.perf_counter()
+    db_results_json_string: str = convert_rows_to_json_string(db_log_event_rows, DB_LOG_EVENT_FIELD_NAMES) or ''
+    stage_seconds['powerlog_serialise'] = time.perf_counter() - stage_start_time
+
+    stage_start_time = time.perf_counter()
+    write_to_json_file(db_results_json_string, os.path.join(output_directory_path, 'powerlog.json'))
+    stage_seconds['powerlog_write'] = time.perf_counter() - stage_start_time
+
+    # The whole archive, through the same path as the command line tool
+    stage_start_time = time.perf_counter()
+    process_tar_file_to_result(archive_path, output_directory_path)
+    stage_seconds['end_to_end'] = time.perf_counter() - stage_start_time
+
+    return stage_seconds
+
+
+def run_benchmark(ps_txt_rows: int, powerlog_rows: int, padding_bytes: int, repeat: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path: str = write_synthetic_archive(temp_dir, ps_txt_rows, powerlog_rows, padding_bytes)
+
+        stage_seconds_runs: List[Dict[str, float]] = []
+
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as output_directory_path:
+                stage_seconds_runs.append(time_pipeline_stages(archive_path, output_directory_path))
+
+        archive_size_bytes: int = os.path.getsize(archive_path)
+
+    # The fastest run is the one least affected by everything else running on the machine
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    for stage_name in stage_seconds_runs[0]:
+        seconds: float = min(stage_seconds_run[stage_name] for stage_seconds_run in stage_seconds_runs)
+        stage_rows: int = ps_txt_rows if stage_name.startswith('ps_txt') else powerlog_rows if stage_name.startswith('powerlog') else ps_txt_rows + powerlog_rows
+
+        stages[stage_name] = {
+            'seconds': round(seconds, 6),
+            'rows_per_second': round(stage_rows / seconds) if seconds else None,
+        }
+
+    return {
+        'parameters': {
+            'ps_txt_rows': ps_txt_rows,
+            'powerlog_rows': powerlog_rows,
+            'padding_bytes': padding_bytes,
+            'repeat': repeat,
+        },
+        'environment': {
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'archive_size_bytes': archive_size_bytes,
+        'stages': stages,
+    }
+
+
+# Returns a description of each stage that is slower than the baseline by more than the threshold (eg: 0.1 = 10%)
+def find_regressions(results: Dict[str, Any], baseline_results: Dict[str, Any], threshold: float) -> List[str]:
+    regressions: List[str] = []
+
+    # The number of runs doesn't change what is measured
+    compared_parameter_names: List[str] = ['ps_txt_rows', 'powerlog_rows', 'padding_bytes']
+
+    if any(results['parameters'].get(parameter_name) != baseline_results['parameters'].get(parameter_name) for parameter_name in compared_parameter_names):
+        print('Warning: benchmark parameters differ from the baseline, so timings may not be comparable')
+
+    for stage_name, baseline_stage in baseline_results['stages'].items():
+        stage: Optional[Dict[str, Any]] = results['stages'].get(stage_name)
+
+        if stage is None or baseline_stage['seconds'] < MIN_COMPARED_STAGE_SECONDS:
+            continue
+
+        slowdown: float = stage['seconds'] / baseline_stage['seconds'] - 1
+
+        if slowdown > threshold:
+            regressions.append(
+                stage_name + ': ' + str(baseline_stage['seconds']) + 's -> ' + str(stage['seconds']) + 's (+' + str(round(slowdown * 100, 1)) + '%)'
+            )
+
+    return regressions
+
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(description='Benchmark each stage of processing a synthetic sysdiagnose TAR file')
+    arg_parser.add_argument('--ps-txt-rows', type=int, default=100000, help='Number of rows in ps.txt')
+    arg_parser.add_argument('--powerlog-rows', type=int, default=100000, help='Number of rows in the powerlog DB table')
+    arg_parser.add_argument('--padding-bytes', type=int, default=0, help='Size of a trailing member of random bytes')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Number of runs - the fastest time for each stage is kept')
+    arg_parser.add_argument('--save', help='Path to save the results JSON to (eg: to use as a baseline)')
+    arg_parser.add_argument('--baseline', help='Path of a saved results JSON to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD, help='Slowdown allowed before a stage counts as a regression (default: 0.1 = 10%%)')
+    return arg_parser
+
+
+if __name__ == '__main__':
+    parsed_args = create_arg_parser().parse_args(sys.argv[1:])
+
+    benchmark_results: Dict[str, Any] = run_benchmark(
+        parsed_args.ps_txt_rows,
+        parsed_args.powerlog_rows,
+        parsed_args.padding_bytes,
+        max(1, parsed_args.repeat)
+    )
+
+    print(json.dumps(benchmark_results, indent=2))
+
+    if parsed_args.save:
+        with open(parsed_args.save, 'w') as results_file:
+            json.dump(benchmark_results, results_file, indent=2)
+
+    if parsed_args.baseline:
+        with open(parsed_args.baseline) as baseline_file:
+            stage_regressions: List[str] = find_regressions(benchmark_results, json.load(baseline_file), parsed_args.threshold)
+
+        if stage_regressions:
+            sys.exit('Regressions against baseline:\n  ' + '\n  '.join(stage_regressions))
+
+        print('No regressions against baseline')
@@ -0,0 +1,83 @@
+# Compares rows/sec of the original dataclasses.asdict + json.dumps serialisation against the
+# tuple-based row encoder used by JsonStreamWriter.write_row
+#
+# Run from the project root:
+#   python -m bench.bench_serialisation --rows 200000
+import argparse
+import dataclasses
+import json
+import sys
+import time
+from operator import attrgetter
+from typing import Any, Callable, List
+
+from models.DBLogEvent import DB_LOG_EVENT_FIELD_NAMES, DBLogEvent
+from models.TxtLogEvent import TXT_LOG_EVENT_FIELD_NAMES, TxtLogEvent
+from utils.JsonHelper import convert_rows_to_json_string
+
+
+def build_txt_log_events(number_of_rows: int) -> List[TxtLogEvent]:
+    return [
+        TxtLogEvent(
+            'mobile', 501, 'pr' + str(row_index % 7), row_index, 1, '4004', 0.1 * (row_index % 50), 0.2, 31, 0,
+            400000000 + row_index, 12000 + row_index, '-', '??', 'Ss', '9:00PM', '0:00.51',
+            '/usr/libexec/process_' + str(row_index % 300) + ' --flag'
+        )
+        for row_index in range(number_of_rows)
+    ]
+
+
+def build_db_log_events(number_of_rows: int) -> List[DBLogEvent]:
+    return [
+        DBLogEvent(row_index, 1713292252.0 + row_index, 'com.apple.bundle' + str(row_index % 40), row_index % 90, row_index % 3000, 'Process' + str(row_index % 40))
+        for row_index in range(number_of_rows)
+    ]
+
+
+# Original path: a dict per row via dataclasses.asdict, then json.dumps of the whole list
+def serialise_with_asdict(events: List[Any]) -> str:
+    return json.dumps([dataclasses.asdict(event) for event in events], indent=2)
+
+
+# Fast path: a value tuple per row, encoded straight to JSON text from the precomputed field names
+def serialise_with_row_encoder(events: List[Any], field_names) -> str:
+    get_event_values = attrgetter(*field_names)
+
+    return convert_rows_to_json_string([get_event_values(event) for event in events], field_names) or ''
+
+
+def time_rows_per_second(serialise: Callable[[], str], number_of_rows: int) -> float:
+    start_time: float = time.perf_counter()
+    serialise()
+    return number_of_rows / (time.perf_counter() - start_time)
+
+
+def run_benchmark(number_of_rows: int) -> dict:
+    results: dict = {}
+
+    for event_type, events, field_names in [
+        ('TxtLogEvent', build_txt_log_events(number_of_rows), TXT_LOG_EVENT_FIELD_NAMES),
+        ('DBLogEvent', build_db_log_events(number_of_rows), DB_LOG_EVENT_FIELD_NAMES),
+    ]:
+        # Both paths must produce exactly the same JSON
+        if serialise_with_asdict(events[:100]) != serialise_with_row_encoder(events[:100], field_names):
+            sys.exit('Row encoder output does not match json.dumps output for ' + event_type)
+
+        asdict_rows_per_second: float = time_rows_per_second(lambda: serialise_with_asdict(events), number_of_rows)
+        row_encoder_rows_per_second: float = time_rows_per_second(lambda: serialise_with_row_encoder(events, field_names), number_of_rows)
+
+        results[event_type] = {
+            'asdict_rows_per_second': round(asdict_rows_per_second),
+            'row_encoder_rows_per_second': round(row_encoder_rows_per_second),
+            'speedup': round(row_encoder_rows_per_second / asdict_rows_per_second, 2),
+        }
+
+    return results
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Benchmark JSON row serialisation')
+    arg_parser.add_argument('--rows', type=int, default=200000, help='Number of rows to serialise per event type')
+    parsed_args = arg_parser.parse_args(sys.argv[1:])
+
+    print(json.dumps(run_benchmark(parsed_args.rows), indent=2))
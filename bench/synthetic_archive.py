@@ -0,0 +1,118 @@
+# Generates synthetic sysdiagnose .tar.gz archives for benchmarks, with an N-line ps.txt and a powerlog
+# PLSQL DB with M rows in PLProcessMonitorAgent_EventForward_ProcessID
+#
+# Run from the project root:
+#   python -m bench.synthetic_archive --ps-txt-rows 100000 --powerlog-rows 500000 --output-dir bench-archives
+import argparse
+import os
+import sqlite3
+import sys
+import tarfile
+import tempfile
+from itertools import islice
+from typing import Iterator, Tuple
+
+# Same header as a real ps.txt
+PS_TXT_HEADER_ROW: str = 'USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n'
+
+# Named like a real archive, so archive identifiers can be parsed from it
+SYNTHETIC_ARCHIVE_FILE_NAME: str = 'sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236.tar.gz'
+
+# Rows are generated and written in blocks, so archives much larger than memory can be generated
+SYNTHETIC_ROWS_BLOCK_SIZE: int = 50000
+
+
+def build_ps_txt_row(row_index: int) -> str:
+    return (
+        ('root' if row_index % 5 == 0 else 'mobile') + ' ' + str(0 if row_index % 5 == 0 else 501) + ' - ' +
+        str(row_index + 1) + ' 1 4004 ' + str(round(0.1 * (row_index % 50), 1)) + ' ' + str(round(0.01 * (row_index % 90), 2)) +
+        ' 31 0 ' + str(400000000 + row_index * 16) + ' ' + str(12000 + row_index % 20000) +
+        ' - ?? Ss 9:00PM 0:00.51 /usr/libexec/process_' + str(row_index % 300) + ' --flag ' + str(row_index) + '\n'
+    )
+
+
+def iter_powerlog_rows(number_of_rows: int) -> Iterator[Tuple]:
+    for row_index in range(number_of_rows):
+        yield (
+            row_index + 1,
+            1713292252.0 + row_index * 0.5,
+            'com.apple.bundle' + str(row_index % 40),
+            row_index % 90,
+            row_index % 3000 + 1,
+            'Process' + str(row_index % 40)
+        )
+
+
+def write_ps_txt_file(ps_txt_file_path: str, number_of_rows: int):
+    with open(ps_txt_file_path, 'w', encoding='utf-8') as ps_txt_file:
+        ps_txt_file.write(PS_TXT_HEADER_ROW)
+
+        for block_start_index in range(0, number_of_rows, SYNTHETIC_ROWS_BLOCK_SIZE):
+            block_end_index: int = min(block_start_index + SYNTHETIC_ROWS_BLOCK_SIZE, number_of_rows)
+            ps_txt_file.write(''.join([build_ps_txt_row(row_index) for row_index in range(block_start_index, block_end_index)]))
+
+
+def write_powerlog_db_file(powerlog_db_file_path: str, number_of_rows: int):
+    db_conn = sqlite3.connect(powerlog_db_file_path)
+
+    try:
+        db_conn.execute(
+            'CREATE TABLE PLProcessMonitorAgent_EventForward_ProcessID '
+            '(ID INTEGER PRIMARY KEY, timestamp REAL, BundleID TEXT, CoalitionID INTEGER, PID INTEGER, ProcessName TEXT)'
+        )
+
+        powerlog_rows: Iterator[Tuple] = iter_powerlog_rows(number_of_rows)
+        powerlog_rows_block = list(islice(powerlog_rows, SYNTHETIC_ROWS_BLOCK_SIZE))
+
+        while powerlog_rows_block:
+            db_conn.executemany(
+                'INSERT INTO PLProcessMonitorAgent_EventForward_ProcessID VALUES (?, ?, ?, ?, ?, ?)',
+                powerlog_rows_block
+            )
+            powerlog_rows_block = list(islice(powerlog_rows, SYNTHETIC_ROWS_BLOCK_SIZE))
+
+        db_conn.commit()
+    finally:
+        db_conn.close()
+
+
+# Writes an archive laid out like a real sysdiagnose (ps.txt first, then the powerlog DB), and returns its path
+# padding_bytes adds a trailing member of random bytes, which makes the archive bigger without adding rows
+def write_synthetic_archive(output_directory_path: str, ps_txt_rows: int, powerlog_rows: int, padding_bytes: int = 0) -> str:
+    archive_path: str = os.path.join(output_directory_path, SYNTHETIC_ARCHIVE_FILE_NAME)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ps_txt_file_path: str = os.path.join(temp_dir, 'ps.txt')
+        powerlog_db_file_path: str = os.path.join(temp_dir, 'powerlog_2024-04-16_19-30_1234.PLSQL')
+
+        write_ps_txt_file(ps_txt_file_path, ps_txt_rows)
+        write_powerlog_db_file(powerlog_db_file_path, powerlog_rows)
+
+        with tarfile.open(archive_path, mode='w:gz') as tar_file_obj:
+            tar_file_obj.add(ps_txt_file_path, 'sysdiagnose/ps.txt')
+            tar_file_obj.add(powerlog_db_file_path, 'sysdiagnose/logs/powerlogs/' + os.path.basename(powerlog_db_file_path))
+
+            if padding_bytes:
+                padding_file_path: str = os.path.join(temp_dir, 'padding.bin')
+
+                with open(padding_file_path, 'wb') as padding_file:
+                    padding_file.write(os.urandom(padding_bytes))
+
+                tar_file_obj.add(padding_file_path, 'sysdiagnose/padding.bin')
+
+    return archive_path
+
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(description='Generate a synthetic sysdiagnose TAR file')
+    arg_parser.add_argument('--ps-txt-rows', type=int, default=100000, help='Number of rows in ps.txt')
+    arg_parser.add_argument('--powerlog-rows', type=int, default=100000, help='Number of rows in the powerlog DB table')
+    arg_parser.add_argument('--padding-bytes', type=int, default=0, help='Size of a trailing member of random bytes')
+    arg_parser.add_argument('--output-dir', required=True, help='Directory the TAR file is written to')
+    return arg_parser
+
+
+if __name__ == '__main__':
+    parsed_args = create_arg_parser().parse_args(sys.argv[1:])
+
+    print(write_synthetic_archive(parsed_args.output_dir, parsed_args.ps_txt_rows, parsed_args.powerlog_rows, parsed_args.padding_bytes))
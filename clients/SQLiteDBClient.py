@@ -1,12 +1,41 @@
 import sqlite3
+from pathlib import Path
 from typing import Self
 
 
 class SQLiteDBClient:
-    def __init__(self, name: str):
-        self._conn = sqlite3.connect(name)
+    # timeout is how long to wait for another connection's write lock to be released
+    def __init__(self, name: str, uri: bool = False, timeout: float = 5.0):
+        self._conn = sqlite3.connect(name, uri=uri, timeout=timeout)
         self._cursor = self._conn.cursor()
 
+    # Opens an existing DB file read-only, without copying it into memory
+    # "immutable=1" tells SQLite the file can't change while open, so it skips locking and change detection
+    @classmethod
+    def open_read_only(cls, file_path: str, mmap_size_bytes: int = 0, cache_size_kib: int = 0) -> Self:
+        db_client = cls(Path(file_path).resolve().as_uri() + '?mode=ro&immutable=1', uri=True)
+
+        if mmap_size_bytes:
+            db_client.execute('PRAGMA mmap_size = ' + str(int(mmap_size_bytes)))
+
+        if cache_size_kib:
+            # Negative cache_size values are in KiB rather than pages
+            db_client.execute('PRAGMA cache_size = -' + str(int(cache_size_kib)))
+
+        return db_client
+
+    # Opens (or creates) a DB file for writing large numbers of rows
+    # WAL mode lets readers carry on during a load, and synchronous=NORMAL only syncs at checkpoints
+    # rather than on every commit, which is still safe from corruption in WAL mode
+    @classmethod
+    def open_for_bulk_load(cls, file_path: str, busy_timeout_seconds: float) -> Self:
+        db_client = cls(file_path, timeout=busy_timeout_seconds)
+
+        db_client.execute('PRAGMA journal_mode = WAL')
+        db_client.execute('PRAGMA synchronous = NORMAL')
+
+        return db_client
+
     # Define context managers
     # These manage the lifecycle when used in "with" statements
     def __enter__(self: Self):
@@ -27,6 +56,9 @@ class SQLiteDBClient:
     def commit(self):
         self.connection.commit()
 
+    def rollback(self):
+        self.connection.rollback()
+
     def close(self, commit=True):        
         if commit:
             self.commit()
@@ -38,5 +70,15 @@ class SQLiteDBClient:
     def execute(self, sql, params=None):
         self.cursor.execute(sql, params or ())
 
+    # Runs the statement once per row, in a single call, which is much faster than calling execute in a loop
+    def executemany(self, sql, rows):
+        self.cursor.executemany(sql, rows)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
     def fetchall(self):
-        return self.cursor.fetchall()
\ No newline at end of file
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self.cursor.fetchmany(size)
\ No newline at end of file
@@ -120,4 +120,58 @@ class TestSQLiteDBClient(unittest.TestCase):
         result = client.fetchall()
         self.assertEqual(len(result), 1)
     
-        client.close()
\ No newline at end of file
+        client.close()
+    # Fetch results in batches of a given size
+    def test_fetchmany_returns_batches(self):
+        db_name = ":memory:"
+        client = SQLiteDBClient(db_name)
+        client.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+
+        for name in ['Alice', 'Bob', 'Carol']:
+            client.execute("INSERT INTO test_table (name) VALUES (?)", (name,))
+
+        client.execute("SELECT * FROM test_table")
+        self.assertEqual(len(client.fetchmany(2)), 2)
+        self.assertEqual(len(client.fetchmany(2)), 1)
+        self.assertEqual(client.fetchmany(2), [])
+        client.close()
+
+    # Open an existing DB file read-only, with mmap and cache size pragmas applied
+    def test_open_read_only(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, 'test db.sqlite')
+            client = SQLiteDBClient(db_path)
+            client.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+            client.execute("INSERT INTO test_table (name) VALUES (?)", ("Alice",))
+            client.close()
+
+            client = SQLiteDBClient.open_read_only(db_path, mmap_size_bytes=1024 * 1024, cache_size_kib=2048)
+            client.execute("SELECT name FROM test_table")
+            self.assertEqual(client.fetchall(), [("Alice",)])
+
+            client.execute("PRAGMA cache_size")
+            self.assertEqual(client.fetchall(), [(-2048,)])
+
+            with self.assertRaises(sqlite3.OperationalError):
+                client.execute("INSERT INTO test_table (name) VALUES ('Bob')")
+
+            client.close(commit=False)
+
+    # Open a DB file for bulk loading in WAL mode, and insert many rows with one call
+    def test_open_for_bulk_load_and_executemany(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = SQLiteDBClient.open_for_bulk_load(os.path.join(temp_dir, 'sink.sqlite'), busy_timeout_seconds=1)
+            client.execute("PRAGMA journal_mode")
+            self.assertEqual(client.fetchone(), ('wal',))
+
+            client.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+            client.executemany("INSERT INTO test_table (name) VALUES (?)", iter([("Alice",), ("Bob",)]))
+            client.execute("SELECT name FROM test_table ORDER BY id")
+            self.assertEqual(client.fetchall(), [("Alice",), ("Bob",)])
+            client.close()
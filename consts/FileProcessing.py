@@ -1,3 +1,10 @@
-MAX_INPUT_TAR_FILE_SIZE_BYTES:int = 400000000
 PS_TXT_FILE_NAME_MATCH_PATTERN: str = r'ps\.txt$'
-POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN: str = r'powerlog.*\.PLSQL$'
\ No newline at end of file
+POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN: str = r'powerlog.*\.PLSQL$'
+DEFAULT_INPUT_TAR_FILE_GLOB: str = '*.tar.gz'
+
+# Sysdiagnose archive names, eg: sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236
+# Capture time, then platform, device model and OS build number
+SYSDIAGNOSE_ARCHIVE_NAME_PATTERN: str = (
+    r'^sysdiagnose_(?P<captured_at>\d{4}\.\d{2}\.\d{2}_\d{2}-\d{2}-\d{2}[+-]\d{4})'
+    r'_(?P<platform>[^_]+)_(?P<device_model>.+)_(?P<os_build>[^_]+)$'
+)
@@ -0,0 +1,17 @@
+DEFAULT_HTTP_INGEST_HOST: str = '127.0.0.1'
+DEFAULT_HTTP_INGEST_PORT: int = 8080
+
+# Archives are uploaded with POST requests to this path, eg: POST /archives?name=sysdiagnose_2024.04.16.tar.gz
+HTTP_INGEST_ARCHIVES_PATH: str = '/archives'
+
+# Uploads without a name are named this, plus the time they arrived
+HTTP_INGEST_DEFAULT_ARCHIVE_NAME_PREFIX: str = 'upload'
+
+# Uploads processed at the same time, each on its own thread - uploads past this wait for a free thread,
+# and are held back by the network (their bodies aren't read ahead) until then
+DEFAULT_HTTP_INGEST_MAX_CONCURRENT_ARCHIVES: int = 8
+
+# Request bodies are read in chunks of up to this size, and at most this many chunks are queued per upload for the
+# tar reader, so each upload holds at most about 1MB in memory however large the archive is
+HTTP_INGEST_BODY_CHUNK_SIZE_BYTES: int = 64 * 1024
+HTTP_INGEST_MAX_QUEUED_BODY_CHUNKS: int = 16
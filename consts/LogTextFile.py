@@ -1,2 +1,35 @@
+from typing import Tuple
+
 PROCESS_LOG_TXT_FILE_DELIMITER_REGEX: str = r'\s+'
-NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE: int = 18
\ No newline at end of file
+NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE: int = 18
+
+# ps.txt files larger than this are streamed row by row to the output file, rather than processed in memory
+STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES: int = 16 * 1024 * 1024
+
+# Number of ps.txt rows converted per call when streaming
+TXT_ROW_PARSE_BLOCK_SIZE: int = 10000
+
+# ps.txt files smaller than this are always parsed on a single core, even when parse workers are enabled,
+# since starting the worker processes would take longer than parsing the file
+PARALLEL_TXT_PARSE_MIN_SIZE_BYTES: int = 4 * 1024 * 1024
+
+# Number of chunks each parse worker gets, so uneven chunks still balance out across workers
+PARALLEL_TXT_PARSE_CHUNKS_PER_WORKER: int = 4
+
+# How the parse worker processes are started, in order of preference (the first one the platform supports is used)
+# The pool is created on the ps.txt thread, while the powerlog thread is running, and forking a process that has
+# other threads running can leave locks held in the child (eg: one held by the powerlog thread's SQLite or logging
+# calls), so workers are never forked
+PARALLEL_TXT_PARSE_START_METHODS: Tuple[str, ...] = ('forkserver', 'spawn')
+
+# Chunk size used when copying ps.txt out of the TAR archive
+TXT_FILE_SPOOL_CHUNK_SIZE_BYTES: int = 1024 * 1024
+
+# ps.txt summary (see utils/TxtLogSummary.py) - metrics totalled per group (summed in an unrolled loop, so adding
+# a metric means adding it there too), and the fields events are grouped by
+TXT_LOG_SUMMARY_METRIC_FIELD_NAMES: Tuple[str, ...] = ('CPU', 'MEM', 'RSS', 'VSZ')
+TXT_LOG_SUMMARY_GROUP_FIELD_NAMES: Tuple[str, ...] = ('USER', 'COMMAND', 'PRSNA')
+# Number of groups (and processes) listed per metric
+DEFAULT_TXT_LOG_SUMMARY_TOP_N: int = 10
+# Appended to the ps.txt results file name (eg: ps_summary_<timestamp>.json)
+TXT_LOG_SUMMARY_FILE_NAME_SUFFIX: str = '_summary'
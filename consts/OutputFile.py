@@ -0,0 +1,33 @@
+from typing import Dict, Tuple
+
+# Pretty-printed JSON array (indent=2), the original output format
+OUTPUT_FORMAT_JSON: str = 'json'
+# JSON array with no whitespace between elements
+OUTPUT_FORMAT_JSON_MINIFIED: str = 'json-min'
+# Newline-delimited JSON - one minified object per line, with no surrounding array
+OUTPUT_FORMAT_NDJSON: str = 'ndjson'
+# Directory of binary column files and a JSON manifest, which can be loaded without parsing (see utils/ColumnarWriter.py)
+OUTPUT_FORMAT_COLUMNAR: str = 'columnar'
+
+OUTPUT_FORMATS: Tuple[str, ...] = (OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_JSON_MINIFIED, OUTPUT_FORMAT_NDJSON, OUTPUT_FORMAT_COLUMNAR)
+
+OUTPUT_FILE_EXTENSIONS: Dict[str, str] = {
+    OUTPUT_FORMAT_JSON: '.json',
+    OUTPUT_FORMAT_JSON_MINIFIED: '.json',
+    OUTPUT_FORMAT_NDJSON: '.ndjson',
+    OUTPUT_FORMAT_COLUMNAR: '.columnar',
+}
+
+# Appended to the output file extension when output is gzip compressed
+GZIP_OUTPUT_FILE_EXTENSION: str = '.gz'
+
+# Lower than gzip's default of 9, which is several times slower for only slightly smaller files
+GZIP_COMPRESS_LEVEL: int = 6
+
+# Columnar output
+COLUMNAR_MANIFEST_FILE_NAME: str = 'manifest.json'
+# Increased whenever the layout of the column files or manifest changes
+COLUMNAR_FORMAT_VERSION: int = 3
+
+# Name of the per-stage metrics file written next to the results files (eg: metrics_<timestamp>.json)
+METRICS_FILE_NAME: str = 'metrics'
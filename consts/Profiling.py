@@ -0,0 +1,24 @@
+from typing import Tuple
+
+# Names of the profiling files written next to the results files (eg: profile_<timestamp>.pstats)
+PROFILE_FILE_NAME: str = 'profile'
+PROFILE_FILE_EXTENSION: str = '.pstats'
+ALLOCATIONS_FILE_NAME: str = 'allocations'
+
+# Stages (see utils/MetricsHelper.py) that allocation sites are recorded at the end of, with --profile-alloc
+# Snapshots are slow to take, so they are only taken after extraction, parsing and serialising
+ALLOCATION_PROFILE_STAGE_NAMES: Tuple[str, ...] = (
+    'extract_ps_txt',
+    'extract_powerlog',
+    'ps_txt_parse',
+    'powerlog_parse',
+    'ps_txt_serialise',
+    'powerlog_serialise',
+    # Streamed outputs parse and serialise in the same stage
+    'ps_txt_stream',
+    'ps_txt_parallel_parse',
+    'powerlog_stream',
+)
+
+# Number of allocation sites recorded per stage, largest first
+ALLOCATION_PROFILE_TOP_SITES: int = 15
@@ -0,0 +1,16 @@
+# Increase whenever a change to parsing or serialisation changes the results files, so cached results
+# written by older versions are no longer used
+RESULT_CACHE_PARSER_VERSION: str = '2'
+
+RESULT_CACHE_INDEX_FILE_NAME: str = 'index.sqlite'
+RESULT_CACHE_ENTRIES_DIRECTORY_NAME: str = 'entries'
+
+# Archives are hashed in chunks, so they are never read into memory
+RESULT_CACHE_HASH_CHUNK_SIZE_BYTES: int = 1024 * 1024
+
+# Least recently used entries are evicted once the cache holds more than this
+RESULT_CACHE_DEFAULT_MAX_SIZE_BYTES: int = 10 * 1024 * 1024 * 1024
+RESULT_CACHE_DEFAULT_MAX_ENTRIES: int = 1000
+
+# Batch mode workers share the cache index
+RESULT_CACHE_BUSY_TIMEOUT_SECONDS: float = 60.0
@@ -1,3 +1,60 @@
-QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE: str = (
-    'SELECT ID, timestamp, BundleID, CoalitionID, PID, ProcessName FROM PLProcessMonitorAgent_EventForward_ProcessID;'
-)
\ No newline at end of file
+from typing import Dict, Tuple
+
+PROCESS_EVENT_TABLE_NAME: str = 'PLProcessMonitorAgent_EventForward_ProcessID'
+
+# Without a trailing ";", so a WHERE clause can be added to it
+SELECT_ALL_DATA_FROM_PROCESS_EVENT_TABLE: str = (
+    'SELECT ID, timestamp, BundleID, CoalitionID, PID, ProcessName FROM ' + PROCESS_EVENT_TABLE_NAME
+)
+
+QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE: str = SELECT_ALL_DATA_FROM_PROCESS_EVENT_TABLE + ';'
+
+# Number of rows pulled from the DB cursor at a time when streaming results, which bounds memory use
+DB_LOG_EVENT_FETCH_BATCH_SIZE: int = 10000
+
+# Powerlog DB files up to this size are read into memory and deserialised
+# Larger ones are spooled to a temporary file on disk and opened read-only from there
+MAX_IN_MEMORY_SQLITE_DB_SIZE_BYTES: int = 64 * 1024 * 1024
+
+# Chunk size used when spooling a DB file from the TAR archive to disk
+SQLITE_DB_SPOOL_CHUNK_SIZE_BYTES: int = 1024 * 1024
+
+# Read tuning for DB files opened from disk
+SQLITE_DB_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024
+SQLITE_DB_CACHE_SIZE_KIB: int = 64 * 1024
+
+# SQLite sink - persistent DB that ps.txt and powerlog rows are bulk loaded into (see services/SQLiteSinkService.py)
+SQLITE_SINK_ARCHIVES_TABLE_NAME: str = 'archives'
+SQLITE_SINK_PS_TXT_TABLE_NAME: str = 'ps_txt_events'
+# Same name as the powerlog table the rows come from
+SQLITE_SINK_POWERLOG_TABLE_NAME: str = 'PLProcessMonitorAgent_EventForward_ProcessID'
+
+# Rows are committed in large transactions, since each commit has a fixed cost
+SQLITE_SINK_ROWS_PER_TRANSACTION: int = 500000
+
+# Batch mode loads archives from several processes at once, which take turns holding the write lock
+SQLITE_SINK_BUSY_TIMEOUT_SECONDS: float = 600.0
+
+# Incremental extraction - high-water marks of the rows already exported per device and table
+# (see services/IncrementalStateService.py)
+INCREMENTAL_STATE_BUSY_TIMEOUT_SECONDS: float = 60.0
+# Columns a high-water mark can be kept on - ID (the table's row ID) or timestamp
+INCREMENTAL_MARK_COLUMNS: Tuple[str, ...] = ('ID', 'timestamp')
+DEFAULT_INCREMENTAL_MARK_COLUMN: str = 'ID'
+
+# Powerlog rollups - process event counts per time bucket, computed with GROUP BY inside the powerlog DB
+# Named intervals that can be given instead of a number of seconds
+ROLLUP_INTERVAL_SECONDS_BY_NAME: Dict[str, int] = {
+    'minute': 60, 
+    'hour': 60 * 60, 
+    'day': 24 * 60 * 60, 
+}
+# Units that can follow a number of seconds (eg: 5m, 2h)
+ROLLUP_INTERVAL_UNIT_SECONDS: Dict[str, int] = {
+    's': 1, 
+    'm': 60, 
+    'h': 60 * 60, 
+    'd': 24 * 60 * 60, 
+}
+# Process event columns that events can be grouped by in each time bucket
+ROLLUP_GROUP_BY_COLUMNS: Tuple[str, ...] = ('BundleID', 'ProcessName')
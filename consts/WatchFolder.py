@@ -0,0 +1,15 @@
+# How often the watched directory is scanned for new archives
+DEFAULT_WATCH_POLL_INTERVAL_SECONDS: float = 2.0
+
+# An archive is only processed once its size and modification time are unchanged for this many scans in a row,
+# so archives that are still being uploaded (or copied) into the directory are left alone
+WATCH_STABLE_POLL_COUNT: int = 2
+
+# Archives waiting for a free worker, on top of the ones being processed
+# Stable archives past this are left in the directory until there is room, rather than queued in memory
+DEFAULT_WATCH_QUEUE_DEPTH: int = 4
+
+# Sub-directories of the watched directory that processed archives are moved to
+# They aren't matched by the archive file name pattern, so are never scanned
+WATCH_DONE_DIRECTORY_NAME: str = 'done'
+WATCH_ERROR_DIRECTORY_NAME: str = 'error'
@@ -1,107 +1,152 @@
 import argparse
+import asyncio
 import sys
 import os
 import tarfile
-from typing import IO, List
-from pathlib import Path
-
-from consts.FileProcessing import MAX_INPUT_TAR_FILE_SIZE_BYTES, POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN, PS_TXT_FILE_NAME_MATCH_PATTERN
-from services.DBLogService import DBLogService
-from services.TxtLogService import process_txt_file, write_txt_results_to_file
-from utils.FileHelper import find_file_path
+from typing import List, Optional
+
+from consts.FileProcessing import DEFAULT_INPUT_TAR_FILE_GLOB
+from consts.HttpIngest import DEFAULT_HTTP_INGEST_HOST, DEFAULT_HTTP_INGEST_MAX_CONCURRENT_ARCHIVES, DEFAULT_HTTP_INGEST_PORT
+from consts.LogTextFile import DEFAULT_TXT_LOG_SUMMARY_TOP_N
+from consts.OutputFile import METRICS_FILE_NAME, OUTPUT_FORMAT_JSON, OUTPUT_FORMATS
+from consts.ResultCache import RESULT_CACHE_DEFAULT_MAX_SIZE_BYTES
+from consts.SQLiteDB import DEFAULT_INCREMENTAL_MARK_COLUMN, INCREMENTAL_MARK_COLUMNS, ROLLUP_GROUP_BY_COLUMNS
+from consts.WatchFolder import DEFAULT_WATCH_POLL_INTERVAL_SECONDS, DEFAULT_WATCH_QUEUE_DEPTH
+from models.EventFilters import EventFilters
+from models.PowerlogTableExport import PowerlogTableExport
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from services.BatchProcessingService import run_batch
+from services.HttpIngestService import HttpIngestService, run_http_ingest_server
+from services.TarFileService import process_tar_file_to_result, process_tar_file_with_cache, process_tar_stream
+from services.WatchFolderService import WatchFolderService
+from utils.FileHelper import build_result_file_name, find_tar_file_paths, read_powerlog_table_exports_file
+from utils.MetricsHelper import write_metrics_file
+from utils.TimeHelper import parse_interval_seconds, parse_timestamp
 
 # Creates and returns the ArgumentParser object
 def create_arg_parser():
     parser = argparse.ArgumentParser(description='Extract System Diagnostic Files from Given TAR file')
     parser.add_argument('--input', help='Input file path of your diagnostic TAR file')
+    parser.add_argument('--input-dir', help='Input directory of diagnostic TAR files to process as a batch')
+    parser.add_argument('--glob', default=DEFAULT_INPUT_TAR_FILE_GLOB, help='File name pattern used to find TAR files in --input-dir (default: *.tar.gz)')
+    parser.add_argument('--watch', help='Directory to keep watching for new diagnostic TAR files, which are processed as they arrive and then moved to its done or error sub-directory')
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_WATCH_POLL_INTERVAL_SECONDS, help='Seconds between scans of the --watch directory (default: 2)')
+    parser.add_argument('--watch-queue-depth', type=int, default=DEFAULT_WATCH_QUEUE_DEPTH, help='Number of TAR files from the --watch directory queued for a free worker, on top of the ones being processed (default: 4)')
+    parser.add_argument('--serve', type=int, nargs='?', const=DEFAULT_HTTP_INGEST_PORT, default=None, metavar='PORT', help='Run an HTTP server that diagnostic TAR files are uploaded to (POST /archives?name=<file_name>), processing each one as it streams in (default port: 8080)')
+    parser.add_argument('--serve-host', default=DEFAULT_HTTP_INGEST_HOST, help='Address the --serve HTTP server listens on (default: 127.0.0.1)')
+    parser.add_argument('--serve-max-uploads', type=int, default=DEFAULT_HTTP_INGEST_MAX_CONCURRENT_ARCHIVES, help='Number of uploaded TAR files the --serve HTTP server processes at once (default: 8)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes used in batch and watch modes (default: number of CPUs)')
     parser.add_argument('--output', help='Output directory path for resulting JSON files')
+    parser.add_argument('--parse-workers', type=int, default=1, help='Number of worker processes used to parse very large ps.txt files (default: 1)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT_JSON, help='Layout of resulting files: pretty-printed JSON, minified JSON, NDJSON, or binary columns (default: json)')
+    parser.add_argument('--gzip', action='store_true', help='Gzip compress resulting files as they are written')
+    parser.add_argument('--sqlite-db', help='Path of a SQLite DB to also load ps.txt and powerlog rows into (created if it does not exist)')
+    parser.add_argument('--cache-dir', help='Directory used to cache results files, so unchanged archives are not processed again')
+    parser.add_argument('--cache-max-mb', type=int, default=RESULT_CACHE_DEFAULT_MAX_SIZE_BYTES // (1024 * 1024), help='Size the result cache is kept under, by evicting the least recently used entries (default: 10240)')
+    parser.add_argument('--metrics', nargs='?', const='', default=None, help='Record per-stage metrics (wall time, CPU time, throughput, memory) and write them as JSON to the given path, or next to the resulting files if no path is given')
+    parser.add_argument('--metrics-trace-memory', action='store_true', help='Also measure peak Python memory use per stage with tracemalloc (slows processing down, implies --metrics)')
+    parser.add_argument('--profile', action='store_true', help='Profile processing with cProfile, and write the stats as a .pstats file next to the resulting files')
+    parser.add_argument('--profile-alloc', action='store_true', help='Record the top tracemalloc allocation sites after extraction, parsing and serialising, written as JSON next to the resulting files')
+    parser.add_argument('--powerlog-table', action='append', default=[], help='Name of another powerlog DB table to export to its own resulting file (can be given more than once)')
+    parser.add_argument('--powerlog-tables-file', help='JSON file listing powerlog DB tables to export, as table names and/or {"table": ..., "query": ...} objects')
+    parser.add_argument('--incremental-state', help='Path of a SQLite DB of per-device high-water marks, so only powerlog rows newer than earlier archives are exported (created if it does not exist)')
+    parser.add_argument('--device-id', help='Device the archives came from, for incremental extraction (default: the platform and device model from the archive name)')
+    parser.add_argument('--incremental-column', choices=INCREMENTAL_MARK_COLUMNS, default=DEFAULT_INCREMENTAL_MARK_COLUMN, help='Column the high-water marks are kept on (default: ID)')
+    parser.add_argument('--since', type=parse_timestamp, help='Only export powerlog events at or after this time, as Unix seconds or an ISO 8601 date/time (UTC if no offset is given)')
+    parser.add_argument('--until', type=parse_timestamp, help='Only export powerlog events at or before this time, as Unix seconds or an ISO 8601 date/time (UTC if no offset is given)')
+    parser.add_argument('--bundle-id', action='append', default=[], help='Only export powerlog events for this BundleID (can be given more than once)')
+    parser.add_argument('--process-name', action='append', default=[], help='Only export powerlog events and ps.txt rows for this process name (can be given more than once)')
+    parser.add_argument('--rollup', type=parse_interval_seconds, help='Also write counts of powerlog process events per time bucket of this length - minute, hour, day, or seconds with an optional unit (eg: 300, 5m, 2h)')
+    parser.add_argument('--rollup-group-by', action='append', choices=ROLLUP_GROUP_BY_COLUMNS, help='Process event column the rollups are grouped by in each time bucket (can be given more than once, default: BundleID and ProcessName)')
+    parser.add_argument('--rollup-only', action='store_true', help='Only write the rollups, rather than every powerlog process event as well (requires --rollup)')
+    parser.add_argument('--ps-summary', action='store_true', help='Also write a summary of ps.txt resource use (CPU, MEM, RSS and VSZ totals and top groups by USER, COMMAND and PRSNA), computed while parsing')
+    parser.add_argument('--ps-summary-top-n', type=int, default=DEFAULT_TXT_LOG_SUMMARY_TOP_N, help='Number of groups and processes listed per metric in the ps.txt summary (default: 10)')
+    parser.add_argument('--join-ps', action='store_true', help='Also write powerlog process events joined by PID with the USER, RSS and COMMAND of the same process in ps.txt')
     return parser
 
 
-def process_tar_file(input_tar_file_path: str, output_results_path: str):
-    input_tar_file_size_bytes: int  = os.path.getsize(input_tar_file_path)
-
-    # Safety check for input tar file size
-    # If exceeds 400MB, warn and exit
-    if input_tar_file_size_bytes > MAX_INPUT_TAR_FILE_SIZE_BYTES:
-        sys.exit('Input TAR file size exceeds max allowed size of 400MB.')
-
-    # Open the tar file, but don't extract it yet
-    with tarfile.open(input_tar_file_path) as tar_file_obj:
-        filePathList: List[str] = []
-
-        for file in tar_file_obj:
-            filePath: str = file.name
-
-            filePathList.append(filePath)
-
-        ps_txt_file_path: str | None = find_file_path(filePathList, PS_TXT_FILE_NAME_MATCH_PATTERN)
-
-        if ps_txt_file_path:
-            # Get name of file from path, to use for result file
-            ps_text_file_name = Path(ps_txt_file_path).stem
-            
-            # Extract specific "ps.txt" file from this tar
-            ps_txt_file: IO[bytes] | None = tar_file_obj.extractfile(ps_txt_file_path)
-            
-            if ps_txt_file:
-                # Process the ps.txt file
-                result_json_string: str | None = process_txt_file(ps_txt_file)
-
-                if result_json_string:
-                    write_txt_results_to_file(result_json_string, output_results_path, ps_text_file_name)
-            else:
-                print('Unable to extract ps.txt file from TAR archive.')
-        else:
-             print('Unable to find ps.txt file in TAR archive.')
-    
-        powerlog_plsql_file_path: str | None = find_file_path(filePathList, POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN)
-
-        if powerlog_plsql_file_path:
-            # Get name of file from path, to use for result file
-            powerlog_plsql_file_name = Path(powerlog_plsql_file_path).stem
-            
-            # Extract specific "powerlog plsql" SQLite DB file from this tar
-            powerlog_sqlite_db_file: IO[bytes] | None = tar_file_obj.extractfile(powerlog_plsql_file_path)
-            
-            if powerlog_sqlite_db_file:                
-                # Make sure refernece point is set to beginning of DB file
-                powerlog_sqlite_db_file.seek(0)
-
-                # Read file to turn into bytes stream
-                sqlite_db_file_bytes = powerlog_sqlite_db_file.read()
-
-                # Instantiate new DBLogService with SQLite DB file
-                process_event_service = DBLogService(sqlite_db_file_bytes)
-
-                # Process the powerlog plsql (SQLite DB) file
-                result_json: str | None = process_event_service.process_sqlite_db_file()
-
-                if result_json:
-                    # Write result to disk
-                    process_event_service.write_db_results_to_file(result_json, output_results_path, powerlog_plsql_file_name)
-            else:
-                print('Unable to extract powerlog plsqsl file from TAR archive.')
-        else:
-            print('Unable to find powerlog plsqsl file in TAR archive.') 
-
-        # Close tar file object
-        tar_file_obj.close()
+# Builds the per-archive processing options from the parsed command line arguments
+def create_processing_options(parsed_args: argparse.Namespace) -> ProcessingOptions:
+    return ProcessingOptions(
+        parse_workers=max(1, parsed_args.parse_workers),
+        output_format=parsed_args.output_format,
+        compress_output=parsed_args.gzip,
+        sqlite_sink_path=parsed_args.sqlite_db,
+        cache_dir=parsed_args.cache_dir,
+        cache_max_size_bytes=parsed_args.cache_max_mb * 1024 * 1024,
+        collect_metrics=parsed_args.metrics is not None or parsed_args.metrics_trace_memory,
+        trace_memory=parsed_args.metrics_trace_memory,
+        metrics_path=parsed_args.metrics or None,
+        profile_calls=parsed_args.profile,
+        profile_allocations=parsed_args.profile_alloc,
+        powerlog_table_exports=tuple(
+            [PowerlogTableExport(table_name) for table_name in parsed_args.powerlog_table] + 
+            (read_powerlog_table_exports_file(parsed_args.powerlog_tables_file) if parsed_args.powerlog_tables_file else [])
+        ),
+        incremental_state_path=parsed_args.incremental_state,
+        device_id=parsed_args.device_id,
+        incremental_mark_column=parsed_args.incremental_column,
+        event_filters=EventFilters(
+            since=parsed_args.since,
+            until=parsed_args.until,
+            bundle_ids=tuple(parsed_args.bundle_id),
+            process_names=tuple(parsed_args.process_name),
+        ),
+        powerlog_rollup_interval_seconds=parsed_args.rollup,
+        powerlog_rollup_group_by=tuple(dict.fromkeys(parsed_args.rollup_group_by)) if parsed_args.rollup_group_by else ROLLUP_GROUP_BY_COLUMNS,
+        powerlog_rollup_only=parsed_args.rollup_only,
+        ps_txt_summary=parsed_args.ps_summary,
+        ps_txt_summary_top_n=max(1, parsed_args.ps_summary_top_n),
+        join_ps_txt_with_powerlog=parsed_args.join_ps,
+    )
+
+
+def process_tar_file(input_tar_file_path: str, output_results_path: str, options: Optional[ProcessingOptions] = None):
+    if options and (options.collect_metrics or options.profile_calls or options.profile_allocations):
+        # Each stage is measured or profiled, and the metrics are written to the metrics path or next to the results files
+        tar_file_result: TarFileResult = process_tar_file_to_result(input_tar_file_path, output_results_path, options)
+
+        if tar_file_result.metrics:
+            write_metrics_file(
+                tar_file_result.metrics, 
+                options.metrics_path or build_result_file_name(output_results_path, METRICS_FILE_NAME)
+            )
+    elif options and options.cache_dir:
+        # Unchanged archives return their existing results files from the result cache
+        process_tar_file_with_cache(input_tar_file_path, output_results_path, options)
+    else:
+        # Open the tar file as a forward-only stream (also works for non-seekable inputs, such as pipes)
+        # The compression (eg: gzip, or none for a plain .tar) is detected from the start of the stream
+        with tarfile.open(input_tar_file_path, mode='r|*') as tar_file_obj:
+            process_tar_stream(tar_file_obj, output_results_path, input_tar_file_path, options)
 
-        sys.exit('Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
+    sys.exit('Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
 
 
 if __name__ == '__main__':
     arg_parser = create_arg_parser()
     parsed_args = arg_parser.parse_args(sys.argv[1:])
 
-    if not parsed_args.input:
+    if not parsed_args.input and not parsed_args.input_dir and not parsed_args.watch and parsed_args.serve is None:
         sys.exit('A valid TAR (.tar.gz) file is required as input')
 
     if not parsed_args.output:
         sys.exit('A valid output directory is required for resulting JSON files output.\nFor example: results-json')
     
-    if os.path.exists(parsed_args.input):
+    if parsed_args.serve is not None:
+        print('Serving TAR file uploads')
+    elif parsed_args.watch:
+        if os.path.isdir(parsed_args.watch):
+            print('Valid watch directory')
+        else:
+            sys.exit('A valid directory to watch for TAR (.tar.gz) files is required for watch mode')
+    elif parsed_args.input_dir:
+        if os.path.isdir(parsed_args.input_dir):
+            print('Valid input directory')
+        else:
+            sys.exit('A valid input directory of TAR (.tar.gz) files is required for batch mode')
+    elif os.path.exists(parsed_args.input):
         print('Valid input path')
     else:
         sys.exit('A valid TAR (.tar.gz) file is required as input')
@@ -110,9 +155,65 @@ if __name__ == '__main__':
        print('Valid output path')
     else:
         sys.exit('A valid output directory is required for resulting JSON files output.\nFor example: results-json')
+
+    if parsed_args.powerlog_tables_file and not os.path.isfile(parsed_args.powerlog_tables_file):
+        sys.exit('A valid JSON file of powerlog tables is required for --powerlog-tables-file')
+
+    if parsed_args.rollup_only and not parsed_args.rollup:
+        sys.exit('A rollup interval (--rollup) is required for --rollup-only')
+
+    if parsed_args.serve is not None and (
+        parsed_args.cache_dir or 
+        parsed_args.metrics is not None or 
+        parsed_args.metrics_trace_memory or 
+        parsed_args.profile or 
+        parsed_args.profile_alloc
+    ):
+        sys.exit('--cache-dir, --metrics, --profile and --profile-alloc are not supported with --serve')
         
     # remove trailing slashes from provided output directory path, if present
     # eg: json-results/ becomes json-results
     cleaned_output_directory_path = parsed_args.output.rstrip('/')
+
+    processing_options: ProcessingOptions = create_processing_options(parsed_args)
+
+    if parsed_args.serve is not None:
+        # Runs until interrupted (eg: Ctrl+C)
+        try:
+            asyncio.run(run_http_ingest_server(HttpIngestService(
+                cleaned_output_directory_path, 
+                processing_options, 
+                parsed_args.serve_host, 
+                parsed_args.serve, 
+                max(1, parsed_args.serve_max_uploads)
+            )))
+        except KeyboardInterrupt:
+            pass
+
+        sys.exit('Stopped serving TAR file uploads. Successful results saved to JSON files in specified directory.')
+
+    if parsed_args.watch:
+        # Runs until interrupted (eg: Ctrl+C), then finishes the TAR files already being processed
+        with WatchFolderService(
+            parsed_args.watch, 
+            cleaned_output_directory_path, 
+            processing_options, 
+            parsed_args.workers, 
+            max(0, parsed_args.watch_queue_depth), 
+            parsed_args.glob
+        ) as watch_folder_service:
+            watch_folder_service.run(max(0.1, parsed_args.watch_interval))
+
+        sys.exit('Stopped watching for TAR files. Successful results saved to JSON files in specified directory.')
     
-    process_tar_file(parsed_args.input, cleaned_output_directory_path)
+    if parsed_args.input_dir:
+        input_tar_file_paths: List[str] = find_tar_file_paths(parsed_args.input_dir, parsed_args.glob)
+
+        if not input_tar_file_paths:
+            sys.exit('No TAR files matching "' + parsed_args.glob + '" found in input directory')
+
+        run_batch(input_tar_file_paths, cleaned_output_directory_path, parsed_args.workers, processing_options)
+
+        sys.exit('Finished batch processing TAR files. Successful results saved to JSON files in specified directory.')
+
+    process_tar_file(parsed_args.input, cleaned_output_directory_path, processing_options)
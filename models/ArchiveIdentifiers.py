@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# Identifiers parsed from a sysdiagnose archive name
+# Only archive_name is always present - the rest are None if the name doesn't follow the sysdiagnose pattern
+@dataclass
+class ArchiveIdentifiers:
+    archive_name: str
+    captured_at: Optional[str] = None
+    platform: Optional[str] = None
+    device_model: Optional[str] = None
+    os_build: Optional[str] = None
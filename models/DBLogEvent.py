@@ -1,11 +1,18 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Any, Optional, Tuple
 
-@dataclass
+# slots=True - no per-instance __dict__, as millions of these can be created for a single powerlog
+@dataclass(slots=True)
 class DBLogEvent:
     ID: int
     timestamp: Optional[float]
     BundleID: Optional[str]
     CoalitionID: Optional[int]
     PID: Optional[int]
-    ProcessName: Optional[str]
\ No newline at end of file
+    ProcessName: Optional[str]
+
+# Same order as the columns returned by QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE
+DB_LOG_EVENT_FIELD_NAMES: Tuple[str, ...] = tuple(field.name for field in fields(DBLogEvent))
+
+# Declared field types (eg: Optional[float]), in the same order, used to choose the column types of columnar output
+DB_LOG_EVENT_FIELD_TYPES: Tuple[Any, ...] = tuple(field.type for field in fields(DBLogEvent))
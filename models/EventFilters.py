@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Limits the rows exported to a time window and/or a few bundles or processes
+# Powerlog rows are filtered by the WHERE clause of the query, and ps.txt rows while they are parsed (by process name only,
+# since ps.txt has no bundle IDs, and is a single snapshot rather than a series of timed events)
+@dataclass(frozen=True)
+class EventFilters:
+    # Earliest and latest event timestamps kept, as Unix seconds, inclusive (None = unbounded)
+    since: Optional[float] = None
+    until: Optional[float] = None
+    # BundleIDs kept (empty = every bundle)
+    bundle_ids: Tuple[str, ...] = ()
+    # Process names kept, matched against the powerlog ProcessName and the executable in the ps.txt COMMAND (empty = every process)
+    process_names: Tuple[str, ...] = ()
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Describes how a list of JSON objects is laid out in an output file
+@dataclass(frozen=True)
+class JsonOutputLayout:
+    opening: str
+    first_item_prefix: str
+    item_separator: str
+    closing: str
+    empty_closing: str
+    indent: Optional[int]
+    separators: Tuple[str, str]
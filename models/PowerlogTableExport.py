@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# A powerlog DB table that is exported to its own results file, as well as the process events table
+@dataclass(frozen=True)
+class PowerlogTableExport:
+    # Name of the table (eg: PLBatteryAgent_EventBackward_Battery), which is also added to the results file name
+    table_name: str
+    # Query run instead of selecting every column of the table (None = every column, found with PRAGMA table_info)
+    query: Optional[str] = None
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from consts.LogTextFile import DEFAULT_TXT_LOG_SUMMARY_TOP_N
+from consts.OutputFile import OUTPUT_FORMAT_JSON
+from consts.ResultCache import RESULT_CACHE_DEFAULT_MAX_ENTRIES, RESULT_CACHE_DEFAULT_MAX_SIZE_BYTES
+from consts.SQLiteDB import DEFAULT_INCREMENTAL_MARK_COLUMN, ROLLUP_GROUP_BY_COLUMNS
+from models.EventFilters import EventFilters
+from models.PowerlogTableExport import PowerlogTableExport
+
+@dataclass
+class ProcessingOptions:
+    # Number of worker processes used to parse a large ps.txt file (1 = parse on a single core)
+    parse_workers: int = 1
+    # Layout of the results files: pretty-printed JSON, minified JSON, NDJSON or columnar (see consts/OutputFile.py)
+    output_format: str = OUTPUT_FORMAT_JSON
+    # Whether results files are gzip compressed as they are written
+    compress_output: bool = False
+    # Path of a persistent SQLite DB that rows are also bulk loaded into (None = JSON results files only)
+    sqlite_sink_path: Optional[str] = None
+    # Directory of cached results files, keyed by archive contents (None = always process archives)
+    cache_dir: Optional[str] = None
+    cache_max_size_bytes: int = RESULT_CACHE_DEFAULT_MAX_SIZE_BYTES
+    cache_max_entries: int = RESULT_CACHE_DEFAULT_MAX_ENTRIES
+    # Whether per-stage metrics (wall time, CPU time, throughput and memory) are collected for each archive
+    collect_metrics: bool = False
+    # Whether peak Python memory use is measured per stage with tracemalloc (slows processing down)
+    trace_memory: bool = False
+    # Path the metrics JSON is written to (None = next to the results files)
+    metrics_path: Optional[str] = None
+    # Whether each archive is profiled with cProfile, written as a .pstats file next to the results files
+    profile_calls: bool = False
+    # Whether the top allocation sites are recorded after extraction, parsing and serialising (see consts/Profiling.py)
+    profile_allocations: bool = False
+    # Other powerlog DB tables exported to their own results files, from the same opened DB as the process events
+    powerlog_table_exports: Tuple[PowerlogTableExport, ...] = ()
+    # Path of the local SQLite DB of per-device high-water marks (None = always export every powerlog row)
+    incremental_state_path: Optional[str] = None
+    # Device the archives came from, for its high-water marks (None = grouped by the platform and device model)
+    device_id: Optional[str] = None
+    # Column the high-water marks are kept on (ID or timestamp)
+    incremental_mark_column: str = DEFAULT_INCREMENTAL_MARK_COLUMN
+    # Time window, bundles and processes the exported rows are limited to (default = every row)
+    event_filters: EventFilters = EventFilters()
+    # Whether a summary of ps.txt resource use (totals, and the top groups by USER, COMMAND and PRSNA) is written
+    # alongside the ps.txt results file
+    ps_txt_summary: bool = False
+    # Number of groups (and processes) listed per metric in the summary
+    ps_txt_summary_top_n: int = DEFAULT_TXT_LOG_SUMMARY_TOP_N
+    # Length of the time buckets that powerlog process events are counted in, in seconds (None = no rollups)
+    powerlog_rollup_interval_seconds: Optional[int] = None
+    # Process event columns the events are also grouped by in each bucket
+    powerlog_rollup_group_by: Tuple[str, ...] = ROLLUP_GROUP_BY_COLUMNS
+    # Whether only the rollups are written, rather than every process event as well
+    powerlog_rollup_only: bool = False
+    # Whether powerlog process events are also written joined by PID with the ps.txt USER, RSS and COMMAND
+    join_ps_txt_with_powerlog: bool = False
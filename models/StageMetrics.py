@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# Measurements for one stage of processing an archive (eg: parsing ps.txt)
+@dataclass
+class StageMetrics:
+    name: str
+    wall_seconds: float = 0.0
+    # CPU time of the thread that ran the stage
+    cpu_seconds: float = 0.0
+    row_count: Optional[int] = None
+    byte_count: Optional[int] = None
+    # Peak memory allocated by Python during the stage (only measured when tracemalloc is tracing)
+    peak_traced_memory_bytes: Optional[int] = None
+    # Peak resident set size of the whole process so far, at the end of the stage
+    peak_rss_bytes: Optional[int] = None
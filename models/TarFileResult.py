@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+@dataclass
+class TarFileResult:
+    input_tar_file_path: str
+    success: bool = True
+    error: Optional[str] = None
+    ps_txt_row_count: Optional[int] = None
+    powerlog_row_count: Optional[int] = None
+    ps_txt_seconds: Optional[float] = None
+    powerlog_seconds: Optional[float] = None
+    total_seconds: float = 0.0
+    # Whether the results files came from the result cache, rather than processing the archive
+    cache_hit: bool = False
+    # Per-stage metrics (see utils/MetricsHelper.py), if they were collected
+    metrics: Optional[Dict[str, Any]] = None
@@ -1,7 +1,8 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Any, Optional, Tuple
 
-@dataclass
+# slots=True gives each event a fixed attribute layout, which is smaller and faster to read than a __dict__
+@dataclass(slots=True)
 class TxtLogEvent:
     USER: str             
     UID: int
@@ -20,4 +21,10 @@ class TxtLogEvent:
     STAT: Optional[str]   
     STARTED: Optional[str]       
     TIME: Optional[str]   
-    COMMAND: Optional[str]
\ No newline at end of file
+    COMMAND: Optional[str]
+
+# Field names in declaration order, computed once, for building output rows without dataclasses.asdict
+TXT_LOG_EVENT_FIELD_NAMES: Tuple[str, ...] = tuple(field.name for field in fields(TxtLogEvent))
+
+# Declared field types (eg: Optional[float]), in the same order, used to choose the column types of columnar output
+TXT_LOG_EVENT_FIELD_TYPES: Tuple[Any, ...] = tuple(field.type for field in fields(TxtLogEvent))
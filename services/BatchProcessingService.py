@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+from consts.OutputFile import METRICS_FILE_NAME
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from services.TarFileService import process_tar_file_to_result
+from utils.FileHelper import build_result_file_name, get_archive_name
+from utils.MetricsHelper import write_metrics_file
+
+
+# Runs inside a worker process
+# Each archive writes to its own sub-directory, since result file names (eg: ps_<timestamp>.json)
+# are only unique per archive and workers finish at the same time
+def process_tar_file_in_worker(input_tar_file_path: str, output_results_path: str, options: Optional[ProcessingOptions] = None) -> TarFileResult:
+    options = options or ProcessingOptions()
+
+    archive_output_results_path: str = os.path.join(output_results_path, get_archive_name(input_tar_file_path))
+
+    os.makedirs(archive_output_results_path, exist_ok=True)
+
+    tar_file_result: TarFileResult = process_tar_file_to_result(input_tar_file_path, archive_output_results_path, options)
+
+    # Without a metrics path, each archive's metrics are written next to its own results files
+    if tar_file_result.metrics and not options.metrics_path:
+        write_metrics_file(tar_file_result.metrics, build_result_file_name(archive_output_results_path, METRICS_FILE_NAME))
+
+    return tar_file_result
+
+
+def process_tar_files_in_pool(
+    input_tar_file_paths: List[str], 
+    output_results_path: str, 
+    max_workers: Optional[int] = None, 
+    options: Optional[ProcessingOptions] = None
+) -> List[TarFileResult]:
+    # Results are stored by input position, so they come back in the same order as the input paths
+    tar_file_results: List[TarFileResult | None] = [None] * len(input_tar_file_paths)
+
+    # Each archive is processed in its own worker process, so every core on the machine can be used
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_tar_file_in_worker, input_tar_file_path, output_results_path, options): input_index
+            for input_index, input_tar_file_path in enumerate(input_tar_file_paths)
+        }
+
+        for future in as_completed(futures):
+            input_index: int = futures[future]
+            input_tar_file_path: str = input_tar_file_paths[input_index]
+
+            try:
+                tar_file_result: TarFileResult = future.result()
+            except Exception as worker_error:
+                # Worker process itself failed (for example, it was killed), rather than the archive processing
+                print('BatchProcessingService - Worker error for TAR file: ', input_tar_file_path, ' - Error: ', worker_error)
+                tar_file_result = TarFileResult(input_tar_file_path, success=False, error=str(worker_error))
+
+            print(
+                'Finished TAR file: ', input_tar_file_path,
+                ' - success: ', tar_file_result.success,
+                ' - seconds: ', round(tar_file_result.total_seconds, 3)
+            )
+
+            tar_file_results[input_index] = tar_file_result
+
+    return [tar_file_result for tar_file_result in tar_file_results if tar_file_result]
+
+
+def build_batch_summary(tar_file_results: List[TarFileResult], wall_seconds: float) -> str:
+    succeeded_results: List[TarFileResult] = [result for result in tar_file_results if result.success]
+    failed_results: List[TarFileResult] = [result for result in tar_file_results if not result.success]
+
+    summary_lines: List[str] = [
+        'Batch summary:',
+        '  TAR files processed: ' + str(len(tar_file_results)),
+        '  Succeeded: ' + str(len(succeeded_results)),
+        '  Failed: ' + str(len(failed_results)),
+        '  Cache hits: ' + str(sum(1 for result in succeeded_results if result.cache_hit)),
+        '  ps.txt rows: ' + str(sum(result.ps_txt_row_count or 0 for result in succeeded_results)),
+        '  powerlog rows: ' + str(sum(result.powerlog_row_count or 0 for result in succeeded_results)),
+        '  Total processing seconds: ' + str(round(sum(result.total_seconds for result in tar_file_results), 3)),
+        '  Wall clock seconds: ' + str(round(wall_seconds, 3)),
+    ]
+
+    for failed_result in failed_results:
+        summary_lines.append('  FAILED ' + failed_result.input_tar_file_path + ': ' + str(failed_result.error))
+
+    return '\n'.join(summary_lines)
+
+
+def run_batch(
+    input_tar_file_paths: List[str], 
+    output_results_path: str, 
+    max_workers: Optional[int] = None, 
+    options: Optional[ProcessingOptions] = None
+) -> List[TarFileResult]:
+    start_time: float = time.perf_counter()
+
+    tar_file_results: List[TarFileResult] = process_tar_files_in_pool(input_tar_file_paths, output_results_path, max_workers, options)
+
+    print(build_batch_summary(tar_file_results, time.perf_counter() - start_time))
+
+    # With a metrics path, the metrics of every archive are written to it together
+    if options and options.metrics_path:
+        write_metrics_file(
+            [tar_file_result.metrics for tar_file_result in tar_file_results if tar_file_result.metrics], 
+            options.metrics_path
+        )
+
+    return tar_file_results
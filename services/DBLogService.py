@@ -1,21 +1,107 @@
-from typing import Any, List, Optional, Self
+from operator import attrgetter
+from typing import Any, Collection, Dict, Iterator, List, Optional, Self, Sequence, Tuple
 
-from models.DBLogEvent import DBLogEvent
+from models.DBLogEvent import DB_LOG_EVENT_FIELD_NAMES, DB_LOG_EVENT_FIELD_TYPES, DBLogEvent
+from models.EventFilters import EventFilters
+from models.PowerlogTableExport import PowerlogTableExport
+from services.IncrementalStateService import IncrementalStateService
 from clients.SQLiteDBClient import SQLiteDBClient
-from consts.SQLiteDB import QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE
-from utils.FileHelper import write_to_json_file
-from utils.JsonHelper import convert_object_to_json_string, serialise_process_events
-from utils.TimeHelper import get_current_timestamp_utc
+from consts.SQLiteDB import (
+    DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+    PROCESS_EVENT_TABLE_NAME, 
+    QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE, 
+    SELECT_ALL_DATA_FROM_PROCESS_EVENT_TABLE, 
+    SQLITE_DB_CACHE_SIZE_KIB, 
+    SQLITE_DB_MMAP_SIZE_BYTES
+)
+from consts.OutputFile import OUTPUT_FORMAT_JSON
+from utils.FileHelper import build_result_file_name, remove_result_file, write_to_json_file
+from utils.JsonHelper import convert_rows_to_json_string
+from utils.MetricsHelper import measure_stage
+from utils.ResultWriter import create_result_writer
+from utils.SQLiteHelper import build_where_clause, get_field_type_from_declared_column_type, quote_sqlite_identifier
+from utils.TxtLogPidIndex import TXT_LOG_PID_INDEX_FIELD_NAMES, TXT_LOG_PID_INDEX_FIELD_TYPES, TxtLogPidIndex
+
+# Reads every DBLogEvent field at once, as a tuple in field order
+get_db_log_event_values = attrgetter(*DB_LOG_EVENT_FIELD_NAMES)
+
+
+# Runs the query, and yields its rows as plain tuples
+# Rows are pulled from the cursor in batches, so memory use is bounded by the batch size rather than the table size
+def iter_query_rows(
+    db_client: SQLiteDBClient, 
+    query: str, 
+    batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+    query_params: Tuple[Any, ...] = ()
+) -> Iterator[Tuple[Any, ...]]:
+    db_client.execute(query, query_params)
+
+    query_rows: List[Any] = db_client.fetchmany(batch_size)
+
+    while query_rows:
+        yield from query_rows
+
+        query_rows = db_client.fetchmany(batch_size)
+
+
+# Compiles the event filters into parameterised WHERE conditions (see build_where_clause), so rows are filtered by
+# SQLite as the table is read, rather than after every row has been exported
+# Filters on columns the table doesn't have (eg: BundleID, for other exported tables) are left out
+def build_event_filter_conditions(
+    event_filters: EventFilters, 
+    column_names: Collection[str] = DB_LOG_EVENT_FIELD_NAMES
+) -> List[Tuple[str, Tuple[Any, ...]]]:
+    where_conditions: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    if 'timestamp' in column_names:
+        if event_filters.since is not None:
+            where_conditions.append(('"timestamp" >= ?', (event_filters.since,)))
+
+        if event_filters.until is not None:
+            where_conditions.append(('"timestamp" <= ?', (event_filters.until,)))
+
+    if event_filters.bundle_ids and 'BundleID' in column_names:
+        where_conditions.append(('"BundleID" IN (' + ', '.join(['?'] * len(event_filters.bundle_ids)) + ')', event_filters.bundle_ids))
+
+    if event_filters.process_names and 'ProcessName' in column_names:
+        where_conditions.append(('"ProcessName" IN (' + ', '.join(['?'] * len(event_filters.process_names)) + ')', event_filters.process_names))
+
+    return where_conditions
 
 
 class DBLogService:
-    def __init__(self, sqlite_db_file_bytes: bytes):
+    # The DB is given either as in-memory bytes, or as the path to a DB file on disk (for large DBs)
+    def __init__(self, sqlite_db_file_bytes: Optional[bytes] = None, sqlite_db_file_path: Optional[str] = None):
         self._sqlite_db = sqlite_db_file_bytes
+        self._sqlite_db_file_path = sqlite_db_file_path
 
     @property
     def sqlite_db(self: Self):
         return self._sqlite_db
 
+    @property
+    def sqlite_db_file_path(self: Self):
+        return self._sqlite_db_file_path
+
+    def open_db_client(self: Self) -> SQLiteDBClient:
+        if self.sqlite_db_file_path:
+            # Read straight from the file on disk, rather than copying the whole DB into memory
+            return SQLiteDBClient.open_read_only(
+                self.sqlite_db_file_path, 
+                SQLITE_DB_MMAP_SIZE_BYTES, 
+                SQLITE_DB_CACHE_SIZE_KIB
+            )
+
+        db_client: SQLiteDBClient = SQLiteDBClient(':memory:')
+
+        try:
+            db_client.deserialise(self.sqlite_db)
+        except Exception:
+            db_client.close(commit=False)
+            raise
+
+        return db_client
+
     def get_all_db_log_events_from_db(self: Self) -> List[DBLogEvent]:    
         db_log_event_rows: List[Any] = []
         db_log_events: List[DBLogEvent] = []
@@ -23,18 +109,19 @@ class DBLogService:
         try:
             # Define new SQLite DB Client
             # Client automatcially handles connection and cursor lifecycle when using "with" block
-            with SQLiteDBClient(':memory:') as db_client:        
-                db_client.deserialise(self.sqlite_db)
-
+            with measure_stage('powerlog_query') as stage_metrics, self.open_db_client() as db_client:
                 db_client.execute(QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE)
 
                 db_log_event_rows = db_client.fetchall()
 
-            for db_log_event_row in db_log_event_rows:
-                # Map result rows to DBLogEvent data class
-                process_event: DBLogEvent = DBLogEvent(*db_log_event_row)
+                stage_metrics.row_count = len(db_log_event_rows)
 
-                db_log_events.append(process_event)
+            with measure_stage('powerlog_parse', row_count=len(db_log_event_rows)):
+                for db_log_event_row in db_log_event_rows:
+                    # Map result rows to DBLogEvent data class
+                    process_event: DBLogEvent = DBLogEvent(*db_log_event_row)
+
+                    db_log_events.append(process_event)
         except Exception as retrieve_process_events_from_db_error:
             print(
                 'DBLogService - Error retrieving process events from DB: ', 
@@ -44,37 +131,405 @@ class DBLogService:
         return db_log_events
     
     
-    def process_sqlite_db_file(self: Self) -> Optional[str]:
+    # Generator alternative to get_all_db_log_events_from_db, for large DB tables
+    # Rows are pulled from the cursor in batches, so memory use is bounded by the batch size rather than the table size
+    # Rows are yielded as plain tuples, in DB_LOG_EVENT_FIELD_NAMES order
+    # Errors are raised to the caller, since rows may already have been consumed
+    # An already opened DB client can be given (eg: to export several tables from one opened DB), and is left open
+    # A parameterised WHERE clause (see build_where_clause) limits the rows returned (eg: to new rows only)
+    def iter_db_log_event_rows_from_db(
+        self: Self, 
+        batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+        db_client: Optional[SQLiteDBClient] = None, 
+        where_clause: str = '', 
+        where_params: Tuple[Any, ...] = ()
+    ) -> Iterator[Tuple[Any, ...]]:
+        query: str = SELECT_ALL_DATA_FROM_PROCESS_EVENT_TABLE + where_clause if where_clause else QUERY_ALL_DATA_FROM_PROCESS_EVENT_TABLE
+
+        if db_client:
+            yield from iter_query_rows(db_client, query, batch_size, where_params)
+            return
+
+        with self.open_db_client() as db_client:
+            yield from iter_query_rows(db_client, query, batch_size, where_params)
+
+
+    def iter_db_log_events_from_db(self: Self, batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE) -> Iterator[DBLogEvent]:
+        for db_log_event_row in self.iter_db_log_event_rows_from_db(batch_size):
+            # Map result rows to DBLogEvent data class
+            yield DBLogEvent(*db_log_event_row)
+
+
+    # Streams every DB log event straight into the results file (JSON or columnar)
+    # Returns the number of rows written, or None if the DB could not be processed
+    def stream_db_log_events_to_json_file(
+        self: Self, 
+        result_output_path: str, 
+        file_name: str, 
+        batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False, 
+        db_client: Optional[SQLiteDBClient] = None, 
+        where_clause: str = '', 
+        where_params: Tuple[Any, ...] = ()
+    ) -> Optional[int]:
+        # Build result file name (append current timestamp to make unique)
+        resulting_json_file_name: str = build_result_file_name(result_output_path, file_name, output_format, compress)
+
+        try:
+            # Querying, serialising and writing are interleaved a batch at a time, so are measured as one stage
+            with measure_stage('powerlog_stream') as stage_metrics, create_result_writer(
+                resulting_json_file_name, 
+                DB_LOG_EVENT_FIELD_NAMES, 
+                DB_LOG_EVENT_FIELD_TYPES, 
+                output_format, 
+                compress
+            ) as result_writer:
+                # Query rows are already in DBLogEvent field order, so they are written without building a DBLogEvent
+                for db_log_event_row in self.iter_db_log_event_rows_from_db(batch_size, db_client, where_clause, where_params):
+                    result_writer.write_row(db_log_event_row)
+
+                stage_metrics.row_count = result_writer.item_count
+        except Exception as stream_db_log_events_error:
+            print(
+                'DBLogService - Error streaming process events from DB: ', 
+                stream_db_log_events_error
+            )
+
+            # Don't leave a partially written results file behind
+            remove_result_file(resulting_json_file_name)
+
+            return None
+
+        if result_writer.item_count == 0:
+            print('Could not retrieve process events from DB table, or none present')
+            remove_result_file(resulting_json_file_name)
+        else:
+            print('Successfully wrote SQLite DB log file results to JSON file')
+
+        return result_writer.item_count
+
+
+    # Streams the rows of another powerlog table into its own results file (JSON or columnar), named after the table
+    # The table's columns (and their types, for columnar output) are found with PRAGMA table_info, so any table can
+    # be exported without a model for its rows
+    # Returns the number of rows written, or None if the table could not be exported
+    def stream_table_export_to_result_file(
+        self: Self, 
+        db_client: SQLiteDBClient, 
+        table_export: PowerlogTableExport, 
+        result_output_path: str, 
+        file_name: str, 
+        batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False, 
+        incremental_state_service: Optional[IncrementalStateService] = None, 
+        event_filters: Optional[EventFilters] = None
+    ) -> Optional[int]:
+        # Build result file name (append table name and current timestamp to make unique)
+        resulting_json_file_name: str = build_result_file_name(
+            result_output_path, 
+            file_name + '_' + table_export.table_name, 
+            output_format, 
+            compress
+        )
+
+        try:
+            db_client.execute('PRAGMA table_info(' + quote_sqlite_identifier(table_export.table_name) + ')')
+
+            # Rows are (cid, name, type, notnull, dflt_value, pk)
+            declared_column_types: Dict[str, str] = {table_info_row[1]: table_info_row[2] for table_info_row in db_client.fetchall()}
+
+            if not declared_column_types and not table_export.query:
+                print('DBLogService - Table not found in DB: ', table_export.table_name)
+                return None
+
+            # Rows are limited by the event filters on whichever of their columns the table has
+            # Tables with their own query are always exported as the query returns them
+            where_conditions: List[Tuple[str, Tuple[Any, ...]]] = (
+                build_event_filter_conditions(event_filters, declared_column_types) if event_filters and not table_export.query else []
+            )
+
+            # Only rows past the table's high-water mark are exported, with incremental extraction
+            # Tables with their own query (or without the mark column) are always exported in full
+            is_incremental: bool = (
+                incremental_state_service is not None and 
+                not table_export.query and 
+                incremental_state_service.mark_column in declared_column_types
+            )
+
+            if incremental_state_service and is_incremental:
+                high_water_mark_condition = incremental_state_service.get_where_condition(table_export.table_name)
+
+                if high_water_mark_condition:
+                    where_conditions.append(high_water_mark_condition)
+
+            where_clause, where_params = build_where_clause(where_conditions)
+
+            with measure_stage('powerlog_table_export') as stage_metrics:
+                # Blobs can't be written as JSON, so are selected as hex strings (keeping nulls, which hex() doesn't)
+                export_query: str = table_export.query or (
+                    'SELECT ' + ', '.join([
+                        (
+                            'CASE WHEN ' + quote_sqlite_identifier(column_name) + ' IS NULL THEN NULL ELSE hex(' + 
+                            quote_sqlite_identifier(column_name) + ') END AS ' + quote_sqlite_identifier(column_name)
+                        )
+                        if 'BLOB' in declared_column_type.upper() else quote_sqlite_identifier(column_name)
+                        for column_name, declared_column_type in declared_column_types.items()
+                    ]) + ' FROM ' + quote_sqlite_identifier(table_export.table_name) + where_clause
+                )
+
+                db_log_rows: Iterator[Tuple[Any, ...]] = iter_query_rows(db_client, export_query, batch_size, where_params)
+
+                # The query has been run once the first batch is requested, so its columns are known from the cursor
+                first_db_log_row: Optional[Tuple[Any, ...]] = next(db_log_rows, None)
+                field_names: Tuple[str, ...] = tuple(column_description[0] for column_description in db_client.cursor.description)
+                field_types: Tuple[Any, ...] = tuple(
+                    get_field_type_from_declared_column_type(declared_column_types.get(field_name, ''))
+                    for field_name in field_names
+                )
+
+                if first_db_log_row is None:
+                    print('No rows present in DB table: ', table_export.table_name)
+                    return 0
+
+                with create_result_writer(resulting_json_file_name, field_names, field_types, output_format, compress) as result_writer:
+                    result_writer.write_row(first_db_log_row)
+
+                    for db_log_row in db_log_rows:
+                        result_writer.write_row(db_log_row)
+
+                stage_metrics.row_count = result_writer.item_count
+
+            if incremental_state_service and is_incremental:
+                incremental_state_service.update_high_water_mark(db_client, table_export.table_name, where_clause, where_params)
+        except Exception as stream_table_export_error:
+            print(
+                'DBLogService - Error exporting table from DB: ', 
+                table_export.table_name, 
+                ' - Error: ', 
+                stream_table_export_error
+            )
+
+            # Don't leave a partially written results file behind
+            remove_result_file(resulting_json_file_name)
+
+            return None
+
+        print('Successfully wrote SQLite DB table results to file: ', table_export.table_name)
+
+        return result_writer.item_count
+
+
+    # Streams every process event, joined by PID to the ps.txt snapshot, into a results file (JSON or columnar)
+    # Each row is the event's fields followed by the USER, RSS and COMMAND of the ps.txt process with the same PID
+    # (None if ps.txt has no such process), found with one hash lookup per row, so the join is a single pass
+    # A parameterised WHERE clause (see build_where_clause) limits the events joined (eg: to the event filters)
+    # Returns the number of rows written, or None if the rows could not be joined
+    def stream_joined_db_log_events_to_result_file(
+        self: Self, 
+        db_client: SQLiteDBClient, 
+        txt_log_pid_index: TxtLogPidIndex, 
+        result_output_path: str, 
+        file_name: str, 
+        batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False, 
+        where_clause: str = '', 
+        where_params: Tuple[Any, ...] = ()
+    ) -> Optional[int]:
+        # Build result file name (append current timestamp to make unique)
+        resulting_json_file_name: str = build_result_file_name(result_output_path, file_name + '_joined', output_format, compress)
+
+        # Local names avoid attribute lookups inside the loop
+        pid_field_index: int = DB_LOG_EVENT_FIELD_NAMES.index('PID')
+        get_txt_log_pid_index_values = txt_log_pid_index.get_values
+
+        try:
+            with measure_stage('powerlog_ps_txt_join') as stage_metrics, create_result_writer(
+                resulting_json_file_name, 
+                DB_LOG_EVENT_FIELD_NAMES + TXT_LOG_PID_INDEX_FIELD_NAMES, 
+                DB_LOG_EVENT_FIELD_TYPES + TXT_LOG_PID_INDEX_FIELD_TYPES, 
+                output_format, 
+                compress
+            ) as result_writer:
+                for db_log_event_row in self.iter_db_log_event_rows_from_db(batch_size, db_client, where_clause, where_params):
+                    result_writer.write_row(db_log_event_row + get_txt_log_pid_index_values(db_log_event_row[pid_field_index]))
+
+                stage_metrics.row_count = result_writer.item_count
+        except Exception as stream_joined_db_log_events_error:
+            print(
+                'DBLogService - Error joining process events with ps.txt: ', 
+                stream_joined_db_log_events_error
+            )
+
+            # Don't leave a partially written results file behind
+            remove_result_file(resulting_json_file_name)
+
+            return None
+
+        if result_writer.item_count == 0:
+            print('No process events present in DB table to join with ps.txt')
+            remove_result_file(resulting_json_file_name)
+        else:
+            print('Successfully wrote process events joined with ps.txt to file')
+
+        return result_writer.item_count
+
+
+    # Streams the number of process events per time bucket (and per BundleID and/or ProcessName) into a results file
+    # (JSON or columnar), rather than every event
+    # Events are counted by a GROUP BY inside the opened DB, so only one row per bucket and group is ever read out
+    # Buckets start at whole multiples of the interval (in Unix seconds), so buckets line up across archives
+    # A parameterised WHERE clause (see build_where_clause) limits the events counted (eg: to the event filters)
+    # Returns the number of rollup rows written, or None if the rollups could not be computed
+    def stream_process_event_rollups_to_result_file(
+        self: Self, 
+        db_client: SQLiteDBClient, 
+        interval_seconds: int, 
+        group_by_column_names: Sequence[str], 
+        result_output_path: str, 
+        file_name: str, 
+        batch_size: int = DB_LOG_EVENT_FETCH_BATCH_SIZE, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False, 
+        where_clause: str = '', 
+        where_params: Tuple[Any, ...] = ()
+    ) -> Optional[int]:
+        # Build result file name (append interval and current timestamp to make unique)
+        resulting_json_file_name: str = build_result_file_name(
+            result_output_path, 
+            file_name + '_rollup_' + str(interval_seconds) + 's', 
+            output_format, 
+            compress
+        )
+
+        field_names: Tuple[str, ...] = ('bucket_start', *group_by_column_names, 'event_count')
+        field_types: Tuple[Any, ...] = (
+            Optional[int], 
+            *[dict(zip(DB_LOG_EVENT_FIELD_NAMES, DB_LOG_EVENT_FIELD_TYPES))[column_name] for column_name in group_by_column_names], 
+            int
+        )
+
+        # Timestamps are never negative, so casting to an integer rounds down to the start of the bucket
+        quoted_group_by_column_names: List[str] = [quote_sqlite_identifier(column_name) for column_name in group_by_column_names]
+        group_by_column_list: str = ', '.join(['bucket_start', *quoted_group_by_column_names])
+        rollup_query: str = (
+            'SELECT CAST("timestamp" / ? AS INTEGER) * ? AS bucket_start, ' + 
+            ''.join([quoted_column_name + ', ' for quoted_column_name in quoted_group_by_column_names]) + 
+            'COUNT(*) AS event_count FROM ' + quote_sqlite_identifier(PROCESS_EVENT_TABLE_NAME) + where_clause + 
+            ' GROUP BY ' + group_by_column_list + ' ORDER BY ' + group_by_column_list
+        )
+
+        try:
+            with measure_stage('powerlog_rollup') as stage_metrics, create_result_writer(
+                resulting_json_file_name, 
+                field_names, 
+                field_types, 
+                output_format, 
+                compress
+            ) as result_writer:
+                for rollup_row in iter_query_rows(db_client, rollup_query, batch_size, (interval_seconds, interval_seconds) + where_params):
+                    result_writer.write_row(rollup_row)
+
+                stage_metrics.row_count = result_writer.item_count
+        except Exception as stream_rollups_error:
+            print(
+                'DBLogService - Error computing process event rollups from DB: ', 
+                stream_rollups_error
+            )
+
+            # Don't leave a partially written results file behind
+            remove_result_file(resulting_json_file_name)
+
+            return None
+
+        if result_writer.item_count == 0:
+            print('No process events present in DB table to roll up')
+            remove_result_file(resulting_json_file_name)
+        else:
+            print('Successfully wrote SQLite DB process event rollups to file')
+
+        return result_writer.item_count
+
+
+    # Exports every given table from one opened DB, rather than opening (or deserialising) the DB once per table
+    # Returns the number of rows written per table name (None for tables that could not be exported)
+    def stream_table_exports_to_result_files(
+        self: Self, 
+        db_client: SQLiteDBClient, 
+        table_exports: Sequence[PowerlogTableExport], 
+        result_output_path: str, 
+        file_name: str, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False, 
+        incremental_state_service: Optional[IncrementalStateService] = None, 
+        event_filters: Optional[EventFilters] = None
+    ) -> Dict[str, Optional[int]]:
+        return {
+            table_export.table_name: self.stream_table_export_to_result_file(
+                db_client, 
+                table_export, 
+                result_output_path, 
+                file_name, 
+                output_format=output_format, 
+                compress=compress, 
+                incremental_state_service=incremental_state_service, 
+                event_filters=event_filters
+            )
+            for table_export in table_exports
+        }
+
+
+    def convert_db_log_events_to_json_string(self: Self, db_log_events: List[DBLogEvent], output_format: str = OUTPUT_FORMAT_JSON) -> Optional[str]:
+        with measure_stage('powerlog_serialise', row_count=len(db_log_events)) as stage_metrics:
+            results_json_string: Optional[str] = self.encode_db_log_events(db_log_events, output_format)
+
+            stage_metrics.byte_count = len(results_json_string) if results_json_string else 0
+
+        return results_json_string
+
+
+    # Every output format is encoded straight from each event's field values, without a dict per event
+    def encode_db_log_events(self: Self, db_log_events: List[DBLogEvent], output_format: str = OUTPUT_FORMAT_JSON) -> Optional[str]:
+        if not db_log_events:
+            return None
+
+        return convert_rows_to_json_string(
+            [get_db_log_event_values(db_log_event) for db_log_event in db_log_events], 
+            DB_LOG_EVENT_FIELD_NAMES, 
+            output_format
+        )
+
+
+    def process_sqlite_db_file(self: Self, output_format: str = OUTPUT_FORMAT_JSON) -> Optional[str]:
         # Retrieve all db log events from SQLite DB Table
         db_log_events: List[DBLogEvent] = []
         db_log_events = self.get_all_db_log_events_from_db()
 
         if db_log_events:
-            # Serialise log event list to make it JSON-friendly
-            db_log_events_serialisable: List[dict[str, DBLogEvent]] | None = (
-                serialise_process_events(db_log_events)
-            )
-
-            if db_log_events_serialisable:
-                # Convert serialised process events list to JSON
-                db_log_events_json: str | None = convert_object_to_json_string(db_log_events_serialisable, 2)
-
-                return db_log_events_json
+            return self.convert_db_log_events_to_json_string(db_log_events, output_format)
         else:
             print('Could not retrieve process events from DB table, or none present')
             return None
 
 
-    def write_db_results_to_file(self: Self, results_json_string: str, result_output_path: str, file_name: str):
+    # The results string must already be encoded in the given output format
+    def write_db_results_to_file(
+        self: Self, 
+        results_json_string: str, 
+        result_output_path: str, 
+        file_name: str, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False
+    ):
         # Build result file name (append current timestamp to make unique)
-        resulting_json_file_name: str = (
-            result_output_path + '/' + file_name + 
-            '_' + get_current_timestamp_utc() + '.json'
-        )
+        resulting_json_file_name: str = build_result_file_name(result_output_path, file_name, output_format, compress)
         
         try:
             # Write JSON file to disk
-            write_to_json_file(results_json_string, resulting_json_file_name)
+            with measure_stage('powerlog_write', byte_count=len(results_json_string)):
+                write_to_json_file(results_json_string, resulting_json_file_name, compress)
 
             print('Successfully wrote SQLite DB log file results to JSON file')
         except Exception as file_write_excpetion:
@@ -0,0 +1,352 @@
+import asyncio
+import itertools
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Self, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from consts.HttpIngest import (
+    DEFAULT_HTTP_INGEST_HOST, 
+    DEFAULT_HTTP_INGEST_MAX_CONCURRENT_ARCHIVES, 
+    DEFAULT_HTTP_INGEST_PORT, 
+    HTTP_INGEST_ARCHIVES_PATH, 
+    HTTP_INGEST_BODY_CHUNK_SIZE_BYTES, 
+    HTTP_INGEST_DEFAULT_ARCHIVE_NAME_PREFIX, 
+    HTTP_INGEST_MAX_QUEUED_BODY_CHUNKS
+)
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from services.TarFileService import process_tar_stream
+from utils.AsyncChunkPipe import AsyncChunkPipe
+from utils.FileHelper import get_archive_name
+from utils.TimeHelper import get_current_timestamp_utc
+
+
+# Returns the method, target (path and query) and headers (with lower case names) of a request head
+# Raises ValueError if the request head is malformed
+def parse_http_request_head(request_head: bytes) -> Tuple[str, str, Dict[str, str]]:
+    request_line, *header_lines = request_head.decode('latin-1').rstrip('\r\n').split('\r\n')
+    method, target, _ = request_line.split(' ', 2)
+
+    headers: Dict[str, str] = {}
+
+    for header_line in header_lines:
+        header_name, header_value = header_line.split(':', 1)
+        headers[header_name.strip().lower()] = header_value.strip()
+
+    return method, target, headers
+
+
+# Yields the request body a chunk at a time, as it arrives, from either a Content-Length or a chunked body
+# Raises ValueError if the body is malformed, or asyncio.IncompleteReadError if the connection ends part way through it
+async def iter_http_request_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            # Chunk extensions (after a ;) are ignored
+            chunk_size: int = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0].strip(), 16)
+
+            if chunk_size == 0:
+                # Skip any trailer headers, up to the blank line that ends the body
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+
+                return
+
+            async for body_chunk in iter_http_body_bytes(reader, chunk_size):
+                yield body_chunk
+
+            if await reader.readexactly(2) != b'\r\n':
+                raise ValueError('Malformed chunked request body')
+    else:
+        content_length: int = int(headers['content-length'])
+
+        if content_length < 0:
+            raise ValueError('Invalid Content-Length')
+
+        async for body_chunk in iter_http_body_bytes(reader, content_length):
+            yield body_chunk
+
+
+async def iter_http_body_bytes(reader: asyncio.StreamReader, byte_count: int) -> AsyncIterator[bytes]:
+    while byte_count > 0:
+        body_chunk: bytes = await reader.read(min(byte_count, HTTP_INGEST_BODY_CHUNK_SIZE_BYTES))
+
+        if not body_chunk:
+            raise asyncio.IncompleteReadError(b'', byte_count)
+
+        byte_count -= len(body_chunk)
+
+        yield body_chunk
+
+
+def build_http_response(status: HTTPStatus, response_body: Dict[str, Any]) -> bytes:
+    response_body_bytes: bytes = json.dumps(response_body).encode('utf-8')
+
+    return (
+        'HTTP/1.1 ' + str(status.value) + ' ' + status.phrase + '\r\n'
+        'Content-Type: application/json\r\n'
+        'Content-Length: ' + str(len(response_body_bytes)) + '\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode('latin-1') + response_body_bytes
+
+
+# Returns the name an upload is saved under, from the name query parameter (eg: ?name=sysdiagnose_2024.04.16.tar.gz)
+# Only the file name is kept, so a name can't point the results outside the output directory
+# Raises ValueError if the name isn't a usable file name
+def get_upload_archive_name(query: str) -> str:
+    archive_names = parse_qs(query).get('name')
+
+    if not archive_names:
+        return HTTP_INGEST_DEFAULT_ARCHIVE_NAME_PREFIX + '_' + get_current_timestamp_utc() + '.tar.gz'
+
+    archive_name: str = os.path.basename(archive_names[0].replace('\\', '/'))
+
+    if archive_name in ('', '.', '..'):
+        raise ValueError('Invalid archive name: ' + archive_names[0])
+
+    return archive_name
+
+
+def build_upload_response_body(tar_file_result: TarFileResult, archive_output_results_path: str) -> Dict[str, Any]:
+    return {
+        'archive_name': tar_file_result.input_tar_file_path, 
+        'success': tar_file_result.success, 
+        'error': tar_file_result.error, 
+        'ps_txt_row_count': tar_file_result.ps_txt_row_count, 
+        'powerlog_row_count': tar_file_result.powerlog_row_count, 
+        'ps_txt_seconds': tar_file_result.ps_txt_seconds, 
+        'powerlog_seconds': tar_file_result.powerlog_seconds, 
+        'total_seconds': round(tar_file_result.total_seconds, 6), 
+        'output_path': archive_output_results_path, 
+    }
+
+
+# Returns the processing options that uploads can't honour, so they can be rejected up front rather than ignored
+# Metrics and profiles are recorded for one archive at a time per process, but uploads are processed at the same time
+# on several threads, and the result cache is keyed by a hash of the whole archive, which isn't known until the
+# upload has been read (by which time it has already been processed)
+def get_unsupported_upload_options(options: ProcessingOptions) -> List[str]:
+    unsupported_options: List[str] = []
+
+    if options.cache_dir:
+        unsupported_options.append('result cache')
+
+    if options.collect_metrics or options.trace_memory:
+        unsupported_options.append('metrics')
+
+    if options.profile_calls or options.profile_allocations:
+        unsupported_options.append('profiling')
+
+    return unsupported_options
+
+
+# Runs on an executor thread, reading the archive from the pipe as the request body arrives
+# Always returns a result record rather than raising, as in batch mode
+def process_uploaded_tar_stream(
+    archive_pipe: AsyncChunkPipe, 
+    archive_name: str, 
+    archive_output_results_path: str, 
+    options: ProcessingOptions
+) -> TarFileResult:
+    start_time: float = time.perf_counter()
+
+    try:
+        os.makedirs(archive_output_results_path, exist_ok=True)
+
+        # Forward-only stream, as for archives on disk, so nothing needs to seek back in the upload
+        # The compression (eg: gzip, or none for a plain .tar) is detected from the first chunk
+        with tarfile.open(fileobj=archive_pipe, mode='r|*') as tar_file_obj: # type: ignore
+            tar_file_result: TarFileResult = process_tar_stream(tar_file_obj, archive_output_results_path, archive_name, options)
+    except Exception as process_uploaded_tar_stream_error:
+        print('HttpIngestService - Error processing uploaded TAR file: ', archive_name, ' - Error: ', process_uploaded_tar_stream_error)
+        tar_file_result = TarFileResult(archive_name, success=False, error=str(process_uploaded_tar_stream_error))
+    finally:
+        # The rest of the upload is still read, but dropped (eg: once every target member has been found)
+        archive_pipe.close()
+
+    tar_file_result.total_seconds = time.perf_counter() - start_time
+
+    return tar_file_result
+
+
+class HttpIngestService:
+    # Local HTTP server that archives are POSTed to, rather than being staged on disk first
+    # Each request body is streamed into the tar reader as it arrives, through a small bounded pipe, and the archive
+    # is processed on an executor thread, so the event loop only moves bytes and many uploads can arrive at once
+    # without blocking each other. The response is the archive's status and row counts, as JSON
+    # Each upload's results are written to their own sub-directory of the output directory, named after the archive
+    # plus the time it arrived and its upload number, so uploads of the same name never share a directory
+    # Raises ValueError if the options include any that uploads can't honour (see get_unsupported_upload_options)
+    def __init__(
+        self, 
+        output_results_path: str, 
+        options: Optional[ProcessingOptions] = None, 
+        host: str = DEFAULT_HTTP_INGEST_HOST, 
+        port: int = DEFAULT_HTTP_INGEST_PORT, 
+        max_concurrent_archives: int = DEFAULT_HTTP_INGEST_MAX_CONCURRENT_ARCHIVES
+    ):
+        self._output_results_path = output_results_path
+        self._options = options or ProcessingOptions()
+
+        unsupported_options: List[str] = get_unsupported_upload_options(self._options)
+
+        if unsupported_options:
+            raise ValueError('Options not supported for uploaded TAR files: ' + ', '.join(unsupported_options))
+
+        self._host = host
+        self._port = port
+        self._max_concurrent_archives = max_concurrent_archives
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.Server] = None
+        self._upload_numbers: Iterator[int] = itertools.count(1)
+
+    @property
+    def output_results_path(self: Self):
+        return self._output_results_path
+
+    @property
+    def options(self: Self):
+        return self._options
+
+    @property
+    def host(self: Self):
+        return self._host
+
+    # The port being listened on, once started (which is chosen by the OS, if port 0 was given)
+    @property
+    def port(self: Self) -> int:
+        if self._server and self._server.sockets:
+            return self._server.sockets[0].getsockname()[1]
+
+        return self._port
+
+    async def start(self: Self):
+        self._executor = ThreadPoolExecutor(max_workers=self._max_concurrent_archives, thread_name_prefix='http-ingest')
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self._port)
+
+        print('Listening for TAR file uploads on: http://' + self.host + ':' + str(self.port) + HTTP_INGEST_ARCHIVES_PATH)
+
+    async def serve_forever(self: Self):
+        if not self._server:
+            await self.start()
+
+        await self._server.serve_forever() # type: ignore
+
+    # Stops accepting connections, and waits for the archives being processed to finish
+    async def close(self: Self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        if self._executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+            self._executor = None
+
+    async def __aenter__(self: Self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self: Self, *exc_info):
+        await self.close()
+
+    # One request per connection
+    async def handle_connection(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            status, response_body = await self.handle_request(reader, writer)
+        except Exception as handle_request_error:
+            print('HttpIngestService - Error handling request: ', handle_request_error)
+            status, response_body = HTTPStatus.INTERNAL_SERVER_ERROR, {'success': False, 'error': str(handle_request_error)}
+
+        try:
+            writer.write(build_http_response(status, response_body))
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            # The client has gone, so there is no one to send the response to
+            pass
+
+    async def handle_request(self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        try:
+            method, target, headers = parse_http_request_head(await reader.readuntil(b'\r\n\r\n'))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            return HTTPStatus.BAD_REQUEST, {'success': False, 'error': 'Malformed request'}
+
+        request_url = urlsplit(target)
+
+        if request_url.path != HTTP_INGEST_ARCHIVES_PATH:
+            return HTTPStatus.NOT_FOUND, {'success': False, 'error': 'Archives are uploaded to ' + HTTP_INGEST_ARCHIVES_PATH}
+
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'success': False, 'error': 'Archives are uploaded with POST'}
+
+        if 'content-length' not in headers and headers.get('transfer-encoding', '').lower() != 'chunked':
+            return HTTPStatus.LENGTH_REQUIRED, {'success': False, 'error': 'A Content-Length or chunked request body is required'}
+
+        try:
+            archive_name: str = get_upload_archive_name(request_url.query)
+        except ValueError as archive_name_error:
+            return HTTPStatus.BAD_REQUEST, {'success': False, 'error': str(archive_name_error)}
+
+        # Clients that wait before sending the body (eg: curl, for large uploads) are told to go ahead
+        if headers.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+        archive_output_results_path: str = os.path.join(
+            self.output_results_path, 
+            get_archive_name(archive_name) + '_' + get_current_timestamp_utc() + '_' + str(next(self._upload_numbers))
+        )
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        archive_pipe: AsyncChunkPipe = AsyncChunkPipe(loop, HTTP_INGEST_MAX_QUEUED_BODY_CHUNKS)
+
+        # Processing starts straight away, reading the archive as the body arrives
+        process_future: asyncio.Future = loop.run_in_executor(
+            self._executor, 
+            process_uploaded_tar_stream, 
+            archive_pipe, 
+            archive_name, 
+            archive_output_results_path, 
+            self.options
+        )
+
+        try:
+            async for body_chunk in iter_http_request_body(reader, headers):
+                await archive_pipe.write(body_chunk)
+
+            await archive_pipe.write_eof()
+        except BaseException as request_body_error:
+            # Let the tar reader see the end of the stream, so the executor thread isn't left waiting
+            archive_pipe.abort()
+
+            if not isinstance(request_body_error, (asyncio.IncompleteReadError, ConnectionError, ValueError)):
+                raise
+
+            print('HttpIngestService - Error reading uploaded TAR file: ', archive_name, ' - Error: ', request_body_error)
+            await process_future
+
+            return HTTPStatus.BAD_REQUEST, {'archive_name': archive_name, 'success': False, 'error': 'Upload was incomplete or malformed'}
+
+        tar_file_result: TarFileResult = await process_future
+
+        print(
+            'Finished uploaded TAR file: ', archive_name, 
+            ' - success: ', tar_file_result.success, 
+            ' - seconds: ', round(tar_file_result.total_seconds, 3)
+        )
+
+        return (
+            HTTPStatus.OK if tar_file_result.success else HTTPStatus.UNPROCESSABLE_ENTITY, 
+            build_upload_response_body(tar_file_result, archive_output_results_path)
+        )
+
+
+# Runs the server until the process is interrupted (eg: Ctrl+C)
+async def run_http_ingest_server(http_ingest_service: HttpIngestService):
+    async with http_ingest_service:
+        await http_ingest_service.serve_forever()
@@ -0,0 +1,109 @@
+import time
+from typing import Any, Optional, Self, Tuple
+
+from clients.SQLiteDBClient import SQLiteDBClient
+from consts.SQLiteDB import INCREMENTAL_STATE_BUSY_TIMEOUT_SECONDS
+from models.ArchiveIdentifiers import ArchiveIdentifiers
+from models.EventFilters import EventFilters
+from utils.SQLiteHelper import quote_sqlite_identifier
+
+CREATE_HIGH_WATER_MARKS_TABLE: str = (
+    'CREATE TABLE IF NOT EXISTS high_water_marks ('
+    'device_key TEXT NOT NULL, table_name TEXT NOT NULL, mark_column TEXT NOT NULL, filter_key TEXT NOT NULL, '
+    'high_water_mark NUMERIC NOT NULL, updated_at REAL NOT NULL, '
+    'PRIMARY KEY (device_key, table_name, mark_column, filter_key))'
+)
+
+
+# Identifies the device an archive came from, for its high-water marks
+# Sysdiagnose archive names don't include a serial number, so archives are grouped by platform and device model
+# unless a device ID is given - archives from different devices of the same model need their own device ID
+def get_device_key(archive_identifiers: ArchiveIdentifiers, device_id: Optional[str] = None) -> str:
+    if device_id:
+        return device_id
+
+    if archive_identifiers.device_model:
+        return str(archive_identifiers.platform) + '/' + archive_identifiers.device_model
+
+    return archive_identifiers.archive_name
+
+
+# Identifies the event filters rows were exported with, for their high-water marks ('' when unfiltered)
+# A filtered run only exports some of the rows up to its mark, so each set of filters keeps its own marks; otherwise a
+# later unfiltered run would skip the rows the filtered run left out
+def get_filter_key(event_filters: EventFilters) -> str:
+    return repr(event_filters) if event_filters != EventFilters() else ''
+
+
+class IncrementalStateService:
+    # Keeps a high-water mark (the largest ID or timestamp exported so far) per device, powerlog table and set of event
+    # filters (see get_filter_key), in a local SQLite DB, so later archives from the same device only export rows past it
+    # Devices send overlapping captures that repeat weeks of rows, so this keeps output volume and processing
+    # time down to the new rows in each archive
+    def __init__(self, state_path: str, device_key: str, mark_column: str, filter_key: str = ''):
+        self._state_path = state_path
+        self._device_key = device_key
+        self._mark_column = mark_column
+        self._filter_key = filter_key
+
+    @property
+    def state_path(self: Self):
+        return self._state_path
+
+    @property
+    def device_key(self: Self):
+        return self._device_key
+
+    @property
+    def mark_column(self: Self):
+        return self._mark_column
+
+    @property
+    def filter_key(self: Self):
+        return self._filter_key
+
+    def open_state_client(self: Self) -> SQLiteDBClient:
+        db_client: SQLiteDBClient = SQLiteDBClient(self.state_path, timeout=INCREMENTAL_STATE_BUSY_TIMEOUT_SECONDS)
+        db_client.execute(CREATE_HIGH_WATER_MARKS_TABLE)
+
+        return db_client
+
+    def get_high_water_mark(self: Self, table_name: str) -> Optional[Any]:
+        with self.open_state_client() as state_client:
+            state_client.execute(
+                'SELECT high_water_mark FROM high_water_marks WHERE device_key = ? AND table_name = ? AND mark_column = ? AND filter_key = ?', 
+                (self.device_key, table_name, self.mark_column, self.filter_key)
+            )
+            high_water_mark_row: Optional[Tuple[Any, ...]] = state_client.fetchone()
+
+        return high_water_mark_row[0] if high_water_mark_row else None
+
+    # Condition that only matches rows past the table's high-water mark, or None if nothing has been exported yet
+    def get_where_condition(self: Self, table_name: str) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+        high_water_mark: Optional[Any] = self.get_high_water_mark(table_name)
+
+        if high_water_mark is None:
+            return None
+
+        return quote_sqlite_identifier(self.mark_column) + ' > ?', (high_water_mark,)
+
+    # Moves the table's high-water mark up to the largest mark column value of the exported rows (found with the
+    # same WHERE clause the rows were exported with)
+    # The mark only ever moves up, so archives processed out of order (or at the same time) can't move it back
+    def update_high_water_mark(self: Self, db_client: SQLiteDBClient, table_name: str, where_clause: str = '', where_params: Tuple[Any, ...] = ()):
+        db_client.execute(
+            'SELECT MAX(' + quote_sqlite_identifier(self.mark_column) + ') FROM ' + quote_sqlite_identifier(table_name) + where_clause, 
+            where_params
+        )
+        high_water_mark: Optional[Any] = db_client.fetchone()[0]
+
+        if high_water_mark is None:
+            return
+
+        with self.open_state_client() as state_client:
+            state_client.execute(
+                'INSERT INTO high_water_marks (device_key, table_name, mark_column, filter_key, high_water_mark, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (device_key, table_name, mark_column, filter_key) DO UPDATE SET '
+                'high_water_mark = MAX(high_water_mark, excluded.high_water_mark), updated_at = excluded.updated_at', 
+                (self.device_key, table_name, self.mark_column, self.filter_key, high_water_mark, time.time())
+            )
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, List, Optional, Self, Tuple
+
+from clients.SQLiteDBClient import SQLiteDBClient
+from consts.ResultCache import (
+    RESULT_CACHE_BUSY_TIMEOUT_SECONDS, 
+    RESULT_CACHE_ENTRIES_DIRECTORY_NAME, 
+    RESULT_CACHE_HASH_CHUNK_SIZE_BYTES, 
+    RESULT_CACHE_INDEX_FILE_NAME, 
+    RESULT_CACHE_PARSER_VERSION
+)
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from utils.FileHelper import get_archive_name, hash_file, copy_result_file
+
+CREATE_RESULT_CACHE_ENTRIES_TABLE: str = (
+    'CREATE TABLE IF NOT EXISTS result_cache_entries ('
+    'cache_key TEXT PRIMARY KEY, archive_name TEXT, size_bytes INTEGER NOT NULL, '
+    'ps_txt_row_count INTEGER, powerlog_row_count INTEGER, created_at REAL NOT NULL, last_used_at REAL NOT NULL)'
+)
+
+
+def get_directory_size_bytes(directory_path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(walk_directory_path, file_name))
+        for walk_directory_path, _, file_names in os.walk(directory_path)
+        for file_name in file_names
+    )
+
+
+class ResultCacheService:
+    # Content-addressed cache of results files
+    # Entries are keyed by a hash of the archive's contents, the parser version and the options that change
+    # the results files, so re-submitting an unchanged archive returns its existing results files straight away
+    # The index (a small SQLite DB) records each entry's size and when it was last used, so the least recently
+    # used entries can be evicted once the cache grows past its size or entry limits
+    def __init__(self, cache_directory_path: str, max_size_bytes: int, max_entries: int):
+        self._cache_directory_path = cache_directory_path
+        self._max_size_bytes = max_size_bytes
+        self._max_entries = max_entries
+
+    @property
+    def cache_directory_path(self: Self):
+        return self._cache_directory_path
+
+    @property
+    def entries_directory_path(self: Self):
+        return os.path.join(self.cache_directory_path, RESULT_CACHE_ENTRIES_DIRECTORY_NAME)
+
+    def get_entry_directory_path(self: Self, cache_key: str) -> str:
+        return os.path.join(self.entries_directory_path, cache_key)
+
+    def open_index_client(self: Self) -> SQLiteDBClient:
+        os.makedirs(self.entries_directory_path, exist_ok=True)
+
+        db_client: SQLiteDBClient = SQLiteDBClient(
+            os.path.join(self.cache_directory_path, RESULT_CACHE_INDEX_FILE_NAME), 
+            timeout=RESULT_CACHE_BUSY_TIMEOUT_SECONDS
+        )
+        db_client.execute(CREATE_RESULT_CACHE_ENTRIES_TABLE)
+
+        return db_client
+
+    # The archive is hashed in chunks as it is read, so this takes about as long as reading the file once
+    def build_cache_key(self: Self, input_tar_file_path: str, options: ProcessingOptions) -> str:
+        archive_hash: str = hash_file(input_tar_file_path, RESULT_CACHE_HASH_CHUNK_SIZE_BYTES)
+
+        cache_key_parts: List[str] = [
+            archive_hash, 
+            RESULT_CACHE_PARSER_VERSION, 
+            options.output_format, 
+            str(options.compress_output), 
+            # Exported tables each add a results file
+            repr(options.powerlog_table_exports), 
+            # Filters change which rows are in the results files
+            repr(options.event_filters), 
+            # The ps.txt summary adds a results file
+            str(options.ps_txt_summary), 
+            str(options.ps_txt_summary_top_n), 
+            # Rollups add a results file, and can replace the process events results file
+            repr((options.powerlog_rollup_interval_seconds, options.powerlog_rollup_group_by, options.powerlog_rollup_only)), 
+            # The joined process events add a results file
+            str(options.join_ps_txt_with_powerlog)
+        ]
+
+        return hashlib.sha256('\0'.join(cache_key_parts).encode('utf-8')).hexdigest()
+
+    # Returns the cached result for the key, with its results files copied into the output directory,
+    # or None if the key isn't cached
+    def get_cached_result(self: Self, cache_key: str, input_tar_file_path: str, output_results_path: str) -> Optional[TarFileResult]:
+        entry_directory_path: str = self.get_entry_directory_path(cache_key)
+
+        with self.open_index_client() as db_client:
+            db_client.execute(
+                'SELECT ps_txt_row_count, powerlog_row_count FROM result_cache_entries WHERE cache_key = ?', 
+                (cache_key,)
+            )
+            cache_entry_row: Optional[Tuple[Any, ...]] = db_client.fetchone()
+
+            if cache_entry_row is None:
+                return None
+
+            # Entry files were removed outside of the cache, so the entry can't be used
+            if not os.path.isdir(entry_directory_path):
+                db_client.execute('DELETE FROM result_cache_entries WHERE cache_key = ?', (cache_key,))
+                return None
+
+            db_client.execute('UPDATE result_cache_entries SET last_used_at = ? WHERE cache_key = ?', (time.time(), cache_key))
+
+        for result_file_name in os.listdir(entry_directory_path):
+            copy_result_file(
+                os.path.join(entry_directory_path, result_file_name), 
+                os.path.join(output_results_path, result_file_name)
+            )
+
+        return TarFileResult(
+            input_tar_file_path, 
+            ps_txt_row_count=cache_entry_row[0], 
+            powerlog_row_count=cache_entry_row[1], 
+            cache_hit=True
+        )
+
+    # Moves the results files written to the staging directory into a new cache entry
+    def store_result(self: Self, cache_key: str, staging_directory_path: str, tar_file_result: TarFileResult):
+        entry_directory_path: str = self.get_entry_directory_path(cache_key)
+
+        try:
+            os.rename(staging_directory_path, entry_directory_path)
+        except OSError:
+            # Another worker cached the same archive first, so its entry is kept
+            shutil.rmtree(staging_directory_path)
+            return
+
+        current_time: float = time.time()
+
+        with self.open_index_client() as db_client:
+            db_client.execute(
+                'INSERT OR REPLACE INTO result_cache_entries '
+                '(cache_key, archive_name, size_bytes, ps_txt_row_count, powerlog_row_count, created_at, last_used_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', 
+                (
+                    cache_key, 
+                    get_archive_name(tar_file_result.input_tar_file_path), 
+                    get_directory_size_bytes(entry_directory_path), 
+                    tar_file_result.ps_txt_row_count, 
+                    tar_file_result.powerlog_row_count, 
+                    current_time, 
+                    current_time
+                )
+            )
+
+        self.evict_entries()
+
+    # Removes the least recently used entries, until the cache is back within its size and entry limits
+    def evict_entries(self: Self):
+        with self.open_index_client() as db_client:
+            db_client.execute('SELECT cache_key, size_bytes FROM result_cache_entries ORDER BY last_used_at DESC')
+            cache_entry_rows: List[Tuple[str, int]] = db_client.fetchall()
+
+            kept_size_bytes: int = 0
+
+            for cache_entry_index, (cache_key, size_bytes) in enumerate(cache_entry_rows):
+                kept_size_bytes += size_bytes
+
+                if cache_entry_index < self._max_entries and kept_size_bytes <= self._max_size_bytes:
+                    continue
+
+                db_client.execute('DELETE FROM result_cache_entries WHERE cache_key = ?', (cache_key,))
+                shutil.rmtree(self.get_entry_directory_path(cache_key), ignore_errors=True)
+                kept_size_bytes -= size_bytes
+
+    # Returns the cached result for the archive if there is one, otherwise processes the archive into a
+    # staging directory with process_into_directory, caches the results files, and copies them into the output directory
+    def get_or_create_result(
+        self: Self, 
+        input_tar_file_path: str, 
+        output_results_path: str, 
+        options: ProcessingOptions, 
+        process_into_directory: Callable[[str], TarFileResult]
+    ) -> TarFileResult:
+        cache_key: str = self.build_cache_key(input_tar_file_path, options)
+
+        cached_tar_file_result: Optional[TarFileResult] = self.get_cached_result(cache_key, input_tar_file_path, output_results_path)
+
+        if cached_tar_file_result:
+            print('Found cached results for TAR file: ', input_tar_file_path)
+            return cached_tar_file_result
+
+        # Staging directory is in the cache directory, so it can be renamed into place as a new entry
+        staging_directory_path: str = tempfile.mkdtemp(prefix='staging-', dir=self.cache_directory_path)
+
+        try:
+            tar_file_result: TarFileResult = process_into_directory(staging_directory_path)
+
+            for result_file_name in os.listdir(staging_directory_path):
+                copy_result_file(
+                    os.path.join(staging_directory_path, result_file_name), 
+                    os.path.join(output_results_path, result_file_name)
+                )
+        except Exception:
+            shutil.rmtree(staging_directory_path, ignore_errors=True)
+            raise
+
+        # Failed archives aren't cached, so they are retried next time
+        if tar_file_result.success:
+            self.store_result(cache_key, staging_directory_path, tar_file_result)
+        else:
+            shutil.rmtree(staging_directory_path, ignore_errors=True)
+
+        return tar_file_result
@@ -0,0 +1,277 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Self, Sequence, Tuple
+
+from clients.SQLiteDBClient import SQLiteDBClient
+from consts.SQLiteDB import (
+    SQLITE_SINK_ARCHIVES_TABLE_NAME, 
+    SQLITE_SINK_BUSY_TIMEOUT_SECONDS, 
+    SQLITE_SINK_POWERLOG_TABLE_NAME, 
+    SQLITE_SINK_PS_TXT_TABLE_NAME, 
+    SQLITE_SINK_ROWS_PER_TRANSACTION
+)
+from models.ArchiveIdentifiers import ArchiveIdentifiers
+from models.DBLogEvent import DB_LOG_EVENT_FIELD_NAMES, DB_LOG_EVENT_FIELD_TYPES
+from models.TxtLogEvent import TXT_LOG_EVENT_FIELD_NAMES, TXT_LOG_EVENT_FIELD_TYPES
+from services.DBLogService import DBLogService
+from utils.ColumnarWriter import get_column_value_type
+from utils.SQLiteHelper import quote_sqlite_identifier
+
+# Columns every loaded row is tagged with, ahead of its own fields
+SQLITE_SINK_ROW_TAG_COLUMNS: str = 'archive_id INTEGER NOT NULL, device_model TEXT'
+
+# Indexes on each table, which are created once the rows have been loaded
+SQLITE_SINK_TABLE_INDEX_COLUMNS: Dict[str, List[Tuple[str, ...]]] = {
+    SQLITE_SINK_PS_TXT_TABLE_NAME: [('archive_id', 'PID')], 
+    SQLITE_SINK_POWERLOG_TABLE_NAME: [('archive_id', 'timestamp'), ('archive_id', 'PID')], 
+}
+
+
+def get_sqlite_column_type(field_type: Any) -> str:
+    column_value_type: Any = get_column_value_type(field_type)
+
+    if column_value_type is int:
+        return 'INTEGER'
+
+    if column_value_type is float:
+        return 'REAL'
+
+    return 'TEXT'
+
+
+def build_create_table_sql(table_name: str, field_names: Sequence[str], field_types: Sequence[Any]) -> str:
+    return (
+        'CREATE TABLE IF NOT EXISTS ' + quote_sqlite_identifier(table_name) + ' (' + SQLITE_SINK_ROW_TAG_COLUMNS + ', ' + 
+        ', '.join([
+            quote_sqlite_identifier(field_name) + ' ' + get_sqlite_column_type(field_type)
+            for field_name, field_type in zip(field_names, field_types)
+        ]) + ')'
+    )
+
+
+def build_insert_sql(table_name: str, field_names: Sequence[str]) -> str:
+    return (
+        'INSERT INTO ' + quote_sqlite_identifier(table_name) + ' (archive_id, device_model, ' + 
+        ', '.join([quote_sqlite_identifier(field_name) for field_name in field_names]) + ') VALUES (?, ?, ' + 
+        ', '.join(['?'] * len(field_names)) + ')'
+    )
+
+
+def build_create_index_sql(table_name: str, index_columns: Sequence[str]) -> str:
+    return (
+        'CREATE INDEX IF NOT EXISTS ' + quote_sqlite_identifier(table_name + '_' + '_'.join(index_columns).lower()) + 
+        ' ON ' + quote_sqlite_identifier(table_name) + 
+        ' (' + ', '.join([quote_sqlite_identifier(index_column) for index_column in index_columns]) + ')'
+    )
+
+
+SQLITE_SINK_CREATE_TABLE_STATEMENTS: List[str] = [
+    (
+        'CREATE TABLE IF NOT EXISTS ' + SQLITE_SINK_ARCHIVES_TABLE_NAME + ' ('
+        'archive_id INTEGER PRIMARY KEY, archive_name TEXT NOT NULL UNIQUE, captured_at TEXT, '
+        'platform TEXT, device_model TEXT, os_build TEXT)'
+    ), 
+    build_create_table_sql(SQLITE_SINK_PS_TXT_TABLE_NAME, TXT_LOG_EVENT_FIELD_NAMES, TXT_LOG_EVENT_FIELD_TYPES), 
+    build_create_table_sql(SQLITE_SINK_POWERLOG_TABLE_NAME, DB_LOG_EVENT_FIELD_NAMES, DB_LOG_EVENT_FIELD_TYPES), 
+]
+
+
+class SQLiteSinkService:
+    # Bulk loads ps.txt and powerlog rows from one archive into a persistent SQLite DB, as well as the JSON results
+    # Every row is tagged with the archive's ID (see the archives table) and device model, so many archives
+    # can be loaded into the same DB and queried together
+    # Each load opens its own connection, so ps.txt and the powerlog DB can be loaded from separate threads
+    def __init__(self, sqlite_sink_path: str, archive_identifiers: ArchiveIdentifiers):
+        self._sqlite_sink_path = sqlite_sink_path
+        self._archive_identifiers = archive_identifiers
+
+    @property
+    def sqlite_sink_path(self: Self):
+        return self._sqlite_sink_path
+
+    @property
+    def archive_identifiers(self: Self):
+        return self._archive_identifiers
+
+    def open_db_client(self: Self) -> SQLiteDBClient:
+        return SQLiteDBClient.open_for_bulk_load(self.sqlite_sink_path, SQLITE_SINK_BUSY_TIMEOUT_SECONDS)
+
+    # Adds the archive to the archives table (or updates it, if it has been loaded before), and returns its ID
+    def register_archive(self: Self, db_client: SQLiteDBClient) -> int:
+        db_client.execute(
+            'INSERT INTO ' + SQLITE_SINK_ARCHIVES_TABLE_NAME + ' (archive_name, captured_at, platform, device_model, os_build) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (archive_name) DO UPDATE SET '
+            'captured_at = excluded.captured_at, platform = excluded.platform, '
+            'device_model = excluded.device_model, os_build = excluded.os_build', 
+            (
+                self.archive_identifiers.archive_name, 
+                self.archive_identifiers.captured_at, 
+                self.archive_identifiers.platform, 
+                self.archive_identifiers.device_model, 
+                self.archive_identifiers.os_build
+            )
+        )
+
+        db_client.execute(
+            'SELECT archive_id FROM ' + SQLITE_SINK_ARCHIVES_TABLE_NAME + ' WHERE archive_name = ?', 
+            (self.archive_identifiers.archive_name,)
+        )
+
+        return db_client.fetchone()[0]
+
+    # Loader for the ps.txt rows, which is fed each block of rows as ps.txt is parsed (see TxtLogService)
+    def create_ps_txt_loader(self: Self) -> 'SQLiteSinkTableLoader':
+        return SQLiteSinkTableLoader(self, SQLITE_SINK_PS_TXT_TABLE_NAME, TXT_LOG_EVENT_FIELD_NAMES)
+
+    # Returns the number of rows loaded, or None if the rows could not all be loaded
+    # If the file could not be parsed (is_complete is False), the uncommitted rows are rolled back
+    def close_ps_txt_loader(self: Self, ps_txt_loader: 'SQLiteSinkTableLoader', is_complete: bool = True) -> Optional[int]:
+        row_count: Optional[int] = ps_txt_loader.close(is_complete)
+
+        if row_count is not None:
+            print('Successfully loaded txt log file results into SQLite DB')
+        elif ps_txt_loader.load_error:
+            print('SQLiteSinkService - Error loading text file rows into SQLite DB: ', ps_txt_loader.load_error)
+
+        return row_count
+
+    # Returns the number of rows loaded
+    # Errors (from the DB or from the rows themselves) are raised to the caller
+    def load_rows(self: Self, table_name: str, field_names: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> int:
+        table_loader: SQLiteSinkTableLoader = SQLiteSinkTableLoader(self, table_name, field_names)
+        row_iterator: Iterator[Tuple[Any, ...]] = iter(rows)
+
+        try:
+            while True:
+                rows_block: List[Tuple[Any, ...]] = list(islice(row_iterator, SQLITE_SINK_ROWS_PER_TRANSACTION))
+
+                if not rows_block:
+                    break
+
+                table_loader.add_rows(rows_block)
+        except Exception:
+            table_loader.close(is_complete=False)
+            raise
+
+        row_count: Optional[int] = table_loader.close()
+
+        if row_count is None:
+            raise table_loader.load_error # type: ignore
+
+        return row_count
+
+    # Returns the number of rows loaded, or None if the DB could not be loaded
+    # A parameterised WHERE clause (see build_where_clause) limits the rows loaded (eg: to the event filters)
+    def load_powerlog_db(self: Self, db_log_service: DBLogService, where_clause: str = '', where_params: Tuple[Any, ...] = ()) -> Optional[int]:
+        try:
+            row_count: int = self.load_rows(
+                SQLITE_SINK_POWERLOG_TABLE_NAME, 
+                DB_LOG_EVENT_FIELD_NAMES, 
+                db_log_service.iter_db_log_event_rows_from_db(where_clause=where_clause, where_params=where_params)
+            )
+
+            print('Successfully loaded SQLite DB log file results into SQLite DB')
+
+            return row_count
+        except Exception as load_powerlog_db_error:
+            print('SQLiteSinkService - Error loading process events into SQLite DB: ', load_powerlog_db_error)
+            return None
+
+
+class SQLiteSinkTableLoader:
+    # Loads rows into one sink table a block at a time, as they are produced (eg: by the ps.txt parse pass)
+    # The connection is opened (and the archive's old rows deleted) when the first block is added, and each block
+    # is inserted with a single executemany call and committed as one transaction
+    # A failed block is rolled back and the rest of the rows skipped, rather than raised, so the rows can still be
+    # written to the results file; close returns None and load_error holds the error
+    def __init__(self, sink_service: SQLiteSinkService, table_name: str, field_names: Sequence[str]):
+        self._sink_service = sink_service
+        self._table_name = table_name
+        self._field_names = field_names
+        self._db_client: Optional[SQLiteDBClient] = None
+        self._row_tags: Tuple[Any, ...] = ()
+        self._insert_sql: str = build_insert_sql(table_name, field_names)
+        self._row_count: int = 0
+        self._load_error: Optional[Exception] = None
+
+    @property
+    def table_name(self: Self):
+        return self._table_name
+
+    @property
+    def row_count(self: Self):
+        return self._row_count
+
+    @property
+    def load_error(self: Self):
+        return self._load_error
+
+    def _get_db_client(self: Self) -> SQLiteDBClient:
+        if self._db_client:
+            return self._db_client
+
+        db_client: SQLiteDBClient = self._sink_service.open_db_client()
+        self._db_client = db_client
+
+        for create_table_statement in SQLITE_SINK_CREATE_TABLE_STATEMENTS:
+            db_client.execute(create_table_statement)
+
+        archive_id: int = self._sink_service.register_archive(db_client)
+
+        # Loading an archive again replaces its rows, rather than adding duplicates
+        # This is part of the same transaction as the first block of new rows
+        db_client.execute('DELETE FROM ' + quote_sqlite_identifier(self.table_name) + ' WHERE archive_id = ?', (archive_id,))
+
+        self._row_tags = (archive_id, self._sink_service.archive_identifiers.device_model)
+
+        return db_client
+
+    # Closing without committing discards a partially inserted block
+    def _discard(self: Self):
+        if self._db_client:
+            self._db_client.close(commit=False)
+            self._db_client = None
+
+    def _fail(self: Self, load_error: Exception):
+        self._load_error = load_error
+        self._discard()
+
+    # The rows must be in field_names order
+    def add_rows(self: Self, rows: Sequence[Tuple[Any, ...]]):
+        if self.load_error or not rows:
+            return
+
+        try:
+            db_client: SQLiteDBClient = self._get_db_client()
+
+            db_client.executemany(self._insert_sql, [self._row_tags + row for row in rows])
+            db_client.commit()
+
+            self._row_count += len(rows)
+        except Exception as add_rows_error:
+            self._fail(add_rows_error)
+
+    # Returns the number of rows loaded, or None if the rows could not all be loaded
+    # If the rows are incomplete (eg: the file could not be parsed), the uncommitted rows are rolled back
+    def close(self: Self, is_complete: bool = True) -> Optional[int]:
+        if not is_complete:
+            self._discard()
+            return None
+
+        if self.load_error:
+            return None
+
+        try:
+            # The tables are still created (and the archive's old rows deleted) when no rows were added
+            db_client: SQLiteDBClient = self._get_db_client()
+
+            # Indexes are built once at the end, which is much faster than updating them on every insert
+            for index_columns in SQLITE_SINK_TABLE_INDEX_COLUMNS[self.table_name]:
+                db_client.execute(build_create_index_sql(self.table_name, index_columns))
+
+            db_client.close()
+            self._db_client = None
+        except Exception as close_error:
+            self._fail(close_error)
+            return None
+
+        return self.row_count
@@ -0,0 +1,524 @@
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Dict, List, Optional, Tuple
+from pathlib import Path
+
+from consts.FileProcessing import POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN, PS_TXT_FILE_NAME_MATCH_PATTERN
+from consts.LogTextFile import PARALLEL_TXT_PARSE_MIN_SIZE_BYTES, STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES, TXT_FILE_SPOOL_CHUNK_SIZE_BYTES
+from consts.OutputFile import OUTPUT_FORMAT_COLUMNAR
+from consts.Profiling import ALLOCATIONS_FILE_NAME, PROFILE_FILE_EXTENSION, PROFILE_FILE_NAME
+from consts.SQLiteDB import MAX_IN_MEMORY_SQLITE_DB_SIZE_BYTES, PROCESS_EVENT_TABLE_NAME, SQLITE_DB_SPOOL_CHUNK_SIZE_BYTES
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from models.TxtLogEvent import TxtLogEvent
+from services.DBLogService import DBLogService, build_event_filter_conditions
+from services.IncrementalStateService import IncrementalStateService, get_device_key, get_filter_key
+from services.ResultCacheService import ResultCacheService
+from services.SQLiteSinkService import SQLiteSinkService, SQLiteSinkTableLoader
+from services.TxtLogService import (
+    convert_txt_log_events_to_json_string, 
+    get_txt_log_events_from_txt_file, 
+    process_txt_file_in_parallel, 
+    stream_txt_file_to_json_file, 
+    write_txt_log_summary_to_file, 
+    write_txt_results_to_file
+)
+from utils.FileHelper import build_result_file_name, get_archive_identifiers, is_file_path_match, spool_file_to_temp_file
+from utils.MetricsHelper import call_and_measure_stage, measure_stage, start_metrics_recording, stop_metrics_recording
+from utils.ProfileHelper import ProfileSession, profile_thread_call, start_profiling, stop_profiling
+from utils.SQLiteHelper import build_where_clause
+from utils.TimeHelper import get_current_timestamp_utc
+from utils.TxtLogPidIndex import TxtLogPidIndex
+from utils.TxtLogSummary import TxtLogSummary
+
+
+# Pulls the ps.txt file out of the archive, so it can be processed after the tar stream has moved on
+# Files up to the streaming size threshold are held in memory, and larger ones are spooled to disk
+def extract_ps_txt_member(tar_file_obj: tarfile.TarFile, ps_txt_member: tarfile.TarInfo) -> Optional[IO[bytes]]:
+    # Extract specific "ps.txt" file from this tar
+    ps_txt_file: IO[bytes] | None = tar_file_obj.extractfile(ps_txt_member)
+
+    if not ps_txt_file:
+        print('Unable to extract ps.txt file from TAR archive.')
+        return None
+
+    ps_txt_spooled_file = tempfile.SpooledTemporaryFile(max_size=STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES)
+
+    with measure_stage('extract_ps_txt', byte_count=ps_txt_member.size):
+        shutil.copyfileobj(ps_txt_file, ps_txt_spooled_file, TXT_FILE_SPOOL_CHUNK_SIZE_BYTES)
+        ps_txt_spooled_file.seek(0)
+
+    return ps_txt_spooled_file # type: ignore
+
+
+# Returns the number of rows processed, or None if the file could not be processed
+# If enabled in the options, ps.txt is summarised as it is parsed, and the summary written next to the results file
+# If a PID index queue is given, ps.txt is also indexed by PID as it is parsed, and the index (or None, if the file
+# could not be processed) put on the queue for the powerlog thread to join its process events with
+def process_ps_txt_file(
+    ps_txt_file: IO[bytes], 
+    ps_txt_file_size: int, 
+    ps_text_file_name: str, 
+    output_results_path: str, 
+    options: ProcessingOptions, 
+    sqlite_sink_service: Optional[SQLiteSinkService] = None, 
+    txt_log_pid_index_queue: Optional[queue.Queue] = None
+) -> Optional[int]:
+    txt_log_pid_index: Optional[TxtLogPidIndex] = TxtLogPidIndex() if txt_log_pid_index_queue else None
+    ps_txt_row_count: Optional[int] = None
+
+    # The SQLite sink is fed each block of rows from the same parse pass as the results file, like the PID index
+    sqlite_sink_loader: Optional[SQLiteSinkTableLoader] = sqlite_sink_service.create_ps_txt_loader() if sqlite_sink_service else None
+
+    try:
+        txt_log_summary: Optional[TxtLogSummary] = TxtLogSummary(options.ps_txt_summary_top_n) if options.ps_txt_summary else None
+
+        ps_txt_row_count = process_ps_txt_file_to_results_file(
+            ps_txt_file, 
+            ps_txt_file_size, 
+            ps_text_file_name, 
+            output_results_path, 
+            options, 
+            txt_log_summary, 
+            txt_log_pid_index, 
+            sqlite_sink_loader
+        )
+
+        if txt_log_summary and ps_txt_row_count is not None:
+            write_txt_log_summary_to_file(txt_log_summary, output_results_path, ps_text_file_name)
+
+        return ps_txt_row_count
+    finally:
+        ps_txt_file.close()
+
+        # The rows are inserted as they are parsed, so this stage only covers building the indexes
+        if sqlite_sink_service and sqlite_sink_loader:
+            with measure_stage('sqlite_sink_ps_txt') as stage_metrics:
+                stage_metrics.row_count = sqlite_sink_service.close_ps_txt_loader(sqlite_sink_loader, ps_txt_row_count is not None)
+
+        # Always put something on the queue, so the powerlog thread is never left waiting
+        if txt_log_pid_index_queue:
+            txt_log_pid_index_queue.put(txt_log_pid_index if ps_txt_row_count is not None else None)
+
+
+# Returns the number of rows written, or None if the file could not be processed
+def process_ps_txt_file_to_results_file(
+    ps_txt_file: IO[bytes], 
+    ps_txt_file_size: int, 
+    ps_text_file_name: str, 
+    output_results_path: str, 
+    options: ProcessingOptions, 
+    txt_log_summary: Optional[TxtLogSummary] = None, 
+    txt_log_pid_index: Optional[TxtLogPidIndex] = None, 
+    sqlite_sink_loader: Optional[SQLiteSinkTableLoader] = None
+) -> Optional[int]:
+    # Columnar output is always written row by row through the streaming path
+    # (parse workers send back encoded JSON text, so can't be used for it)
+    is_columnar_output: bool = options.output_format == OUTPUT_FORMAT_COLUMNAR
+
+    # Very large files are parsed across multiple cores, if parse workers are enabled
+    if options.parse_workers > 1 and ps_txt_file_size >= PARALLEL_TXT_PARSE_MIN_SIZE_BYTES and not is_columnar_output:
+        return process_txt_file_in_parallel(
+            ps_txt_file, 
+            output_results_path, 
+            ps_text_file_name, 
+            options.parse_workers, 
+            options.output_format, 
+            options.compress_output, 
+            options.event_filters.process_names, 
+            txt_log_summary, 
+            txt_log_pid_index, 
+            sqlite_sink_loader
+        )
+
+    # Large files are streamed straight to the output file, to keep memory use constant
+    if ps_txt_file_size > STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES or is_columnar_output:
+        return stream_txt_file_to_json_file(
+            ps_txt_file, 
+            output_results_path, 
+            ps_text_file_name, 
+            options.output_format, 
+            options.compress_output, 
+            options.event_filters.process_names, 
+            txt_log_summary, 
+            txt_log_pid_index, 
+            sqlite_sink_loader
+        )
+
+    # Process the ps.txt file
+    txt_log_events: List[TxtLogEvent] | None = get_txt_log_events_from_txt_file(
+        ps_txt_file, 
+        options.event_filters.process_names, 
+        txt_log_summary, 
+        txt_log_pid_index, 
+        sqlite_sink_loader
+    )
+
+    if txt_log_events is None:
+        return None
+
+    result_json_string: str | None = convert_txt_log_events_to_json_string(txt_log_events, options.output_format)
+
+    if result_json_string:
+        write_txt_results_to_file(
+            result_json_string, 
+            output_results_path, 
+            ps_text_file_name, 
+            options.output_format, 
+            options.compress_output
+        )
+
+    return len(txt_log_events)
+
+
+# Pulls the powerlog DB out of the archive, so it can be processed after the tar stream has moved on
+def extract_powerlog_member(tar_file_obj: tarfile.TarFile, powerlog_member: tarfile.TarInfo) -> Optional[DBLogService]:
+    # Extract specific "powerlog plsql" SQLite DB file from this tar
+    powerlog_sqlite_db_file: IO[bytes] | None = tar_file_obj.extractfile(powerlog_member)
+
+    if not powerlog_sqlite_db_file:
+        print('Unable to extract powerlog plsqsl file from TAR archive.')
+        return None
+
+    if powerlog_member.size <= MAX_IN_MEMORY_SQLITE_DB_SIZE_BYTES:
+        # Read file to turn into bytes stream
+        with measure_stage('extract_powerlog', byte_count=powerlog_member.size):
+            sqlite_db_file_bytes = powerlog_sqlite_db_file.read()
+
+        # Instantiate new DBLogService with SQLite DB file
+        return DBLogService(sqlite_db_file_bytes)
+
+    # Large DB files are spooled to disk in bounded chunks and read from there, rather than held in memory
+    with measure_stage('extract_powerlog', byte_count=powerlog_member.size):
+        sqlite_db_temp_file_path: str = spool_file_to_temp_file(
+            powerlog_sqlite_db_file, 
+            SQLITE_DB_SPOOL_CHUNK_SIZE_BYTES, 
+            '.PLSQL'
+        )
+
+    return DBLogService(sqlite_db_file_path=sqlite_db_temp_file_path)
+
+
+# Returns the number of rows processed, or None if the DB could not be processed
+# If a PID index queue is given, the process events are also joined with the ps.txt PID index taken from it
+def process_powerlog_db(
+    process_event_service: DBLogService, 
+    powerlog_plsql_file_name: str, 
+    output_results_path: str, 
+    options: ProcessingOptions, 
+    sqlite_sink_service: Optional[SQLiteSinkService] = None, 
+    incremental_state_service: Optional[IncrementalStateService] = None, 
+    txt_log_pid_index_queue: Optional[queue.Queue] = None
+) -> Optional[int]:
+    try:
+        # The event filters are run by SQLite as part of each query
+        event_filter_conditions: List[Tuple[str, Tuple[Any, ...]]] = build_event_filter_conditions(options.event_filters)
+
+        # Load the powerlog plsql (SQLite DB) table rows into the SQLite sink
+        if sqlite_sink_service:
+            with measure_stage('sqlite_sink_powerlog') as stage_metrics:
+                stage_metrics.row_count = sqlite_sink_service.load_powerlog_db(
+                    process_event_service, 
+                    *build_where_clause(event_filter_conditions)
+                )
+
+        # Rollups are counted alongside the process events, or instead of them if only rollups are wanted
+        is_process_event_export: bool = not (options.powerlog_rollup_interval_seconds and options.powerlog_rollup_only)
+
+        if (
+            is_process_event_export and 
+            not options.powerlog_rollup_interval_seconds and 
+            not options.powerlog_table_exports and 
+            not incremental_state_service and 
+            not event_filter_conditions and 
+            not txt_log_pid_index_queue
+        ):
+            # Stream the powerlog plsql (SQLite DB) table rows into the results file
+            return process_event_service.stream_db_log_events_to_json_file(
+                output_results_path, 
+                powerlog_plsql_file_name, 
+                output_format=options.output_format, 
+                compress=options.compress_output
+            )
+
+        # The DB is opened (or deserialised) once, for the process events table and every other exported table
+        with process_event_service.open_db_client() as db_client:
+            # With incremental extraction, only rows past the device's high-water mark are exported
+            high_water_mark_condition: Optional[Tuple[str, Tuple[Any, ...]]] = (
+                incremental_state_service.get_where_condition(PROCESS_EVENT_TABLE_NAME) if incremental_state_service else None
+            )
+            where_clause, where_params = build_where_clause(
+                event_filter_conditions + ([high_water_mark_condition] if high_water_mark_condition else [])
+            )
+
+            powerlog_row_count: Optional[int] = None
+
+            if is_process_event_export:
+                powerlog_row_count = process_event_service.stream_db_log_events_to_json_file(
+                    output_results_path, 
+                    powerlog_plsql_file_name, 
+                    output_format=options.output_format, 
+                    compress=options.compress_output, 
+                    db_client=db_client, 
+                    where_clause=where_clause, 
+                    where_params=where_params
+                )
+
+            if options.powerlog_rollup_interval_seconds:
+                rollup_row_count: Optional[int] = process_event_service.stream_process_event_rollups_to_result_file(
+                    db_client, 
+                    options.powerlog_rollup_interval_seconds, 
+                    options.powerlog_rollup_group_by, 
+                    output_results_path, 
+                    powerlog_plsql_file_name, 
+                    output_format=options.output_format, 
+                    compress=options.compress_output, 
+                    where_clause=where_clause, 
+                    where_params=where_params
+                )
+
+                # With only rollups written, the rollup rows are the powerlog rows written
+                if not is_process_event_export:
+                    powerlog_row_count = rollup_row_count
+
+            if txt_log_pid_index_queue:
+                # Waits for ps.txt to be parsed on the other thread, which is usually done by now
+                txt_log_pid_index: Optional[TxtLogPidIndex] = txt_log_pid_index_queue.get()
+
+                if txt_log_pid_index is not None:
+                    process_event_service.stream_joined_db_log_events_to_result_file(
+                        db_client, 
+                        txt_log_pid_index, 
+                        output_results_path, 
+                        powerlog_plsql_file_name, 
+                        output_format=options.output_format, 
+                        compress=options.compress_output, 
+                        where_clause=where_clause, 
+                        where_params=where_params
+                    )
+                else:
+                    print('Unable to join process events with ps.txt, as ps.txt was not found or could not be processed')
+
+            # The mark is only moved once the new rows have been written
+            if incremental_state_service and powerlog_row_count:
+                incremental_state_service.update_high_water_mark(db_client, PROCESS_EVENT_TABLE_NAME, where_clause, where_params)
+
+            process_event_service.stream_table_exports_to_result_files(
+                db_client, 
+                options.powerlog_table_exports, 
+                output_results_path, 
+                powerlog_plsql_file_name, 
+                options.output_format, 
+                options.compress_output, 
+                incremental_state_service, 
+                options.event_filters
+            )
+
+        return powerlog_row_count
+    finally:
+        # Remove the temporary DB file, if it was spooled to disk
+        if process_event_service.sqlite_db_file_path:
+            os.remove(process_event_service.sqlite_db_file_path)
+
+
+def process_tar_stream(
+    tar_file_obj: tarfile.TarFile, 
+    output_results_path: str, 
+    input_tar_file_path: str = '', 
+    options: Optional[ProcessingOptions] = None
+) -> TarFileResult:
+    options = options or ProcessingOptions()
+
+    tar_file_result: TarFileResult = TarFileResult(input_tar_file_path)
+
+    # Rows are also loaded into a persistent SQLite DB, if one is given, tagged with identifiers from the archive name
+    sqlite_sink_service: Optional[SQLiteSinkService] = (
+        SQLiteSinkService(options.sqlite_sink_path, get_archive_identifiers(input_tar_file_path))
+        if options.sqlite_sink_path else None
+    )
+
+    # Only powerlog rows past the device's high-water marks are exported, if an incremental state path is given
+    incremental_state_service: Optional[IncrementalStateService] = (
+        IncrementalStateService(
+            options.incremental_state_path, 
+            get_device_key(get_archive_identifiers(input_tar_file_path), options.device_id), 
+            options.incremental_mark_column, 
+            get_filter_key(options.event_filters)
+        )
+        if options.incremental_state_path else None
+    )
+    
+    ps_txt_found: bool = False
+    powerlog_plsql_found: bool = False
+
+    ps_txt_future: Optional[Future] = None
+    powerlog_future: Optional[Future] = None
+
+    # The ps.txt thread hands its PID index to the powerlog thread through this queue, if the two are joined
+    txt_log_pid_index_queue: Optional[queue.Queue] = queue.Queue(maxsize=1) if options.join_ps_txt_with_powerlog else None
+
+    # ps.txt and the powerlog DB share nothing, so once each has been pulled out of the archive it is processed
+    # on its own thread. SQLite queries and file writes release the GIL, so the two overlap, and the time taken
+    # per archive comes down to the slower of the two
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Single forward-only pass over the archive members
+        # Each target member is pulled out as soon as it streams past, since a stream-mode tar
+        # cannot go back to a member once the next one has been read
+        # The scan stage includes the extract stages, which are also measured on their own
+        with measure_stage('tar_scan'):
+            try:
+                for member in tar_file_obj:
+                    if not member.isfile():
+                        continue
+
+                    # Assuming log file names that we search for are unique per tar, so only the first match is used
+                    if not ps_txt_found and is_file_path_match(member.name, PS_TXT_FILE_NAME_MATCH_PATTERN):
+                        ps_txt_found = True
+
+                        ps_txt_file: IO[bytes] | None = extract_ps_txt_member(tar_file_obj, member)
+
+                        if ps_txt_file:
+                            # Get name of file from path, to use for result file
+                            ps_txt_future = executor.submit(
+                                profile_thread_call, 
+                                call_and_measure_stage, 
+                                'process_ps_txt', 
+                                process_ps_txt_file, 
+                                ps_txt_file, member.size, Path(member.name).stem, output_results_path, options, sqlite_sink_service, 
+                                txt_log_pid_index_queue
+                            )
+                    elif not powerlog_plsql_found and is_file_path_match(member.name, POWERLOG_PLSQL_FILE_NAME_MATCH_PATTERN):
+                        powerlog_plsql_found = True
+
+                        process_event_service: DBLogService | None = extract_powerlog_member(tar_file_obj, member)
+
+                        if process_event_service:
+                            # Get name of file from path, to use for result file
+                            powerlog_future = executor.submit(
+                                profile_thread_call, 
+                                call_and_measure_stage, 
+                                'process_powerlog', 
+                                process_powerlog_db, 
+                                process_event_service, Path(member.name).stem, output_results_path, options, sqlite_sink_service, 
+                                incremental_state_service, txt_log_pid_index_queue
+                            )
+
+                    # Stop decompressing the rest of the archive once every target has been found
+                    if ps_txt_found and powerlog_plsql_found:
+                        break
+            finally:
+                # Without a ps.txt thread to put the PID index on the queue, the powerlog thread would wait forever
+                if txt_log_pid_index_queue and not ps_txt_future:
+                    txt_log_pid_index_queue.put(None)
+
+        if ps_txt_future:
+            tar_file_result.ps_txt_row_count, tar_file_result.ps_txt_seconds = ps_txt_future.result()
+
+        if powerlog_future:
+            tar_file_result.powerlog_row_count, tar_file_result.powerlog_seconds = powerlog_future.result()
+
+    if not ps_txt_found:
+        print('Unable to find ps.txt file in TAR archive.')
+
+    if not powerlog_plsql_found:
+        print('Unable to find powerlog plsqsl file in TAR archive.')
+
+    return tar_file_result
+
+
+def process_tar_file(input_tar_file_path: str, output_results_path: str, options: Optional[ProcessingOptions] = None) -> TarFileResult:
+    # Open the tar file as a forward-only stream, detecting its compression (eg: gzip, or none for a plain .tar)
+    with tarfile.open(input_tar_file_path, mode='r|*') as tar_file_obj:
+        return process_tar_stream(tar_file_obj, output_results_path, input_tar_file_path, options)
+
+
+# Same as process_tar_file, but unchanged archives return their existing results files from the result cache,
+# if a cache directory is set
+# Archives are always processed when loading into a SQLite sink, since the cache only holds results files, and
+# with incremental extraction, since the rows exported depend on what has been exported before
+def process_tar_file_with_cache(input_tar_file_path: str, output_results_path: str, options: Optional[ProcessingOptions] = None) -> TarFileResult:
+    options = options or ProcessingOptions()
+
+    if not options.cache_dir or options.sqlite_sink_path or options.incremental_state_path:
+        return process_tar_file(input_tar_file_path, output_results_path, options)
+
+    result_cache_service: ResultCacheService = ResultCacheService(
+        options.cache_dir, 
+        options.cache_max_size_bytes, 
+        options.cache_max_entries
+    )
+
+    return result_cache_service.get_or_create_result(
+        input_tar_file_path, 
+        output_results_path, 
+        options, 
+        lambda staging_directory_path: process_tar_file(input_tar_file_path, staging_directory_path, options)
+    )
+
+
+# Profiling files are written next to the results files, whether or not the archive was processed successfully
+def write_profile_files(profile_session: Optional[ProfileSession], output_results_path: str):
+    if profile_session is None:
+        return
+
+    try:
+        if profile_session.profile_calls:
+            profile_session.write_profile_stats(
+                os.path.join(output_results_path, PROFILE_FILE_NAME + '_' + get_current_timestamp_utc() + PROFILE_FILE_EXTENSION)
+            )
+
+        if profile_session.profile_allocations:
+            profile_session.write_allocation_sites(build_result_file_name(output_results_path, ALLOCATIONS_FILE_NAME))
+
+        print('Successfully wrote profiling results to files')
+    except Exception as write_profile_files_error:
+        print('TarFileService - Error writing profiling results: ', write_profile_files_error)
+
+
+# Machine-readable metrics for one archive, with the archive's results alongside the stage measurements
+def build_tar_file_metrics(tar_file_result: TarFileResult, stage_metrics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'input_tar_file_path': tar_file_result.input_tar_file_path, 
+        'success': tar_file_result.success, 
+        'cache_hit': tar_file_result.cache_hit, 
+        'ps_txt_row_count': tar_file_result.ps_txt_row_count, 
+        'powerlog_row_count': tar_file_result.powerlog_row_count, 
+        **(stage_metrics or {}), 
+    }
+
+
+# Processes a single TAR file and always returns a result record rather than raising or exiting
+# Used by batch mode, where one failed archive must not stop the others
+# Per-stage metrics are recorded onto the result, if enabled in the options
+def process_tar_file_to_result(input_tar_file_path: str, output_results_path: str, options: Optional[ProcessingOptions] = None) -> TarFileResult:
+    options = options or ProcessingOptions()
+
+    if options.collect_metrics:
+        start_metrics_recording(options.trace_memory)
+
+    if options.profile_calls or options.profile_allocations:
+        start_profiling(options.profile_calls, options.profile_allocations)
+
+    start_time: float = time.perf_counter()
+
+    try:
+        with measure_stage('archive', byte_count=os.path.getsize(input_tar_file_path)):
+            tar_file_result: TarFileResult = process_tar_file_with_cache(input_tar_file_path, output_results_path, options)
+    except Exception as process_tar_file_error:
+        print('TarFileService - Error processing TAR file: ', input_tar_file_path, ' - Error: ', process_tar_file_error)
+        tar_file_result = TarFileResult(input_tar_file_path, success=False, error=str(process_tar_file_error))
+
+    tar_file_result.total_seconds = time.perf_counter() - start_time
+
+    if options.collect_metrics:
+        tar_file_result.metrics = build_tar_file_metrics(tar_file_result, stop_metrics_recording())
+
+    if options.profile_calls or options.profile_allocations:
+        write_profile_files(stop_profiling(), output_results_path)
+
+    return tar_file_result
@@ -1,62 +1,365 @@
-from typing import IO, List, Optional
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import attrgetter
+from typing import IO, Any, List, Optional, Tuple
 
-from consts.LogTextFile import NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE, PROCESS_LOG_TXT_FILE_DELIMITER_REGEX
-from models.TxtLogEvent import TxtLogEvent
-from utils.FileHelper import write_to_json_file
-from utils.JsonHelper import convert_object_to_json_string, serialise_process_log_items
-from utils.TimeHelper import get_current_timestamp_utc
-from utils.TxtConverter import convert_txt_row_to_txt_log_event
+from consts.LogTextFile import PARALLEL_TXT_PARSE_CHUNKS_PER_WORKER, PARALLEL_TXT_PARSE_START_METHODS, TXT_LOG_SUMMARY_FILE_NAME_SUFFIX, TXT_ROW_PARSE_BLOCK_SIZE
+from consts.OutputFile import OUTPUT_FORMAT_JSON
+from models.TxtLogEvent import TXT_LOG_EVENT_FIELD_NAMES, TXT_LOG_EVENT_FIELD_TYPES, TxtLogEvent
+from services.SQLiteSinkService import SQLiteSinkTableLoader
+from utils.FileHelper import build_result_file_name, remove_result_file, write_to_json_file
+from utils.JsonHelper import convert_rows_to_json_string, encode_json_rows
+from utils.JsonStreamWriter import JsonStreamWriter
+from utils.MetricsHelper import measure_stage
+from utils.ResultWriter import create_result_writer
+from utils.TxtConverter import TxtRowsConverter, get_txt_rows_converter, split_txt_rows_into_chunks
+from utils.TxtLogPidIndex import TxtLogPidIndex
+from utils.TxtLogSummary import TxtLogSummary
 
+# Reads every TxtLogEvent field at once, as a tuple in field order
+get_txt_log_event_values = attrgetter(*TXT_LOG_EVENT_FIELD_NAMES)
 
-def process_txt_file(txt_file: IO[bytes]) -> Optional[str]:
+
+# Malformed rows are reported once per file, rather than printed one at a time
+def report_malformed_txt_rows(malformed_row_count: int):
+    if malformed_row_count:
+        print('TxtLogService - Skipped ', malformed_row_count, ' malformed rows in text file')
+
+
+# If process names are given, only rows for those processes are converted (see EventFilters)
+# If a summary, PID index or SQLite sink loader is given, the converted events are added to it
+def get_txt_log_events_from_txt_file(
+    txt_file: IO[bytes], 
+    process_names: Tuple[str, ...] = (), 
+    txt_log_summary: Optional[TxtLogSummary] = None, 
+    txt_log_pid_index: Optional[TxtLogPidIndex] = None, 
+    sqlite_sink_loader: Optional[SQLiteSinkTableLoader] = None
+) -> Optional[List[TxtLogEvent]]:
     try:
-        # skip first line in txt file (header row)
-        next(txt_file)
+        # first line in txt file is the header row, which decides how the columns are converted
+        txt_file_header_row: str = next(txt_file).decode('utf-8')
+        convert_txt_rows: TxtRowsConverter = get_txt_rows_converter(txt_file_header_row, process_names)
         
-        # read file to convert to bytes
-        txt_file_bytes: bytes = txt_file.read()
-
-        # decode txt file bytes to string
-        txt_file_bytes_decoded: str = txt_file_bytes.decode('utf-8')
-
-        # split txt file into lines -> treat each new line as a separate row
-        txt_file_lines: List[str] = txt_file_bytes_decoded.splitlines()
-
-        txt_log_events: List[TxtLogEvent] = []
-
-        for txt_file_row in txt_file_lines:        
-            txt_log_event: TxtLogEvent | None = convert_txt_row_to_txt_log_event(
-                txt_file_row, 
-                NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE, 
-                PROCESS_LOG_TXT_FILE_DELIMITER_REGEX
-            )
-            
-            if txt_log_event:
-                txt_log_events.append(txt_log_event)
-        
-        # Make JSON-serialisable array of the TxtLogEvent dataclass array
-        txt_log_events_serialisable: List[dict[str, TxtLogEvent]] | None = (
-            serialise_process_log_items(txt_log_events)
+        with measure_stage('ps_txt_decode') as decode_stage_metrics:
+            # read file to convert to bytes
+            txt_file_bytes: bytes = txt_file.read()
+
+            # decode txt file bytes to string
+            txt_file_bytes_decoded: str = txt_file_bytes.decode('utf-8')
+
+            # split txt file into lines -> treat each new line as a separate row
+            txt_file_lines: List[str] = txt_file_bytes_decoded.splitlines()
+
+            decode_stage_metrics.byte_count = len(txt_file_bytes)
+            decode_stage_metrics.row_count = len(txt_file_lines)
+
+        with measure_stage('ps_txt_parse', byte_count=len(txt_file_bytes)) as parse_stage_metrics:
+            # Convert all rows in one call, skipping (and counting) malformed rows
+            txt_log_events, malformed_row_count = convert_txt_rows(txt_file_lines)
+
+            if txt_log_summary:
+                txt_log_summary.add_txt_log_events(txt_log_events)
+
+            if txt_log_pid_index is not None:
+                txt_log_pid_index.add_txt_log_events(txt_log_events)
+
+            if sqlite_sink_loader:
+                sqlite_sink_loader.add_rows([get_txt_log_event_values(txt_log_event) for txt_log_event in txt_log_events])
+
+            parse_stage_metrics.row_count = len(txt_log_events)
+
+        report_malformed_txt_rows(malformed_row_count)
+
+        return txt_log_events
+    except Exception as get_txt_log_events_error:
+        print('Error processing text file: ', get_txt_log_events_error)
+        return None
+
+
+def convert_txt_log_events_to_json_string(txt_log_events: List[TxtLogEvent], output_format: str = OUTPUT_FORMAT_JSON) -> Optional[str]:
+    with measure_stage('ps_txt_serialise', row_count=len(txt_log_events)) as stage_metrics:
+        # Rows are encoded straight from each event's field values, rather than via a dataclasses.asdict copy per row
+        results_json_string: Optional[str] = convert_rows_to_json_string(
+            [get_txt_log_event_values(txt_log_event) for txt_log_event in txt_log_events], 
+            TXT_LOG_EVENT_FIELD_NAMES, 
+            output_format
         )
 
-        # Convert serialised txt log events list to JSON
-        txt_log_events_json = convert_object_to_json_string(txt_log_events_serialisable, 2)
+        stage_metrics.byte_count = len(results_json_string) if results_json_string else 0
+
+    return results_json_string
 
-        return txt_log_events_json
-    except Exception as process_txt_file_error:
-        print('Error processing text file: ', process_txt_file_error)
+
+def process_txt_file(txt_file: IO[bytes], process_names: Tuple[str, ...] = ()) -> Optional[str]:
+    txt_log_events: List[TxtLogEvent] | None = get_txt_log_events_from_txt_file(txt_file, process_names)
+
+    if txt_log_events is None:
         return None
 
-def write_txt_results_to_file(results_json_string: str, result_output_path: str, file_name: str):
+    return convert_txt_log_events_to_json_string(txt_log_events)
+
+# Streaming alternative to process_txt_file + write_txt_results_to_file, for large ps.txt files
+# Rows are decoded, converted and written to the output file one line at a time, so peak memory stays
+# constant regardless of the file size
+# Returns the number of rows written, or None if the file could not be processed
+def stream_txt_file_to_json_file(
+    txt_file: IO[bytes], 
+    result_output_path: str, 
+    file_name: str, 
+    output_format: str = OUTPUT_FORMAT_JSON, 
+    compress: bool = False, 
+    process_names: Tuple[str, ...] = (), 
+    txt_log_summary: Optional[TxtLogSummary] = None, 
+    txt_log_pid_index: Optional[TxtLogPidIndex] = None, 
+    sqlite_sink_loader: Optional[SQLiteSinkTableLoader] = None
+) -> Optional[int]:
     # Build result file name (append current timestamp to make unique)
-    resulting_json_file_name: str = (
-        result_output_path + '/' + file_name + 
-        '_' + get_current_timestamp_utc() + '.json'
+    resulting_json_file_name: str = build_result_file_name(result_output_path, file_name, output_format, compress)
+
+    # Incrementally decode the binary file as UTF-8, one line at a time
+    txt_file_lines = io.TextIOWrapper(txt_file, encoding='utf-8')
+
+    try:
+        # first line in txt file is the header row, which decides how the columns are converted
+        convert_txt_rows: TxtRowsConverter = get_txt_rows_converter(next(txt_file_lines), process_names)
+    except Exception as read_header_row_error:
+        print('Error processing text file: ', read_header_row_error)
+        return None
+
+    try:
+        malformed_row_count: int = 0
+
+        # Decoding, parsing, serialising and writing are interleaved a block at a time, so are measured as one stage
+        with measure_stage('ps_txt_stream') as stage_metrics, create_result_writer(
+            resulting_json_file_name, 
+            TXT_LOG_EVENT_FIELD_NAMES, 
+            TXT_LOG_EVENT_FIELD_TYPES, 
+            output_format, 
+            compress
+        ) as result_writer:
+            # Rows are converted a block of lines at a time, which keeps memory bounded by the block size
+            txt_file_rows_block: List[str] = list(islice(txt_file_lines, TXT_ROW_PARSE_BLOCK_SIZE))
+
+            while txt_file_rows_block:
+                txt_log_events, block_malformed_row_count = convert_txt_rows(txt_file_rows_block)
+                malformed_row_count += block_malformed_row_count
+
+                txt_log_event_rows: List[Tuple[Any, ...]] = [get_txt_log_event_values(txt_log_event) for txt_log_event in txt_log_events]
+
+                for txt_log_event_row in txt_log_event_rows:
+                    result_writer.write_row(txt_log_event_row)
+
+                # Each block is summarised, indexed and loaded into the SQLite sink while it is still in memory
+                if txt_log_summary:
+                    txt_log_summary.add_txt_log_events(txt_log_events)
+
+                if txt_log_pid_index is not None:
+                    txt_log_pid_index.add_txt_log_events(txt_log_events)
+
+                if sqlite_sink_loader:
+                    sqlite_sink_loader.add_rows(txt_log_event_rows)
+
+                txt_file_rows_block = list(islice(txt_file_lines, TXT_ROW_PARSE_BLOCK_SIZE))
+
+            stage_metrics.row_count = result_writer.item_count
+
+        report_malformed_txt_rows(malformed_row_count)
+
+        print('Successfully wrote txt log file results to JSON file')
+
+        return result_writer.item_count
+    except Exception as stream_txt_file_error:
+        print('TxtLogService - Error streaming text file results: ', stream_txt_file_error)
+
+        # Don't leave a partially written results file behind
+        remove_result_file(resulting_json_file_name)
+
+        return None
+
+
+# Runs inside a parse worker process
+# Rows are encoded to JSON in the worker as well, since sending the JSON text back to the parent process is much
+# cheaper than pickling every TxtLogEvent (which costs more than parsing the rows in the first place)
+# The chunk is summarised (if a summary top N is given) and indexed by PID (if asked for) in the worker too, and the
+# summaries and indexes merged by the parent
+# The plain row tuples are only sent back when asked for (eg: to load them into the SQLite sink)
+# Returns the encoded rows, the number of rows, the number of malformed rows skipped, the chunk's summary and
+# PID index (or None), and the rows (or None)
+def convert_txt_rows_chunk_to_json_rows(
+    header_row: str, 
+    txt_rows_chunk: str, 
+    output_format: str = OUTPUT_FORMAT_JSON, 
+    process_names: Tuple[str, ...] = (), 
+    summary_top_n: Optional[int] = None, 
+    build_pid_index: bool = False, 
+    return_rows: bool = False
+) -> Tuple[str, int, int, Optional[TxtLogSummary], Optional[TxtLogPidIndex], Optional[List[Tuple[Any, ...]]]]:
+    # Converters are generated code, so can't be sent to the worker; each worker builds (and caches) its own
+    convert_txt_rows: TxtRowsConverter = get_txt_rows_converter(header_row, process_names)
+
+    txt_log_events, malformed_row_count = convert_txt_rows(txt_rows_chunk.splitlines())
+
+    txt_log_event_rows: List[Tuple[Any, ...]] = [get_txt_log_event_values(txt_log_event) for txt_log_event in txt_log_events]
+
+    encoded_json_rows: str = encode_json_rows(txt_log_event_rows, TXT_LOG_EVENT_FIELD_NAMES, output_format)
+
+    txt_log_summary: Optional[TxtLogSummary] = None
+
+    if summary_top_n is not None:
+        txt_log_summary = TxtLogSummary(summary_top_n)
+        txt_log_summary.add_txt_log_events(txt_log_events)
+
+    txt_log_pid_index: Optional[TxtLogPidIndex] = None
+
+    if build_pid_index:
+        txt_log_pid_index = TxtLogPidIndex()
+        txt_log_pid_index.add_txt_log_events(txt_log_events)
+
+    return (
+        encoded_json_rows, 
+        len(txt_log_events), 
+        malformed_row_count, 
+        txt_log_summary, 
+        txt_log_pid_index, 
+        txt_log_event_rows if return_rows else None
     )
+
+
+# Context that the parse worker processes are started from (see PARALLEL_TXT_PARSE_START_METHODS)
+def get_parse_worker_mp_context() -> multiprocessing.context.BaseContext:
+    available_start_methods: List[str] = multiprocessing.get_all_start_methods()
+
+    for start_method in PARALLEL_TXT_PARSE_START_METHODS:
+        if start_method in available_start_methods:
+            return multiprocessing.get_context(start_method)
+
+    return multiprocessing.get_context('spawn')
+
+
+# Parallel alternative to process_txt_file + write_txt_results_to_file, for very large ps.txt files
+# The decoded file is split into line-aligned chunks, which are parsed across a pool of worker processes
+# and written to the results file in their original order
+# Returns the number of rows written, or None if the file could not be processed
+def process_txt_file_in_parallel(
+    txt_file: IO[bytes], 
+    result_output_path: str, 
+    file_name: str, 
+    max_workers: int, 
+    output_format: str = OUTPUT_FORMAT_JSON, 
+    compress: bool = False, 
+    process_names: Tuple[str, ...] = (), 
+    txt_log_summary: Optional[TxtLogSummary] = None, 
+    txt_log_pid_index: Optional[TxtLogPidIndex] = None, 
+    sqlite_sink_loader: Optional[SQLiteSinkTableLoader] = None
+) -> Optional[int]:
+    # Build result file name (append current timestamp to make unique)
+    resulting_json_file_name: str = build_result_file_name(result_output_path, file_name, output_format, compress)
+
+    try:
+        with measure_stage('ps_txt_decode') as decode_stage_metrics:
+            # first line in txt file is the header row, which decides how the columns are converted
+            txt_file_header_row: str = next(txt_file).decode('utf-8')
+
+            txt_file_rows: str = txt_file.read().decode('utf-8')
+
+            txt_file_rows_chunks: List[str] = split_txt_rows_into_chunks(txt_file_rows, max_workers * PARALLEL_TXT_PARSE_CHUNKS_PER_WORKER)
+
+            decode_stage_metrics.byte_count = len(txt_file_rows)
+
+            # Drop the reference to the full text, so only the chunks are kept in memory
+            del txt_file_rows
+    except Exception as read_txt_file_error:
+        print('Error processing text file: ', read_txt_file_error)
+        return None
+
+    try:
+        malformed_row_count: int = 0
+
+        # Parsing and serialising happen in the worker processes, so their CPU time isn't counted in this stage
+        with measure_stage('ps_txt_parallel_parse') as stage_metrics, \
+             ProcessPoolExecutor(max_workers=max_workers, mp_context=get_parse_worker_mp_context()) as executor, \
+             JsonStreamWriter(resulting_json_file_name, TXT_LOG_EVENT_FIELD_NAMES, output_format, compress) as json_stream_writer:
+            # executor.map returns results in the same order as the chunks
+            for (
+                encoded_json_rows, 
+                row_count, 
+                chunk_malformed_row_count, 
+                chunk_txt_log_summary, 
+                chunk_txt_log_pid_index, 
+                chunk_txt_log_event_rows
+            ) in executor.map(
+                convert_txt_rows_chunk_to_json_rows, 
+                [txt_file_header_row] * len(txt_file_rows_chunks), 
+                txt_file_rows_chunks, 
+                [output_format] * len(txt_file_rows_chunks), 
+                [process_names] * len(txt_file_rows_chunks), 
+                [txt_log_summary.top_n if txt_log_summary else None] * len(txt_file_rows_chunks), 
+                [txt_log_pid_index is not None] * len(txt_file_rows_chunks), 
+                [sqlite_sink_loader is not None] * len(txt_file_rows_chunks)
+            ):
+                json_stream_writer.write_encoded_rows(encoded_json_rows, row_count)
+                malformed_row_count += chunk_malformed_row_count
+
+                if txt_log_summary and chunk_txt_log_summary:
+                    txt_log_summary.merge(chunk_txt_log_summary)
+
+                if txt_log_pid_index is not None and chunk_txt_log_pid_index:
+                    txt_log_pid_index.merge(chunk_txt_log_pid_index)
+
+                if sqlite_sink_loader and chunk_txt_log_event_rows:
+                    sqlite_sink_loader.add_rows(chunk_txt_log_event_rows)
+
+            stage_metrics.row_count = json_stream_writer.item_count
+
+        report_malformed_txt_rows(malformed_row_count)
+
+        print('Successfully wrote txt log file results to JSON file')
+
+        return json_stream_writer.item_count
+    except Exception as parallel_process_txt_file_error:
+        print('TxtLogService - Error processing text file in parallel: ', parallel_process_txt_file_error)
+
+        # Don't leave a partially written results file behind
+        remove_result_file(resulting_json_file_name)
+
+        return None
+
+
+# The summary is always written as pretty-printed JSON, since it is small and meant to be read as it is
+def write_txt_log_summary_to_file(txt_log_summary: TxtLogSummary, result_output_path: str, file_name: str):
+    # Build result file name (append current timestamp to make unique)
+    resulting_json_file_name: str = build_result_file_name(result_output_path, file_name + TXT_LOG_SUMMARY_FILE_NAME_SUFFIX)
+
+    try:
+        with measure_stage('ps_txt_summary_write', row_count=txt_log_summary.row_count):
+            write_to_json_file(json.dumps(txt_log_summary.to_dict(), indent=2), resulting_json_file_name)
+
+        print('Successfully wrote txt log file summary to JSON file')
+    except Exception as file_write_excpetion:
+        print(
+            'TxtLogService - Error writing summary file: ', 
+            file_write_excpetion
+        )
+
+
+# The results string must already be encoded in the given output format (see convert_txt_log_events_to_json_string)
+def write_txt_results_to_file(
+    results_json_string: str, 
+    result_output_path: str, 
+    file_name: str, 
+    output_format: str = OUTPUT_FORMAT_JSON, 
+    compress: bool = False
+):
+    # Build result file name (append current timestamp to make unique)
+    resulting_json_file_name: str = build_result_file_name(result_output_path, file_name, output_format, compress)
     
     try:
         # Write JSON file to disk
-        write_to_json_file(results_json_string, resulting_json_file_name)
+        with measure_stage('ps_txt_write', byte_count=len(results_json_string)):
+            write_to_json_file(results_json_string, resulting_json_file_name, compress)
 
         print('Successfully wrote txt log file results to JSON file')
     except Exception as file_write_excpetion:
@@ -0,0 +1,238 @@
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Self, Tuple
+
+from consts.FileProcessing import DEFAULT_INPUT_TAR_FILE_GLOB
+from consts.WatchFolder import DEFAULT_WATCH_QUEUE_DEPTH, WATCH_DONE_DIRECTORY_NAME, WATCH_ERROR_DIRECTORY_NAME, WATCH_STABLE_POLL_COUNT
+from models.ProcessingOptions import ProcessingOptions
+from models.TarFileResult import TarFileResult
+from services.BatchProcessingService import process_tar_file_in_worker
+from utils.FileHelper import find_tar_file_paths, get_archive_name
+from utils.MetricsHelper import append_metrics_line
+from utils.TimeHelper import get_current_timestamp_utc
+
+
+# Runs inside a worker process, once when it starts
+# Importing the processing modules up front means the first archive each worker gets doesn't pay for it
+# (worker processes that are spawned, rather than forked, start with nothing imported)
+def warm_up_worker():
+    import services.TarFileService # noqa: F401
+
+    # Ctrl+C reaches the workers too, but only the watching process should stop on it, so the archives being
+    # processed are finished (and moved to done) rather than failed part way through
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# Submitted once per worker when the pool is entered, so every worker process is started (and warmed up) straight
+# away; the pool would otherwise only start them as archives are submitted
+def start_worker():
+    pass
+
+
+# Moves a processed archive into the done or error directory, and returns its new path (or None if it couldn't be moved)
+# An archive of the same name that was processed before is kept, by adding a timestamp to the new one's name
+def move_processed_archive(input_tar_file_path: str, destination_directory_path: str) -> Optional[str]:
+    try:
+        os.makedirs(destination_directory_path, exist_ok=True)
+
+        file_name: str = os.path.basename(input_tar_file_path)
+        destination_path: str = os.path.join(destination_directory_path, file_name)
+
+        if os.path.exists(destination_path):
+            archive_name: str = get_archive_name(input_tar_file_path)
+            destination_path = os.path.join(
+                destination_directory_path, 
+                archive_name + '_' + get_current_timestamp_utc() + file_name[len(archive_name):]
+            )
+
+        os.replace(input_tar_file_path, destination_path)
+
+        return destination_path
+    except Exception as move_processed_archive_error:
+        print('WatchFolderService - Error moving processed TAR file: ', input_tar_file_path, ' - Error: ', move_processed_archive_error)
+        return None
+
+
+class WatchFolderService:
+    # Long-running alternative to batch mode, for a directory that archives keep being uploaded into
+    # The directory is scanned every poll, and each archive is handed to a persistent pool of worker processes once
+    # its size and modification time have stopped changing (so partial uploads are left alone). Workers are started
+    # and warmed up once, rather than paying interpreter and import start-up per archive
+    # At most max_workers archives are processed at once, with up to max_queue_depth more waiting for a worker;
+    # anything past that stays in the directory until there is room
+    # Processed archives are moved into done and error sub-directories, so they are never picked up again
+    def __init__(
+        self, 
+        watch_path: str, 
+        output_results_path: str, 
+        options: Optional[ProcessingOptions] = None, 
+        max_workers: Optional[int] = None, 
+        max_queue_depth: int = DEFAULT_WATCH_QUEUE_DEPTH, 
+        file_name_glob: str = DEFAULT_INPUT_TAR_FILE_GLOB, 
+        stable_poll_count: int = WATCH_STABLE_POLL_COUNT
+    ):
+        self._watch_path = watch_path
+        self._output_results_path = output_results_path
+        self._options = options or ProcessingOptions()
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._max_queue_depth = max_queue_depth
+        self._file_name_glob = file_name_glob
+        self._stable_poll_count = stable_poll_count
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Archive path -> (size, modification time, number of scans in a row it has been unchanged for)
+        self._file_states: Dict[str, Tuple[int, int, int]] = {}
+        # Archives submitted to the pool, and not yet moved
+        self._submitted_paths_by_future: Dict[Future, str] = {}
+
+    @property
+    def watch_path(self: Self):
+        return self._watch_path
+
+    @property
+    def max_workers(self: Self):
+        return self._max_workers
+
+    @property
+    def max_queue_depth(self: Self):
+        return self._max_queue_depth
+
+    @property
+    def submitted_count(self: Self) -> int:
+        return len(self._submitted_paths_by_future)
+
+    def __enter__(self: Self) -> Self:
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=warm_up_worker)
+
+        # Start every worker now, rather than as the first archives arrive
+        wait([self._executor.submit(start_worker) for _ in range(self.max_workers)])
+
+        return self
+
+    def __exit__(self: Self, *exc_info):
+        # Archives already handed to the pool are finished and moved before stopping
+        try:
+            self.drain()
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+                self._executor = None
+
+    # Scans the directory once: moves finished archives, and submits archives that have stopped changing
+    # Returns the results of the archives that finished since the last poll
+    def poll(self: Self) -> List[TarFileResult]:
+        tar_file_results: List[TarFileResult] = self.collect_finished_archives()
+
+        submitted_paths = set(self._submitted_paths_by_future.values())
+        file_states: Dict[str, Tuple[int, int, int]] = {}
+        stable_paths: List[str] = []
+
+        for input_tar_file_path in find_tar_file_paths(self.watch_path, self._file_name_glob):
+            if input_tar_file_path in submitted_paths:
+                continue
+
+            try:
+                file_stat: os.stat_result = os.stat(input_tar_file_path)
+            except FileNotFoundError:
+                # Removed (or renamed) since the directory was listed
+                continue
+
+            previous_size, previous_modified_ns, stable_polls = self._file_states.get(input_tar_file_path, (-1, -1, -1))
+
+            if (file_stat.st_size, file_stat.st_mtime_ns) == (previous_size, previous_modified_ns):
+                stable_polls += 1
+            else:
+                stable_polls = 0
+
+            file_states[input_tar_file_path] = (file_stat.st_size, file_stat.st_mtime_ns, stable_polls)
+
+            if stable_polls >= self._stable_poll_count:
+                stable_paths.append(input_tar_file_path)
+
+        # Archives that have gone from the directory are forgotten
+        self._file_states = file_states
+
+        for input_tar_file_path in stable_paths:
+            if self.submitted_count >= self.max_workers + self.max_queue_depth:
+                break
+
+            self.submit_archive(input_tar_file_path)
+
+        return tar_file_results
+
+    def submit_archive(self: Self, input_tar_file_path: str):
+        if not self._executor:
+            raise RuntimeError('WatchFolderService must be entered before archives are submitted')
+
+        print('Processing TAR file: ', input_tar_file_path)
+
+        future: Future = self._executor.submit(process_tar_file_in_worker, input_tar_file_path, self._output_results_path, self._options)
+
+        self._submitted_paths_by_future[future] = input_tar_file_path
+        del self._file_states[input_tar_file_path]
+
+    # Moves every finished archive into the done or error directory, and returns their results
+    # An archive where ps.txt or the powerlog DB couldn't be found or processed counts as failed, even though the
+    # worker itself didn't raise, so it is moved to the error directory to be looked at
+    # With a metrics path, each archive's metrics are appended to it as they finish (without one, the worker has
+    # already written them next to the archive's results files)
+    def collect_finished_archives(self: Self) -> List[TarFileResult]:
+        tar_file_results: List[TarFileResult] = []
+
+        for future in [future for future in self._submitted_paths_by_future if future.done()]:
+            input_tar_file_path: str = self._submitted_paths_by_future.pop(future)
+
+            try:
+                tar_file_result: TarFileResult = future.result()
+            except Exception as worker_error:
+                # Worker process itself failed (for example, it was killed), rather than the archive processing
+                print('WatchFolderService - Worker error for TAR file: ', input_tar_file_path, ' - Error: ', worker_error)
+                tar_file_result = TarFileResult(input_tar_file_path, success=False, error=str(worker_error))
+
+            if tar_file_result.success and (tar_file_result.ps_txt_row_count is None or tar_file_result.powerlog_row_count is None):
+                tar_file_result.success = False
+                tar_file_result.error = ' and '.join(
+                    stage_name for stage_name, row_count in [('ps.txt', tar_file_result.ps_txt_row_count), ('powerlog', tar_file_result.powerlog_row_count)]
+                    if row_count is None
+                ) + ' could not be processed'
+
+            if tar_file_result.metrics and self._options.metrics_path:
+                try:
+                    append_metrics_line(tar_file_result.metrics, self._options.metrics_path)
+                except Exception as append_metrics_error:
+                    print('WatchFolderService - Error writing metrics for TAR file: ', input_tar_file_path, ' - Error: ', append_metrics_error)
+
+            move_processed_archive(
+                input_tar_file_path, 
+                os.path.join(self.watch_path, WATCH_DONE_DIRECTORY_NAME if tar_file_result.success else WATCH_ERROR_DIRECTORY_NAME)
+            )
+
+            print(
+                'Finished TAR file: ', input_tar_file_path, 
+                ' - success: ', tar_file_result.success, 
+                ' - seconds: ', round(tar_file_result.total_seconds, 3)
+            )
+
+            tar_file_results.append(tar_file_result)
+
+        return tar_file_results
+
+    # Waits for every submitted archive to finish, and returns their results
+    def drain(self: Self) -> List[TarFileResult]:
+        wait(list(self._submitted_paths_by_future))
+
+        return self.collect_finished_archives()
+
+    # Polls until the stop event is set (or the process is interrupted)
+    def run(self: Self, poll_interval_seconds: float, stop_event: Optional[threading.Event] = None):
+        stop_event = stop_event or threading.Event()
+
+        print('Watching for TAR files in: ', self.watch_path)
+
+        try:
+            while not stop_event.is_set():
+                self.poll()
+                stop_event.wait(poll_interval_seconds)
+        except KeyboardInterrupt:
+            print('Stopping watch, once the TAR files being processed have finished')
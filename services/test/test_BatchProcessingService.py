@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from models.TarFileResult import TarFileResult
+from services.BatchProcessingService import build_batch_summary, process_tar_files_in_pool
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+# Unit test class
+class TestBatchProcessingService(unittest.TestCase):
+    # Processes every archive in a process pool and returns results in input order
+    def test_process_tar_files_in_pool(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_paths = []
+
+            for archive_index, archive_bytes in enumerate([build_test_tar_gz_bytes(), b'not a tar file', build_test_tar_gz_bytes()]):
+                input_tar_file_path = os.path.join(temp_dir, 'archive_' + str(archive_index) + '.tar.gz')
+
+                with open(input_tar_file_path, 'wb') as input_tar_file:
+                    input_tar_file.write(archive_bytes)
+
+                input_tar_file_paths.append(input_tar_file_path)
+
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(output_dir)
+
+            results = process_tar_files_in_pool(input_tar_file_paths, output_dir, max_workers=2)
+
+            # Each archive gets its own output sub-directory, so result file names can't collide
+            self.assertEqual(len(os.listdir(os.path.join(output_dir, 'archive_0'))), 2)
+            self.assertEqual(len(os.listdir(os.path.join(output_dir, 'archive_2'))), 2)
+
+        self.assertEqual([result.input_tar_file_path for result in results], input_tar_file_paths)
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual(results[0].ps_txt_row_count, 1)
+        self.assertEqual(results[2].powerlog_row_count, 1)
+
+    # Summary aggregates row counts across successful archives and lists failures
+    def test_build_batch_summary(self):
+        results = [
+            TarFileResult('a.tar.gz', ps_txt_row_count=10, powerlog_row_count=5, total_seconds=1.0),
+            TarFileResult('b.tar.gz', ps_txt_row_count=20, powerlog_row_count=None, total_seconds=2.0),
+            TarFileResult('c.tar.gz', success=False, error='boom', total_seconds=0.5),
+        ]
+
+        summary = build_batch_summary(results, 2.5)
+
+        self.assertIn('TAR files processed: 3', summary)
+        self.assertIn('Succeeded: 2', summary)
+        self.assertIn('Failed: 1', summary)
+        self.assertIn('Cache hits: 0', summary)
+        self.assertIn('ps.txt rows: 30', summary)
+        self.assertIn('powerlog rows: 5', summary)
+        self.assertIn('FAILED c.tar.gz: boom', summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -64,8 +64,8 @@ class TestDBLogService(unittest.TestCase):
         from services.DBLogService import DBLogService
         from unittest.mock import patch
 
-        # Mock serialise_process_events to return None
-        with patch('utils.JsonHelper.serialise_process_events', return_value=None):
+        # Mock convert_rows_to_json_string to return None
+        with patch('services.DBLogService.convert_rows_to_json_string', return_value=None):
             db_log_service = DBLogService(b'some_bytes')
             result = db_log_service.process_sqlite_db_file()
 
@@ -114,8 +114,8 @@ class TestDBLogService(unittest.TestCase):
         from services.DBLogService import DBLogService
         from unittest.mock import patch
 
-        # Mock the serialise_process_events function to return None
-        with patch('services.DBLogService.serialise_process_events', return_value=None):
+        # Mock the convert_rows_to_json_string function to return None
+        with patch('services.DBLogService.convert_rows_to_json_string', return_value=None):
             db_log_service = DBLogService(b'some_bytes')
             result = db_log_service.process_sqlite_db_file()
 
@@ -234,21 +234,359 @@ class TestDBLogService(unittest.TestCase):
             (2, 1638316801.0, 'com.example.bundle2', 124, 457, 'ExampleProcess2')
         ]
 
-        # Mock serialise_process_events function to return predefined serialised events
-        mock_serialise_process_events = MagicMock()
-        mock_serialise_process_events.return_value = [
-            {'ID': 1, 'timestamp': 1638316800.0, 'BundleID': 'com.example.bundle', 'CoalitionID': 123, 'PID': 456, 'ProcessName': 'ExampleProcess'},
-            {'ID': 2, 'timestamp': 1638316801.0, 'BundleID': 'com.example.bundle2', 'CoalitionID': 124, 'PID': 457, 'ProcessName': 'ExampleProcess2'}
-        ]
-
-        # Mock convert_object_to_json_string function to return predefined JSON string directly
         with patch('services.DBLogService.SQLiteDBClient', return_value=mock_db_client), \
-             patch('services.DBLogService.serialise_process_events', return_value=mock_serialise_process_events), \
-             patch('services.DBLogService.convert_object_to_json_string', return_value='{"events": [{"ID": 1, "timestamp": 1638316800.0, "BundleID": "com.example.bundle", "CoalitionID": 123, "PID": 456, "ProcessName": "ExampleProcess"}, {"ID": 2, "timestamp": 1638316801.0, "BundleID": "com.example.bundle2", "CoalitionID": 124, "PID": 457, "ProcessName": "ExampleProcess2"}]}'):
+             patch('services.DBLogService.convert_rows_to_json_string', return_value='{"events": [{"ID": 1, "timestamp": 1638316800.0, "BundleID": "com.example.bundle", "CoalitionID": 123, "PID": 456, "ProcessName": "ExampleProcess"}, {"ID": 2, "timestamp": 1638316801.0, "BundleID": "com.example.bundle2", "CoalitionID": 124, "PID": 457, "ProcessName": "ExampleProcess2"}]}'):
     
             db_log_service = DBLogService(b'some_bytes')
             result = db_log_service.process_sqlite_db_file()
 
             expected_result = '{"events": [{"ID": 1, "timestamp": 1638316800.0, "BundleID": "com.example.bundle", "CoalitionID": 123, "PID": 456, "ProcessName": "ExampleProcess"}, {"ID": 2, "timestamp": 1638316801.0, "BundleID": "com.example.bundle2", "CoalitionID": 124, "PID": 457, "ProcessName": "ExampleProcess2"}]}'
 
-            self.assertEqual(result, expected_result)
\ No newline at end of file
+            self.assertEqual(result, expected_result)
+
+# Builds the bytes of a real powerlog SQLite DB containing the given process event rows
+def build_powerlog_db_bytes(rows) -> bytes:
+    import sqlite3
+
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.execute(
+        'CREATE TABLE PLProcessMonitorAgent_EventForward_ProcessID '
+        '(ID INTEGER PRIMARY KEY, timestamp REAL, BundleID TEXT, CoalitionID INTEGER, PID INTEGER, ProcessName TEXT)'
+    )
+    db_conn.executemany('INSERT INTO PLProcessMonitorAgent_EventForward_ProcessID VALUES (?, ?, ?, ?, ?, ?)', rows)
+    db_conn.commit()
+    db_bytes = db_conn.serialize()
+    db_conn.close()
+
+    return db_bytes
+
+
+class TestDBLogServiceStreaming(unittest.TestCase):
+    # Rows are pulled from the cursor in batches and yielded one DBLogEvent at a time
+    def test_iter_db_log_events_uses_fetchmany_batches(self):
+        from services.DBLogService import DBLogService
+        from models.DBLogEvent import DBLogEvent
+        from unittest.mock import patch, MagicMock
+
+        mock_db_client = MagicMock()
+        mock_db_client.__enter__.return_value = mock_db_client
+        mock_db_client.fetchmany.side_effect = [
+            [(1, 1638316800.0, 'com.example.bundle', 123, 456, 'ExampleProcess')],
+            [(2, 1638316801.0, 'com.example.bundle2', 124, 457, 'ExampleProcess2')],
+            []
+        ]
+
+        with patch('services.DBLogService.SQLiteDBClient', return_value=mock_db_client):
+            db_log_service = DBLogService(b'some_bytes')
+            result = list(db_log_service.iter_db_log_events_from_db(batch_size=1))
+
+        self.assertEqual(result, [
+            DBLogEvent(1, 1638316800.0, 'com.example.bundle', 123, 456, 'ExampleProcess'),
+            DBLogEvent(2, 1638316801.0, 'com.example.bundle2', 124, 457, 'ExampleProcess2')
+        ])
+        mock_db_client.fetchmany.assert_called_with(1)
+        mock_db_client.fetchall.assert_not_called()
+
+    # Streamed JSON output is identical to the in-memory output
+    def test_stream_db_log_events_matches_in_memory_output(self):
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+
+        rows = [(row_id, 1638316800.0 + row_id, 'com.example.bundle', 123, 456 + row_id, 'ExampleProcess') for row_id in range(1, 26)]
+        db_log_service = DBLogService(build_powerlog_db_bytes(rows))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = db_log_service.stream_db_log_events_to_json_file(output_dir, 'powerlog', batch_size=10)
+
+            with open(os.path.join(output_dir, os.listdir(output_dir)[0])) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(row_count, 25)
+        self.assertEqual(result, db_log_service.process_sqlite_db_file())
+
+    # In-memory JSON output is encoded from row values, but is identical to json.dumps of the events as dicts
+    def test_in_memory_json_output_matches_json_dumps(self):
+        import dataclasses
+        import json
+        from services.DBLogService import DBLogService
+
+        rows = [(1, 1638316800.5, 'com.example "bundle"', 123, 456, 'Example\u00e9'), (2, None, None, None, None, None)]
+        db_log_service = DBLogService(build_powerlog_db_bytes(rows))
+
+        self.assertEqual(
+            db_log_service.process_sqlite_db_file(), 
+            json.dumps([dataclasses.asdict(db_log_event) for db_log_event in db_log_service.get_all_db_log_events_from_db()], indent=2)
+        )
+
+    # Streamed NDJSON output can be gzip compressed, and matches the in-memory output
+    def test_stream_db_log_events_ndjson_gzip(self):
+        import gzip
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+
+        rows = [(row_id, 1638316800.0 + row_id, 'com.example.bundle', 123, 456 + row_id, 'ExampleProcess') for row_id in range(1, 4)]
+        db_log_service = DBLogService(build_powerlog_db_bytes(rows))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = db_log_service.stream_db_log_events_to_json_file(output_dir, 'powerlog', output_format='ndjson', compress=True)
+            result_file_name = os.listdir(output_dir)[0]
+
+            with gzip.open(os.path.join(output_dir, result_file_name), 'rt') as result_file:
+                result = result_file.read()
+
+        self.assertEqual(row_count, 3)
+        self.assertTrue(result_file_name.endswith('.ndjson.gz'))
+        self.assertEqual(result, db_log_service.process_sqlite_db_file('ndjson'))
+        self.assertEqual(len(result.splitlines()), 3)
+
+    # Columnar output holds the same values as the JSON output
+    def test_stream_db_log_events_columnar(self):
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+        from utils.ColumnarReader import read_columnar_columns
+
+        # SQLite doesn't enforce declared types, so the INTEGER CoalitionID and PID columns can hold other values
+        rows = [
+            (1, 1638316800.5, 'com.example.bundle', 123, 456, 'ExampleProcess'), 
+            (2, None, None, None, None, None), 
+            (3, 1638316801.0, 'com.example.bundle', 1.5, 'unknown', 'ExampleProcess'), 
+        ]
+        db_log_service = DBLogService(build_powerlog_db_bytes(rows))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = db_log_service.stream_db_log_events_to_json_file(output_dir, 'powerlog', output_format='columnar')
+            result_directory_name = os.listdir(output_dir)[0]
+            columns = read_columnar_columns(os.path.join(output_dir, result_directory_name))
+
+        self.assertEqual(row_count, 3)
+        self.assertTrue(result_directory_name.endswith('.columnar'))
+        self.assertEqual(columns['timestamp'], [1638316800.5, None, 1638316801.0])
+        self.assertEqual(columns['ProcessName'], ['ExampleProcess', None, 'ExampleProcess'])
+        self.assertEqual(columns['CoalitionID'], [123.0, None, 1.5])
+        self.assertEqual(columns['PID'], [456, None, 'unknown'])
+
+    # An empty table writes no results file, and an invalid DB returns None
+    def test_stream_db_log_events_empty_and_invalid(self):
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.assertEqual(DBLogService(build_powerlog_db_bytes([])).stream_db_log_events_to_json_file(output_dir, 'powerlog'), 0)
+            self.assertIsNone(DBLogService(b'invalid_bytes').stream_db_log_events_to_json_file(output_dir, 'powerlog'))
+            self.assertEqual(os.listdir(output_dir), [])
+
+    # A DB file on disk is opened read-only and streamed, without being read into memory
+    def test_stream_db_log_events_from_db_file_path(self):
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+
+        rows = [(row_id, 1638316800.0 + row_id, 'com.example.bundle', 123, 456, 'ExampleProcess') for row_id in range(1, 6)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, 'powerlog.PLSQL')
+
+            with open(db_path, 'wb') as db_file:
+                db_file.write(build_powerlog_db_bytes(rows))
+
+            db_log_service = DBLogService(sqlite_db_file_path=db_path)
+            events = db_log_service.get_all_db_log_events_from_db()
+
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(output_dir)
+            row_count = db_log_service.stream_db_log_events_to_json_file(output_dir, 'powerlog')
+
+        self.assertIsNone(db_log_service.sqlite_db)
+        self.assertEqual(len(events), 5)
+        self.assertEqual(row_count, 5)
+
+
+# Builds the bytes of a powerlog SQLite DB with one process event row and a battery table
+def build_powerlog_db_bytes_with_battery_table() -> bytes:
+    import sqlite3
+
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.deserialize(build_powerlog_db_bytes([(1, 1638316800.0, 'com.example.bundle', 123, 456, 'ExampleProcess')]))
+    db_conn.execute('CREATE TABLE PLBatteryAgent_EventBackward_Battery (ID INTEGER PRIMARY KEY, timestamp REAL, Level DOUBLE, Raw BLOB, Name VARCHAR(20))')
+    db_conn.executemany(
+        'INSERT INTO PLBatteryAgent_EventBackward_Battery VALUES (?, ?, ?, ?, ?)', 
+        [(1, 1638316800.0, 80.5, b'\x01\xff', 'Battery'), (2, 1638316860.0, 80.0, None, None)]
+    )
+    db_conn.commit()
+    db_bytes = db_conn.serialize()
+    db_conn.close()
+
+    return db_bytes
+
+
+class TestDBLogServiceTableExports(unittest.TestCase):
+    # Each table is written to its own results file, with columns found from the table
+    def test_stream_table_exports_to_result_files(self):
+        import json
+        import os
+        import tempfile
+        from models.PowerlogTableExport import PowerlogTableExport
+        from services.DBLogService import DBLogService
+
+        db_log_service = DBLogService(build_powerlog_db_bytes_with_battery_table())
+        table_exports = [
+            PowerlogTableExport('PLBatteryAgent_EventBackward_Battery'), 
+            PowerlogTableExport('PLBatteryAgent_Levels', 'SELECT ID, Level FROM PLBatteryAgent_EventBackward_Battery WHERE Level > 80'), 
+            PowerlogTableExport('PLMissingTable'), 
+        ]
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with db_log_service.open_db_client() as db_client:
+                table_row_counts = db_log_service.stream_table_exports_to_result_files(db_client, table_exports, output_dir, 'powerlog')
+
+            result_file_names = sorted(os.listdir(output_dir))
+
+            with open(os.path.join(output_dir, result_file_names[0])) as result_file:
+                battery_results = json.load(result_file)
+
+            with open(os.path.join(output_dir, result_file_names[1])) as result_file:
+                level_results = json.load(result_file)
+
+        self.assertEqual(table_row_counts, {'PLBatteryAgent_EventBackward_Battery': 2, 'PLBatteryAgent_Levels': 1, 'PLMissingTable': None})
+        self.assertEqual(len(result_file_names), 2)
+        self.assertTrue(result_file_names[0].startswith('powerlog_PLBatteryAgent_EventBackward_Battery_'))
+        self.assertEqual(battery_results, [
+            {'ID': 1, 'timestamp': 1638316800.0, 'Level': 80.5, 'Raw': '01FF', 'Name': 'Battery'}, 
+            {'ID': 2, 'timestamp': 1638316860.0, 'Level': 80.0, 'Raw': None, 'Name': None}
+        ])
+        self.assertEqual(level_results, [{'ID': 1, 'Level': 80.5}])
+
+    # Column types for columnar output come from the declared column types of the table
+    def test_stream_table_export_columnar(self):
+        import os
+        import tempfile
+        from models.PowerlogTableExport import PowerlogTableExport
+        from services.DBLogService import DBLogService
+        from utils.ColumnarReader import read_columnar_manifest
+
+        db_log_service = DBLogService(build_powerlog_db_bytes_with_battery_table())
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with db_log_service.open_db_client() as db_client:
+                row_count = db_log_service.stream_table_export_to_result_file(
+                    db_client, 
+                    PowerlogTableExport('PLBatteryAgent_EventBackward_Battery'), 
+                    output_dir, 
+                    'powerlog', 
+                    output_format='columnar'
+                )
+
+            manifest = read_columnar_manifest(os.path.join(output_dir, os.listdir(output_dir)[0]))
+
+        self.assertEqual(row_count, 2)
+        self.assertEqual(
+            [column['type'] for column in manifest['columns']], 
+            ['int64', 'float64', 'float64', 'dictionary', 'dictionary']
+        )
+
+
+class TestDBLogServiceEventFilters(unittest.TestCase):
+    # Filters are compiled into parameterised conditions, leaving out columns the table doesn't have
+    def test_build_event_filter_conditions(self):
+        from models.EventFilters import EventFilters
+        from services.DBLogService import build_event_filter_conditions
+
+        event_filters = EventFilters(since=10.0, until=20.0, bundle_ids=('com.a', 'com.b'), process_names=('A',))
+
+        self.assertEqual(build_event_filter_conditions(event_filters), [
+            ('"timestamp" >= ?', (10.0,)), 
+            ('"timestamp" <= ?', (20.0,)), 
+            ('"BundleID" IN (?, ?)', ('com.a', 'com.b')), 
+            ('"ProcessName" IN (?)', ('A',)), 
+        ])
+        self.assertEqual(build_event_filter_conditions(event_filters, ('ID', 'timestamp')), [
+            ('"timestamp" >= ?', (10.0,)), 
+            ('"timestamp" <= ?', (20.0,)), 
+        ])
+        self.assertEqual(build_event_filter_conditions(EventFilters()), [])
+
+
+class TestDBLogServiceRollups(unittest.TestCase):
+    # Events are counted per time bucket and group, inside the DB
+    def test_stream_process_event_rollups_to_result_file(self):
+        import json
+        import os
+        import tempfile
+        from services.DBLogService import DBLogService
+
+        db_log_service = DBLogService(build_powerlog_db_bytes([
+            (1, 1638316800.0, 'com.example.a', 1, 10, 'A'), 
+            (2, 1638316859.5, 'com.example.a', 1, 10, 'A'), 
+            (3, 1638316830.0, 'com.example.b', 1, 11, 'B'), 
+            (4, 1638316860.0, 'com.example.a', 1, 10, 'A'), 
+        ]))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with db_log_service.open_db_client() as db_client:
+                row_count = db_log_service.stream_process_event_rollups_to_result_file(
+                    db_client, 60, ('BundleID',), output_dir, 'powerlog', output_format='json-min'
+                )
+                filtered_row_count = db_log_service.stream_process_event_rollups_to_result_file(
+                    db_client, 3600, ('BundleID', 'ProcessName'), output_dir, 'powerlog', where_clause=' WHERE ("PID" = ?)', where_params=(10,)
+                )
+
+            result_file_names = sorted(os.listdir(output_dir))
+
+            with open(os.path.join(output_dir, result_file_names[0])) as result_file:
+                hourly_results = json.load(result_file)
+
+            with open(os.path.join(output_dir, result_file_names[1])) as result_file:
+                minute_results = json.load(result_file)
+
+        self.assertEqual((row_count, filtered_row_count), (3, 1))
+        self.assertTrue(result_file_names[0].startswith('powerlog_rollup_3600s_'))
+        self.assertEqual(minute_results, [
+            {'bucket_start': 1638316800, 'BundleID': 'com.example.a', 'event_count': 2}, 
+            {'bucket_start': 1638316800, 'BundleID': 'com.example.b', 'event_count': 1}, 
+            {'bucket_start': 1638316860, 'BundleID': 'com.example.a', 'event_count': 1}, 
+        ])
+        self.assertEqual(hourly_results, [{'bucket_start': 1638316800, 'BundleID': 'com.example.a', 'ProcessName': 'A', 'event_count': 3}])
+
+
+class TestDBLogServiceJoin(unittest.TestCase):
+    # Each process event is annotated with the ps.txt values of the process with the same PID
+    def test_stream_joined_db_log_events_to_result_file(self):
+        import json
+        import os
+        import tempfile
+        from models.TxtLogEvent import TxtLogEvent
+        from services.DBLogService import DBLogService
+        from utils.TxtLogPidIndex import TxtLogPidIndex
+
+        db_log_service = DBLogService(build_powerlog_db_bytes([
+            (1, 1638316800.0, 'com.example.a', 1, 10, 'A'), 
+            (2, 1638316801.0, 'com.example.b', 1, 11, 'B'), 
+        ]))
+
+        txt_log_pid_index = TxtLogPidIndex()
+        txt_log_pid_index.add_txt_log_events([
+            TxtLogEvent('user1', 501, 'pr1', 10, 1, None, 0.1, 0.2, 20, 0, 10000, 2000, None, None, 'S', None, None, '/usr/bin/A --flag'), 
+            TxtLogEvent('user2', 502, 'pr2', 12, 1, None, 0.1, 0.2, 20, 0, 10000, 3000, None, None, 'S', None, None, 'C'), 
+        ])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with db_log_service.open_db_client() as db_client:
+                row_count = db_log_service.stream_joined_db_log_events_to_result_file(
+                    db_client, txt_log_pid_index, output_dir, 'powerlog', output_format='json-min'
+                )
+
+            result_file_names = os.listdir(output_dir)
+
+            with open(os.path.join(output_dir, result_file_names[0])) as result_file:
+                joined_results = json.load(result_file)
+
+        self.assertEqual(row_count, 2)
+        self.assertTrue(result_file_names[0].startswith('powerlog_joined_'))
+        self.assertEqual(
+            [(result['PID'], result['ProcessName'], result['USER'], result['RSS'], result['COMMAND']) for result in joined_results], 
+            [(10, 'A', 'user1', 2000, '/usr/bin/A --flag'), (11, 'B', None, None, None)]
+        )
@@ -0,0 +1,159 @@
+import asyncio
+import gzip
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from models.ProcessingOptions import ProcessingOptions
+from services.HttpIngestService import HttpIngestService, get_upload_archive_name
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+
+# Runs the server on its own event loop thread, on a free localhost port, for the requests made in a test
+class RunningHttpIngestServer:
+    def __init__(self, output_dir: str, max_concurrent_archives: int = 4):
+        self.http_ingest_service = HttpIngestService(output_dir, host='127.0.0.1', port=0, max_concurrent_archives=max_concurrent_archives)
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever)
+
+    def __enter__(self):
+        self.loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self.http_ingest_service.start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self.http_ingest_service.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+
+    # Returns the response status and JSON body
+    def request(self, method, path, body=None, headers=None, encode_chunked=False):
+        connection = http.client.HTTPConnection('127.0.0.1', self.http_ingest_service.port, timeout=30)
+
+        try:
+            connection.request(method, path, body=body, headers=headers or {}, encode_chunked=encode_chunked)
+            response = connection.getresponse()
+
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+
+# Yields the bytes in small pieces, so they are sent as many chunks
+def iter_byte_pieces(byte_string, piece_size):
+    for piece_start in range(0, len(byte_string), piece_size):
+        yield byte_string[piece_start:piece_start + piece_size]
+
+
+# Unit test class
+class TestHttpIngestService(unittest.TestCase):
+    # An uploaded archive is processed as it streams in, and its row counts returned
+    def test_upload_archive(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with RunningHttpIngestServer(output_dir) as running_server:
+                status, response_body = running_server.request('POST', '/archives?name=sysdiagnose_test.tar.gz', body=build_test_tar_gz_bytes())
+
+            result_file_names = os.listdir(response_body['output_path'])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(os.path.dirname(response_body['output_path']), output_dir)
+        self.assertTrue(os.path.basename(response_body['output_path']).startswith('sysdiagnose_test_'))
+        self.assertEqual(response_body['archive_name'], 'sysdiagnose_test.tar.gz')
+        self.assertTrue(response_body['success'])
+        self.assertEqual((response_body['ps_txt_row_count'], response_body['powerlog_row_count']), (1, 1))
+        self.assertEqual(len(result_file_names), 2)
+
+    # Many uploads at once, chunked and with trailing members the tar reader never needs, are each processed
+    def test_concurrent_chunked_uploads(self):
+        archive_bytes = build_test_tar_gz_bytes(os.urandom(512 * 1024))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with RunningHttpIngestServer(output_dir, max_concurrent_archives=2) as running_server:
+                with ThreadPoolExecutor(max_workers=6) as client_executor:
+                    responses = list(client_executor.map(
+                        lambda upload_index: running_server.request(
+                            'POST', 
+                            '/archives?name=archive_' + str(upload_index % 3) + '.tar.gz', 
+                            body=iter_byte_pieces(archive_bytes, 8192), 
+                            encode_chunked=True
+                        ), 
+                        range(6)
+                    ))
+
+            output_dir_names = os.listdir(output_dir)
+
+        self.assertEqual([status for status, _ in responses], [200] * 6)
+        self.assertEqual([response_body['ps_txt_row_count'] for _, response_body in responses], [1] * 6)
+        # Uploads of the same name each get their own results directory
+        self.assertEqual(len(output_dir_names), 6)
+        self.assertEqual(sorted(output_dir_name.split('_')[1] for output_dir_name in output_dir_names), ['0', '0', '1', '1', '2', '2'])
+
+    # Invalid archives and requests get an error status rather than stopping the server
+    def test_invalid_requests(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with RunningHttpIngestServer(output_dir) as running_server:
+                invalid_archive_response = running_server.request('POST', '/archives?name=bad.tar.gz', body=b'not a tar file')
+                not_found_response = running_server.request('POST', '/other', body=b'')
+                wrong_method_response = running_server.request('GET', '/archives')
+                valid_archive_response = running_server.request('POST', '/archives', body=build_test_tar_gz_bytes())
+                uncompressed_archive_response = running_server.request('POST', '/archives?name=plain.tar', body=gzip.decompress(build_test_tar_gz_bytes()))
+
+        self.assertEqual(invalid_archive_response[0], 422)
+        self.assertFalse(invalid_archive_response[1]['success'])
+        self.assertEqual(not_found_response[0], 404)
+        self.assertEqual(wrong_method_response[0], 405)
+        self.assertEqual(valid_archive_response[0], 200)
+        self.assertTrue(valid_archive_response[1]['archive_name'].startswith('upload_'))
+        self.assertEqual(uncompressed_archive_response[0], 200)
+        self.assertEqual(uncompressed_archive_response[1]['powerlog_row_count'], 1)
+
+    # An upload cut off part way through doesn't leave its executor thread waiting for the rest
+    def test_incomplete_upload(self):
+        import socket
+
+        archive_bytes = build_test_tar_gz_bytes(os.urandom(256 * 1024))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with RunningHttpIngestServer(output_dir, max_concurrent_archives=1) as running_server:
+                with socket.create_connection(('127.0.0.1', running_server.http_ingest_service.port)) as client_socket:
+                    client_socket.sendall(
+                        b'POST /archives?name=cut.tar.gz HTTP/1.1\r\nContent-Length: ' + str(len(archive_bytes)).encode() + b'\r\n\r\n' + 
+                        archive_bytes[:len(archive_bytes) // 2]
+                    )
+                    client_socket.shutdown(socket.SHUT_WR)
+
+                    self.assertTrue(client_socket.recv(1024).startswith(b'HTTP/1.1 400 '))
+
+                # The only executor thread is free again
+                status, _ = running_server.request('POST', '/archives?name=next.tar.gz', body=build_test_tar_gz_bytes())
+
+        self.assertEqual(status, 200)
+
+    # Options that uploads can't honour are rejected, rather than silently ignored
+    def test_unsupported_options_are_rejected(self):
+        for options in [
+            ProcessingOptions(cache_dir='cache'),
+            ProcessingOptions(collect_metrics=True),
+            ProcessingOptions(profile_calls=True),
+            ProcessingOptions(profile_allocations=True),
+        ]:
+            with self.assertRaises(ValueError):
+                HttpIngestService('results', options)
+
+    # Only the file name of the given name is used
+    def test_get_upload_archive_name(self):
+        self.assertEqual(get_upload_archive_name('name=../../etc/archive.tar.gz'), 'archive.tar.gz')
+        self.assertEqual(get_upload_archive_name('name=..%5Carchive.tar.gz'), 'archive.tar.gz')
+        self.assertTrue(get_upload_archive_name('').startswith('upload_'))
+
+        with self.assertRaises(ValueError):
+            get_upload_archive_name('name=..')
+
+
+if __name__ == '__main__':
+    unittest.main()
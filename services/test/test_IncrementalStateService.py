@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from clients.SQLiteDBClient import SQLiteDBClient
+from models.ArchiveIdentifiers import ArchiveIdentifiers
+from models.EventFilters import EventFilters
+from services.IncrementalStateService import IncrementalStateService, get_device_key, get_filter_key
+
+
+# Builds an in-memory powerlog DB client with process event rows with IDs 1 to row_count
+def build_powerlog_db_client(row_count: int) -> SQLiteDBClient:
+    db_client = SQLiteDBClient(':memory:')
+    db_client.execute(
+        'CREATE TABLE PLProcessMonitorAgent_EventForward_ProcessID '
+        '(ID INTEGER PRIMARY KEY, timestamp REAL, BundleID TEXT, CoalitionID INTEGER, PID INTEGER, ProcessName TEXT)'
+    )
+    db_client.executemany(
+        'INSERT INTO PLProcessMonitorAgent_EventForward_ProcessID VALUES (?, ?, ?, ?, ?, ?)', 
+        [(row_id, 1638316800.0 + row_id, 'com.example.bundle', 123, 456, 'ExampleProcess') for row_id in range(1, row_count + 1)]
+    )
+
+    return db_client
+
+
+# Unit test class
+class TestIncrementalStateService(unittest.TestCase):
+    # Marks are kept per device and table, and start unset
+    def test_high_water_marks_per_device_and_table(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, 'state.sqlite')
+            incremental_state_service = IncrementalStateService(state_path, 'device-1', 'ID')
+
+            self.assertIsNone(incremental_state_service.get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'))
+            self.assertIsNone(incremental_state_service.get_where_condition('PLProcessMonitorAgent_EventForward_ProcessID'))
+
+            with build_powerlog_db_client(5) as db_client:
+                incremental_state_service.update_high_water_mark(db_client, 'PLProcessMonitorAgent_EventForward_ProcessID')
+
+            self.assertEqual(incremental_state_service.get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'), 5)
+            self.assertEqual(
+                incremental_state_service.get_where_condition('PLProcessMonitorAgent_EventForward_ProcessID'), 
+                ('"ID" > ?', (5,))
+            )
+            self.assertIsNone(IncrementalStateService(state_path, 'device-2', 'ID').get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'))
+            self.assertIsNone(IncrementalStateService(state_path, 'device-1', 'timestamp').get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'))
+            self.assertIsNone(IncrementalStateService(state_path, 'device-1', 'ID', 'filtered').get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'))
+
+    # Marks only move up, and aren't changed when no rows were exported
+    def test_high_water_mark_only_moves_up(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            incremental_state_service = IncrementalStateService(os.path.join(temp_dir, 'state.sqlite'), 'device-1', 'ID')
+
+            with build_powerlog_db_client(10) as db_client:
+                incremental_state_service.update_high_water_mark(db_client, 'PLProcessMonitorAgent_EventForward_ProcessID')
+
+            # An older archive from the same device
+            with build_powerlog_db_client(3) as db_client:
+                incremental_state_service.update_high_water_mark(db_client, 'PLProcessMonitorAgent_EventForward_ProcessID')
+
+                # No rows past the mark
+                incremental_state_service.update_high_water_mark(db_client, 'PLProcessMonitorAgent_EventForward_ProcessID', ' WHERE "ID" > ?', (10,))
+
+            self.assertEqual(incremental_state_service.get_high_water_mark('PLProcessMonitorAgent_EventForward_ProcessID'), 10)
+
+    def test_get_device_key(self):
+        archive_identifiers = ArchiveIdentifiers('sysdiagnose_2024', '2024.04.16_19-30-52+0100', 'iPhone-OS', 'iPhone', '21E236')
+
+        self.assertEqual(get_device_key(archive_identifiers), 'iPhone-OS/iPhone')
+        self.assertEqual(get_device_key(archive_identifiers, 'serial-1'), 'serial-1')
+        self.assertEqual(get_device_key(ArchiveIdentifiers('logs')), 'logs')
+
+    def test_get_filter_key(self):
+        self.assertEqual(get_filter_key(EventFilters()), '')
+        self.assertNotEqual(get_filter_key(EventFilters(bundle_ids=('com.example.bundle',))), get_filter_key(EventFilters(since=1.0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
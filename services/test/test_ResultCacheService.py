@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from models.ProcessingOptions import ProcessingOptions
+from services.ResultCacheService import ResultCacheService
+from services.TarFileService import process_tar_file_to_result
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+# Unit test class
+class TestResultCacheService(unittest.TestCase):
+    def write_input_tar_file(self, temp_dir: str, file_name: str, trailing_member_bytes: bytes = b'') -> str:
+        input_tar_file_path = os.path.join(temp_dir, file_name)
+
+        with open(input_tar_file_path, 'wb') as input_tar_file:
+            input_tar_file.write(build_test_tar_gz_bytes(trailing_member_bytes))
+
+        return input_tar_file_path
+
+    # An unchanged archive is processed once, and returns the same results files from the cache after that
+    def test_unchanged_archive_returns_cached_results(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = self.write_input_tar_file(temp_dir, 'input.tar.gz')
+            options = ProcessingOptions(cache_dir=os.path.join(temp_dir, 'cache'))
+            first_output_dir = os.path.join(temp_dir, 'first')
+            second_output_dir = os.path.join(temp_dir, 'second')
+            os.makedirs(first_output_dir)
+            os.makedirs(second_output_dir)
+
+            first_result = process_tar_file_to_result(input_tar_file_path, first_output_dir, options)
+
+            with patch('services.TarFileService.process_tar_stream') as mock_process_tar_stream:
+                second_result = process_tar_file_to_result(input_tar_file_path, second_output_dir, options)
+
+            first_result_file_names = sorted(os.listdir(first_output_dir))
+            second_result_file_names = sorted(os.listdir(second_output_dir))
+
+            with open(os.path.join(first_output_dir, first_result_file_names[0])) as first_result_file, \
+                 open(os.path.join(second_output_dir, second_result_file_names[0])) as second_result_file:
+                self.assertEqual(first_result_file.read(), second_result_file.read())
+
+        mock_process_tar_stream.assert_not_called()
+        self.assertFalse(first_result.cache_hit)
+        self.assertTrue(second_result.cache_hit)
+        self.assertEqual(second_result.ps_txt_row_count, 1)
+        self.assertEqual(second_result.powerlog_row_count, 1)
+        self.assertEqual(len(first_result_file_names), 2)
+        self.assertEqual(first_result_file_names, second_result_file_names)
+
+    # The same archive processed twice into the same output directory replaces its results files, and the cached
+    # copies aren't changed by editing the output files
+    def test_same_archive_into_same_output_directory(self):
+        for output_format in ['json', 'columnar']:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                input_tar_file_path = self.write_input_tar_file(temp_dir, 'input.tar.gz')
+                options = ProcessingOptions(cache_dir=os.path.join(temp_dir, 'cache'), output_format=output_format)
+                output_dir = os.path.join(temp_dir, 'out')
+                os.makedirs(output_dir)
+
+                first_result = process_tar_file_to_result(input_tar_file_path, output_dir, options)
+                first_result_file_names = sorted(os.listdir(output_dir))
+
+                if output_format == 'json':
+                    with open(os.path.join(output_dir, first_result_file_names[0]), 'w') as result_file:
+                        result_file.write('edited')
+
+                second_result = process_tar_file_to_result(input_tar_file_path, output_dir, options)
+
+                if output_format == 'json':
+                    with open(os.path.join(output_dir, first_result_file_names[0])) as result_file:
+                        self.assertNotEqual(result_file.read(), 'edited')
+
+                self.assertEqual(sorted(os.listdir(output_dir)), first_result_file_names)
+
+            self.assertTrue(first_result.success)
+            self.assertTrue(second_result.success)
+            self.assertTrue(second_result.cache_hit)
+
+    # Changed archive contents, or options that change the results files, are cached separately
+    def test_cache_key_depends_on_contents_and_options(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_cache_service = ResultCacheService(os.path.join(temp_dir, 'cache'), 1024 * 1024, 10)
+            input_tar_file_path = self.write_input_tar_file(temp_dir, 'input.tar.gz')
+            same_input_tar_file_path = self.write_input_tar_file(temp_dir, 'renamed.tar.gz')
+            changed_input_tar_file_path = self.write_input_tar_file(temp_dir, 'changed.tar.gz', b'changed')
+
+            cache_key = result_cache_service.build_cache_key(input_tar_file_path, ProcessingOptions())
+
+            self.assertEqual(cache_key, result_cache_service.build_cache_key(same_input_tar_file_path, ProcessingOptions()))
+            self.assertNotEqual(cache_key, result_cache_service.build_cache_key(changed_input_tar_file_path, ProcessingOptions()))
+            self.assertNotEqual(cache_key, result_cache_service.build_cache_key(input_tar_file_path, ProcessingOptions(output_format='ndjson')))
+
+            with patch('services.ResultCacheService.RESULT_CACHE_PARSER_VERSION', '0'):
+                self.assertNotEqual(cache_key, result_cache_service.build_cache_key(input_tar_file_path, ProcessingOptions()))
+
+    # The least recently used entries are evicted once the cache has too many entries
+    def test_least_recently_used_entries_are_evicted(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, 'cache')
+            options = ProcessingOptions(cache_dir=cache_dir, cache_max_entries=2)
+            input_tar_file_paths = [
+                self.write_input_tar_file(temp_dir, 'input' + str(input_index) + '.tar.gz', bytes([input_index]))
+                for input_index in range(3)
+            ]
+
+            for output_index, input_tar_file_path in enumerate(input_tar_file_paths[:2] + input_tar_file_paths[:1] + input_tar_file_paths[2:]):
+                output_dir = os.path.join(temp_dir, 'output' + str(output_index))
+                os.makedirs(output_dir)
+                process_tar_file_to_result(input_tar_file_path, output_dir, options)
+
+            result_cache_service = ResultCacheService(cache_dir, options.cache_max_size_bytes, options.cache_max_entries)
+            cached_keys = os.listdir(result_cache_service.entries_directory_path)
+
+            # input1 was the least recently used, since input0 was used again before input2 was added
+            self.assertEqual(len(cached_keys), 2)
+            self.assertIn(result_cache_service.build_cache_key(input_tar_file_paths[0], options), cached_keys)
+            self.assertNotIn(result_cache_service.build_cache_key(input_tar_file_paths[1], options), cached_keys)
+
+    # Failed archives aren't cached
+    def test_failed_archive_is_not_cached(self):
+        from models.TarFileResult import TarFileResult
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = self.write_input_tar_file(temp_dir, 'input.tar.gz')
+            result_cache_service = ResultCacheService(os.path.join(temp_dir, 'cache'), 1024 * 1024, 10)
+
+            tar_file_result = result_cache_service.get_or_create_result(
+                input_tar_file_path, 
+                temp_dir, 
+                ProcessingOptions(), 
+                lambda staging_directory_path: TarFileResult(input_tar_file_path, success=False, error='boom')
+            )
+
+            self.assertFalse(tar_file_result.success)
+            self.assertEqual(os.listdir(result_cache_service.entries_directory_path), [])
+            self.assertEqual(sorted(os.listdir(result_cache_service.cache_directory_path)), ['entries', 'index.sqlite'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import io
+import os
+import sqlite3
+import tarfile
+import tempfile
+import unittest
+
+from models.ArchiveIdentifiers import ArchiveIdentifiers
+from models.ProcessingOptions import ProcessingOptions
+from services.SQLiteSinkService import SQLiteSinkService
+from services.TarFileService import process_tar_stream
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+ARCHIVE_PATH: str = 'input/sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236.tar.gz'
+
+# Unit test class
+class TestSQLiteSinkService(unittest.TestCase):
+    # Both log files are loaded into the sink DB, tagged with the archive and device identifiers
+    def test_process_tar_stream_loads_sink_db(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sqlite_sink_path = os.path.join(temp_dir, 'sink.sqlite')
+            options = ProcessingOptions(sqlite_sink_path=sqlite_sink_path)
+
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                result = process_tar_stream(tar_file_obj, temp_dir, ARCHIVE_PATH, options)
+
+            with sqlite3.connect(sqlite_sink_path) as sink_db:
+                archives = sink_db.execute('SELECT archive_id, archive_name, device_model, os_build FROM archives').fetchall()
+                ps_txt_rows = sink_db.execute('SELECT archive_id, device_model, USER, PID FROM ps_txt_events').fetchall()
+                powerlog_rows = sink_db.execute(
+                    'SELECT archive_id, device_model, PID FROM PLProcessMonitorAgent_EventForward_ProcessID'
+                ).fetchall()
+                index_names = [row[0] for row in sink_db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+
+            # JSON results files are still written
+            result_file_names = [file_name for file_name in os.listdir(temp_dir) if file_name.endswith('.json')]
+
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(archives, [(1, 'sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236', 'iPhone', '21E236')])
+        self.assertEqual(ps_txt_rows, [(1, 'iPhone', 'user1', 1234)])
+        self.assertEqual(powerlog_rows, [(1, 'iPhone', 1234)])
+        self.assertIn('ps_txt_events_archive_id_pid', index_names)
+        self.assertEqual(len(result_file_names), 2)
+
+    # Loading the same archive again replaces its rows, and other archives are kept
+    def test_reloading_archive_replaces_rows(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sqlite_sink_path = os.path.join(temp_dir, 'sink.sqlite')
+            first_sink_service = SQLiteSinkService(sqlite_sink_path, ArchiveIdentifiers('first', device_model='iPhone'))
+            second_sink_service = SQLiteSinkService(sqlite_sink_path, ArchiveIdentifiers('second', device_model='iPad'))
+
+            first_sink_service.load_rows('ps_txt_events', ('USER', 'PID'), iter([('user1', 1), ('user2', 2)]))
+            second_sink_service.load_rows('ps_txt_events', ('USER', 'PID'), iter([('user3', 3)]))
+            row_count = first_sink_service.load_rows('ps_txt_events', ('USER', 'PID'), iter([('user4', 4)]))
+
+            with sqlite3.connect(sqlite_sink_path) as sink_db:
+                ps_txt_rows = sink_db.execute('SELECT device_model, USER FROM ps_txt_events ORDER BY PID').fetchall()
+
+        self.assertEqual(row_count, 1)
+        self.assertEqual(ps_txt_rows, [('iPad', 'user3'), ('iPhone', 'user4')])
+
+    # Rows are committed in blocks, and a failed load doesn't leave a partial block behind
+    def test_load_rows_in_transaction_blocks(self):
+        from unittest.mock import patch
+
+        def iter_rows_then_fail():
+            yield ('user1', 1)
+            yield ('user2', 2)
+            yield ('user3', 3)
+            raise ValueError('Test Exception')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sqlite_sink_path = os.path.join(temp_dir, 'sink.sqlite')
+            sink_service = SQLiteSinkService(sqlite_sink_path, ArchiveIdentifiers('first'))
+
+            with patch('services.SQLiteSinkService.SQLITE_SINK_ROWS_PER_TRANSACTION', 2):
+                self.assertEqual(sink_service.load_rows('ps_txt_events', ('USER', 'PID'), iter([('user1', 1), ('user2', 2), ('user3', 3)])), 3)
+
+                # A row count that is an exact multiple of the block size ends on the empty block
+                self.assertEqual(sink_service.load_rows('ps_txt_events', ('USER', 'PID'), [('user1', 1), ('user2', 2)]), 2)
+
+                with self.assertRaises(ValueError):
+                    sink_service.load_rows('ps_txt_events', ('USER', 'PID'), iter_rows_then_fail())
+
+            with sqlite3.connect(sqlite_sink_path) as sink_db:
+                ps_txt_users = [row[0] for row in sink_db.execute('SELECT USER FROM ps_txt_events ORDER BY PID')]
+
+        # Only the first, fully committed block of the failed load is kept
+        self.assertEqual(ps_txt_users, ['user1', 'user2'])
+
+
+    # ps.txt is parsed once, and each parsed block fed to the sink, whichever path the results file is written by
+    def test_ps_txt_is_parsed_once_for_sink_and_results_file(self):
+        from unittest.mock import patch
+        from services.TarFileService import process_ps_txt_file
+        from utils.TxtConverter import get_txt_rows_converter
+
+        txt_content = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n" + ''.join(
+            "user" + str(row_index) + " 1000 pr1 " + str(row_index) + " 1 - 0.1 0.2 20 0 10000 2000 - tty1 S 9:00PM 0:00.01 command " + str(row_index) + "\n"
+            for row_index in range(50)
+        )
+
+        large_file_size: int = len(txt_content) * 2
+
+        # Streaming and parallel parse thresholds for each path
+        for path_name, processing_options, streaming_threshold, parallel_min_size in [
+            ('in memory', ProcessingOptions(), large_file_size, large_file_size), 
+            ('streaming', ProcessingOptions(), 0, large_file_size), 
+            ('parallel', ProcessingOptions(parse_workers=2), 0, 0), 
+        ]:
+            with self.subTest(path_name), tempfile.TemporaryDirectory() as temp_dir:
+                sqlite_sink_path = os.path.join(temp_dir, 'sink.sqlite')
+                sink_service = SQLiteSinkService(sqlite_sink_path, ArchiveIdentifiers('first'))
+
+                with patch('services.TarFileService.STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES', streaming_threshold), \
+                     patch('services.TarFileService.PARALLEL_TXT_PARSE_MIN_SIZE_BYTES', parallel_min_size), \
+                     patch('services.TxtLogService.get_txt_rows_converter', wraps=get_txt_rows_converter) as mock_get_txt_rows_converter:
+                    row_count = process_ps_txt_file(
+                        io.BytesIO(txt_content.encode('utf-8')), len(txt_content), 'ps', temp_dir, processing_options, sink_service
+                    )
+
+                with sqlite3.connect(sqlite_sink_path) as sink_db:
+                    sink_pids = [row[0] for row in sink_db.execute('SELECT PID FROM ps_txt_events ORDER BY PID')]
+
+                self.assertEqual(row_count, 50)
+                self.assertEqual(sink_pids, list(range(50)))
+                # Parse workers build their own converters, so the parent never builds one
+                self.assertEqual(mock_get_txt_rows_converter.call_count, 0 if path_name == 'parallel' else 1)
+
+    # A failed sink load is reported, and the results file is still written
+    def test_failed_sink_load_still_writes_results_file(self):
+        from unittest.mock import patch
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            options = ProcessingOptions(sqlite_sink_path=os.path.join(temp_dir, 'sink.sqlite'))
+
+            with patch('services.SQLiteSinkService.SQLiteDBClient.executemany', side_effect=sqlite3.OperationalError('Test Exception')):
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, temp_dir, ARCHIVE_PATH, options)
+
+            with sqlite3.connect(options.sqlite_sink_path) as sink_db:
+                ps_txt_row_count = sink_db.execute('SELECT COUNT(*) FROM ps_txt_events').fetchone()[0]
+
+            result_file_names = [file_name for file_name in os.listdir(temp_dir) if file_name.endswith('.json')]
+
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(ps_txt_row_count, 0)
+        self.assertEqual(len(result_file_names), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
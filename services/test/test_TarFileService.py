@@ -0,0 +1,364 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+
+from services.TarFileService import process_tar_file_to_result, process_tar_stream
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+# Unit test class
+class TestTarFileService(unittest.TestCase):
+    # Returns row counts and timings for both log files found in the archive
+    def test_process_tar_stream_returns_result_record(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                result = process_tar_stream(tar_file_obj, output_dir, 'input.tar.gz')
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.input_tar_file_path, 'input.tar.gz')
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(result.powerlog_row_count, 1)
+        self.assertIsNotNone(result.ps_txt_seconds)
+        self.assertIsNotNone(result.powerlog_seconds)
+
+    # ps.txt files over the size threshold are streamed to the output file
+    def test_large_ps_txt_member_uses_streaming_path(self):
+        from unittest.mock import patch
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch('services.TarFileService.STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES', 0), \
+                 patch('services.TarFileService.stream_txt_file_to_json_file', return_value=1) as mock_stream_txt_file, \
+                 patch('services.TarFileService.get_txt_log_events_from_txt_file') as mock_get_txt_log_events:
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, output_dir)
+
+        mock_stream_txt_file.assert_called_once()
+        mock_get_txt_log_events.assert_not_called()
+        self.assertEqual(result.ps_txt_row_count, 1)
+
+    # ps.txt files over the parallel size threshold are parsed across worker processes, if parse workers are enabled
+    def test_parse_workers_option_uses_parallel_path(self):
+        from unittest.mock import patch
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch('services.TarFileService.PARALLEL_TXT_PARSE_MIN_SIZE_BYTES', 0), \
+                 patch('services.TarFileService.process_txt_file_in_parallel', return_value=1) as mock_process_txt_file_in_parallel:
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(parse_workers=3))
+
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    process_tar_stream(tar_file_obj, output_dir)
+
+        # Only the run with parse workers enabled uses the parallel path
+        mock_process_txt_file_in_parallel.assert_called_once()
+        self.assertEqual(mock_process_txt_file_in_parallel.call_args[0][3], 3)
+
+    # Powerlog DB files over the in-memory size limit are spooled to a temporary file, which is removed afterwards
+    def test_large_powerlog_member_is_spooled_to_disk(self):
+        from unittest.mock import patch
+        from utils.FileHelper import spool_file_to_temp_file
+
+        spooled_file_paths = []
+
+        def spool_and_record(*args, **kwargs):
+            spooled_file_path = spool_file_to_temp_file(*args, **kwargs)
+            spooled_file_paths.append(spooled_file_path)
+            return spooled_file_path
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch('services.TarFileService.MAX_IN_MEMORY_SQLITE_DB_SIZE_BYTES', 0), \
+                 patch('services.TarFileService.spool_file_to_temp_file', side_effect=spool_and_record):
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, output_dir)
+
+        self.assertEqual(result.powerlog_row_count, 1)
+        self.assertEqual(len(spooled_file_paths), 1)
+        self.assertFalse(os.path.exists(spooled_file_paths[0]))
+
+    # Large ps.txt files are spooled out of the archive and streamed to the results file
+    def test_streaming_path_reads_spooled_ps_txt_file(self):
+        import json
+        from unittest.mock import patch
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch('services.TarFileService.STREAMING_TXT_FILE_SIZE_THRESHOLD_BYTES', 1):
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, output_dir)
+
+            ps_txt_result_file_name = [file_name for file_name in os.listdir(output_dir) if file_name.startswith('ps_')][0]
+
+            with open(os.path.join(output_dir, ps_txt_result_file_name)) as result_file:
+                ps_txt_results = json.load(result_file)
+
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(ps_txt_results[0]['USER'], 'user1')
+
+    # Columnar output is written for both log files, with ps.txt always going through the streaming path
+    def test_columnar_output_format(self):
+        from models.ProcessingOptions import ProcessingOptions
+        from utils.ColumnarReader import read_columnar_columns
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                result = process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(parse_workers=2, output_format='columnar'))
+
+            result_directory_names = sorted(os.listdir(output_dir))
+            ps_txt_columns = read_columnar_columns(os.path.join(output_dir, result_directory_names[1]))
+
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(result.powerlog_row_count, 1)
+        self.assertTrue(all(directory_name.endswith('.columnar') for directory_name in result_directory_names))
+        self.assertEqual(ps_txt_columns['USER'], ['user1'])
+        self.assertEqual(ps_txt_columns['PID'], [1234])
+
+    # ps.txt and powerlog processing run at the same time, once both have been pulled from the archive
+    def test_ps_txt_and_powerlog_processed_concurrently(self):
+        import threading
+        from unittest.mock import patch
+
+        # Each side waits for the other to start, which can only happen if both run at the same time
+        both_started = threading.Barrier(2, timeout=5)
+
+        def process_ps_txt_file(ps_txt_file, *args):
+            ps_txt_file.close()
+            both_started.wait()
+            return 1
+
+        def process_powerlog_db(*args):
+            both_started.wait()
+            return 2
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch('services.TarFileService.process_ps_txt_file', side_effect=process_ps_txt_file), \
+                 patch('services.TarFileService.process_powerlog_db', side_effect=process_powerlog_db):
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, output_dir)
+
+        self.assertEqual(result.ps_txt_row_count, 1)
+        self.assertEqual(result.powerlog_row_count, 2)
+
+    # Invalid archives are reported as a failed result rather than raising or exiting
+    def test_process_tar_file_to_result_failure(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'broken.tar.gz')
+
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(b'not a tar file')
+
+            result = process_tar_file_to_result(input_tar_file_path, temp_dir)
+
+        self.assertFalse(result.success)
+        self.assertIsNotNone(result.error)
+        self.assertGreater(result.total_seconds, 0)
+
+    # Per-stage metrics are recorded onto the result when enabled, and not otherwise
+    def test_process_tar_file_to_result_collects_metrics(self):
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'input.tar.gz')
+
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(build_test_tar_gz_bytes())
+
+            result = process_tar_file_to_result(input_tar_file_path, temp_dir, ProcessingOptions(collect_metrics=True, trace_memory=True))
+            result_without_metrics = process_tar_file_to_result(input_tar_file_path, temp_dir)
+
+        self.assertIsNone(result_without_metrics.metrics)
+
+        self.assertEqual(result.metrics['input_tar_file_path'], input_tar_file_path)
+        self.assertEqual(result.metrics['ps_txt_row_count'], 1)
+        self.assertIsNotNone(result.metrics['peak_traced_memory_bytes'])
+
+        stages = {stage['name']: stage for stage in result.metrics['stages']}
+
+        for stage_name in ['archive', 'tar_scan', 'extract_ps_txt', 'extract_powerlog', 'process_ps_txt', 'process_powerlog', 'ps_txt_parse', 'powerlog_stream']:
+            self.assertIn(stage_name, stages)
+
+        self.assertEqual(stages['process_powerlog']['row_count'], 1)
+        self.assertGreater(stages['archive']['byte_count'], 0)
+
+    # Profiling files are written next to the results files when profiling is enabled
+    def test_process_tar_file_to_result_writes_profile_files(self):
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'input.tar.gz')
+            output_dir = os.path.join(temp_dir, 'output')
+            os.makedirs(output_dir)
+
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(build_test_tar_gz_bytes())
+
+            result = process_tar_file_to_result(input_tar_file_path, output_dir, ProcessingOptions(profile_calls=True, profile_allocations=True))
+
+            output_file_names = os.listdir(output_dir)
+
+        self.assertTrue(result.success)
+        self.assertTrue(any(file_name.startswith('profile_') and file_name.endswith('.pstats') for file_name in output_file_names))
+        self.assertTrue(any(file_name.startswith('allocations_') and file_name.endswith('.json') for file_name in output_file_names))
+
+    # Other powerlog tables are exported from the same opened DB as the process events table
+    def test_powerlog_table_exports_open_db_once(self):
+        from unittest.mock import patch
+        from models.PowerlogTableExport import PowerlogTableExport
+        from models.ProcessingOptions import ProcessingOptions
+        from services.DBLogService import DBLogService
+
+        options = ProcessingOptions(powerlog_table_exports=(
+            PowerlogTableExport('PLProcessMonitorAgent_EventForward_ProcessID'), 
+            PowerlogTableExport('PLMissingTable'), 
+        ))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch.object(DBLogService, 'open_db_client', autospec=True, side_effect=DBLogService.open_db_client) as mock_open_db_client:
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    result = process_tar_stream(tar_file_obj, output_dir, options=options)
+
+            output_file_names = os.listdir(output_dir)
+
+        self.assertEqual(mock_open_db_client.call_count, 1)
+        self.assertEqual(result.powerlog_row_count, 1)
+        self.assertEqual(len(output_file_names), 3)
+        self.assertTrue(any('_PLProcessMonitorAgent_EventForward_ProcessID_' in file_name for file_name in output_file_names))
+
+    # With incremental extraction, rows already exported for the device aren't exported again
+    def test_incremental_extraction_skips_exported_rows(self):
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            options = ProcessingOptions(incremental_state_path=os.path.join(temp_dir, 'state.sqlite'), device_id='device-1')
+            results = []
+
+            for _ in range(2):
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    results.append(process_tar_stream(tar_file_obj, temp_dir, 'input.tar.gz', options))
+
+            # A different device has its own high-water marks
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                other_device_result = process_tar_stream(tar_file_obj, temp_dir, 'input.tar.gz', ProcessingOptions(
+                    incremental_state_path=options.incremental_state_path, 
+                    device_id='device-2'
+                ))
+
+        self.assertEqual([result.powerlog_row_count for result in results], [1, 0])
+        self.assertEqual(results[1].ps_txt_row_count, 1)
+        self.assertEqual(other_device_result.powerlog_row_count, 1)
+
+    # A filtered incremental run only moves the high-water mark for its own filters, so a later unfiltered run still
+    # exports the rows the filtered run left out
+    def test_incremental_extraction_keeps_marks_per_filter_set(self):
+        from models.EventFilters import EventFilters
+        from models.ProcessingOptions import ProcessingOptions
+
+        results = []
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, 'state.sqlite')
+
+            for event_filters in [EventFilters(bundle_ids=('com.example.bundle',)), EventFilters(), EventFilters(bundle_ids=('com.example.bundle',)), EventFilters()]:
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    results.append(process_tar_stream(tar_file_obj, temp_dir, 'input.tar.gz', ProcessingOptions(
+                        incremental_state_path=state_path, 
+                        device_id='device-1', 
+                        event_filters=event_filters
+                    )))
+
+        self.assertEqual([result.powerlog_row_count for result in results], [1, 1, 0, 0])
+
+    # Event filters limit both the powerlog rows and the ps.txt rows exported
+    def test_event_filters_limit_exported_rows(self):
+        from models.EventFilters import EventFilters
+        from models.ProcessingOptions import ProcessingOptions
+
+        results = []
+
+        for event_filters in [
+            EventFilters(since=1638316800.0, until=1638316800.0, bundle_ids=('com.example.bundle',), process_names=('ExampleProcess', 'command1')), 
+            EventFilters(process_names=('OtherProcess',)), 
+            EventFilters(since=1638316801.0), 
+        ]:
+            with tempfile.TemporaryDirectory() as output_dir:
+                with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                    results.append(process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(event_filters=event_filters)))
+
+        self.assertEqual([(result.ps_txt_row_count, result.powerlog_row_count) for result in results], [(1, 1), (0, 0), (1, 0)])
+
+    # The ps.txt summary is written next to the ps.txt results file
+    def test_ps_txt_summary_written(self):
+        import json
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(ps_txt_summary=True, ps_txt_summary_top_n=1))
+
+            summary_file_names = [file_name for file_name in os.listdir(output_dir) if file_name.startswith('ps_summary_')]
+
+            with open(os.path.join(output_dir, summary_file_names[0])) as summary_file:
+                summary = json.load(summary_file)
+
+        self.assertEqual(len(summary_file_names), 1)
+        self.assertEqual(summary['row_count'], 1)
+        self.assertEqual(summary['groups']['USER']['top']['RSS'], [
+            {'USER': 'user1', 'process_count': 1, 'CPU': 0.1, 'MEM': 0.2, 'RSS': 2000, 'VSZ': 10000}
+        ])
+
+    # With only rollups wanted, the rollups are written instead of every process event
+    def test_powerlog_rollup_only(self):
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                result = process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(
+                    powerlog_rollup_interval_seconds=60, 
+                    powerlog_rollup_only=True
+                ))
+
+            powerlog_file_names = [file_name for file_name in os.listdir(output_dir) if file_name.startswith('powerlog_')]
+
+        self.assertEqual(result.powerlog_row_count, 1)
+        self.assertEqual(len(powerlog_file_names), 1)
+        self.assertTrue(powerlog_file_names[0].startswith('powerlog_2024-04-16_19-30_1234_rollup_60s_'))
+
+    # Uncompressed .tar files are read too, with the compression detected from the stream
+    def test_process_tar_file_to_result_uncompressed_tar(self):
+        import gzip
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'archive.tar')
+
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(gzip.decompress(build_test_tar_gz_bytes()))
+
+            result = process_tar_file_to_result(input_tar_file_path, temp_dir)
+
+        self.assertTrue(result.success)
+        self.assertEqual((result.ps_txt_row_count, result.powerlog_row_count), (1, 1))
+
+    # Process events are also written joined by PID with the ps.txt snapshot
+    def test_ps_txt_joined_with_powerlog(self):
+        import json
+        from models.ProcessingOptions import ProcessingOptions
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with tarfile.open(fileobj=io.BytesIO(build_test_tar_gz_bytes()), mode='r|gz') as tar_file_obj:
+                result = process_tar_stream(tar_file_obj, output_dir, options=ProcessingOptions(join_ps_txt_with_powerlog=True))
+
+            joined_file_names = [file_name for file_name in os.listdir(output_dir) if file_name.startswith('powerlog_2024-04-16_19-30_1234_joined_')]
+
+            with open(os.path.join(output_dir, joined_file_names[0])) as joined_file:
+                joined_results = json.load(joined_file)
+
+        self.assertEqual((result.ps_txt_row_count, result.powerlog_row_count), (1, 1))
+        self.assertEqual(len(joined_file_names), 1)
+        self.assertEqual(
+            [(joined_result['PID'], joined_result['USER'], joined_result['RSS'], joined_result['COMMAND']) for joined_result in joined_results], 
+            [(1234, 'user1', 2000, 'command1')]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -232,4 +232,152 @@ class TestTxtLogService(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertIn('"USER": "user1"', result) # type: ignore
         self.assertNotIn('invalid_row', result) # type: ignore
-        self.assertIn('"USER": "user2"', result) # type: ignore
\ No newline at end of file
+        self.assertIn('"USER": "user2"', result) # type: ignore
+
+class TestStreamTxtFileToJsonFile(unittest.TestCase):
+    # Streamed output matches the in-memory output, and skips the header row and invalid rows
+    def test_streamed_output_matches_in_memory_output(self):
+        import io
+        import os
+        import tempfile
+        from services.TxtLogService import stream_txt_file_to_json_file
+
+        txt_content = (
+            "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n"
+            "user1 1000 pr1 1234 5678 - 0.1 0.2 20 0 10000 2000 - tty1 S 2023-10-01 00:00:01 command1 --flag\r\n"
+            "invalid_row\n"
+            "user2 1001 pr2 1235 5679 - 0.2 0.3 21 1 11000 2100 - tty2 R 2023-10-02 00:00:02 commänd2\n"
+        )
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = stream_txt_file_to_json_file(io.BytesIO(txt_content.encode('utf-8')), output_dir, 'ps')
+
+            result_file_names = os.listdir(output_dir)
+
+            with open(os.path.join(output_dir, result_file_names[0])) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(row_count, 2)
+        self.assertEqual(len(result_file_names), 1)
+        self.assertEqual(result, process_txt_file(io.BytesIO(txt_content.encode('utf-8'))))
+
+    # An empty file returns None and writes nothing
+    def test_streaming_empty_file(self):
+        import io
+        import os
+        import tempfile
+        from services.TxtLogService import stream_txt_file_to_json_file
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = stream_txt_file_to_json_file(io.BytesIO(b""), output_dir, 'ps')
+
+            self.assertIsNone(row_count)
+            self.assertEqual(os.listdir(output_dir), [])
+
+    # Malformed rows are reported once per file rather than once per row
+    def test_malformed_rows_reported_in_bulk(self):
+        import io
+        from unittest.mock import patch
+
+        txt_content = (
+            "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n"
+            "invalid_row_1\n"
+            "invalid_row_2\n"
+            "user1 1000 pr1 1234 5678 - 0.1 0.2 20 0 10000 2000 - tty1 S 2023-10-01 00:00:01 command1\n"
+        )
+
+        with patch('builtins.print') as mock_print:
+            result = process_txt_file(io.BytesIO(txt_content.encode('utf-8')))
+
+        self.assertIn('"USER": "user1"', result) # type: ignore
+        mock_print.assert_called_once_with('TxtLogService - Skipped ', 2, ' malformed rows in text file')
+
+    # The header row decides the column layout, for ps.txt files with a different set of columns
+    def test_header_driven_column_layout(self):
+        import io
+        import json
+
+        txt_content = (
+            "USER   PID  %CPU %MEM      RSS COMMAND\n"
+            "root     1   0.5  1.2    20480 /sbin/launchd\n"
+        )
+
+        result = json.loads(process_txt_file(io.BytesIO(txt_content.encode('utf-8')))) # type: ignore
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['USER'], 'root')
+        self.assertEqual(result[0]['PID'], 1)
+        self.assertEqual(result[0]['CPU'], 0.5)
+        self.assertEqual(result[0]['RSS'], 20480)
+        self.assertEqual(result[0]['COMMAND'], '/sbin/launchd')
+        self.assertIsNone(result[0]['UID'])
+
+
+class TestProcessTxtFileInParallel(unittest.TestCase):
+    # Output from the parse worker pool is identical to the single-core output, with rows in their original order
+    def test_parallel_output_matches_single_core_output(self):
+        import io
+        import os
+        import tempfile
+        from services.TxtLogService import process_txt_file_in_parallel
+
+        txt_content = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n" + ''.join(
+            "user" + str(row_index) + " 1000 pr1 " + str(row_index) + " 1 - 0.1 0.2 20 0 10000 2000 - tty1 S 9:00PM 0:00.01 command " + str(row_index) + "\n"
+            for row_index in range(500)
+        ) + "invalid_row\n"
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = process_txt_file_in_parallel(io.BytesIO(txt_content.encode('utf-8')), output_dir, 'ps', 2)
+
+            with open(os.path.join(output_dir, os.listdir(output_dir)[0])) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(row_count, 500)
+        self.assertEqual(result, process_txt_file(io.BytesIO(txt_content.encode('utf-8'))))
+
+    # Parallel NDJSON output has one object per row, in the original order
+    def test_parallel_ndjson_output(self):
+        import io
+        import json
+        import os
+        import tempfile
+        from services.TxtLogService import process_txt_file_in_parallel
+
+        txt_content = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n" + ''.join(
+            "user" + str(row_index) + " 1000 pr1 " + str(row_index) + " 1 - 0.1 0.2 20 0 10000 2000 - tty1 S 9:00PM 0:00.01 command " + str(row_index) + "\n"
+            for row_index in range(100)
+        )
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            row_count = process_txt_file_in_parallel(io.BytesIO(txt_content.encode('utf-8')), output_dir, 'ps', 2, 'ndjson')
+
+            with open(os.path.join(output_dir, os.listdir(output_dir)[0])) as result_file:
+                result = [json.loads(result_line) for result_line in result_file]
+
+        self.assertEqual(row_count, 100)
+        self.assertEqual([result_row['PID'] for result_row in result], list(range(100)))
+
+    # Parse workers are never forked, as the pool is created while other threads are running
+    def test_parse_workers_are_not_forked(self):
+        from services.TxtLogService import get_parse_worker_mp_context
+
+        self.assertIn(get_parse_worker_mp_context().get_start_method(), ('forkserver', 'spawn'))
+
+
+class TestWriteTxtResultsToFile(unittest.TestCase):
+    # Results can be written gzip compressed, with a matching file extension
+    def test_write_gzip_compressed_results(self):
+        import gzip
+        import os
+        import tempfile
+        from services.TxtLogService import write_txt_results_to_file
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            write_txt_results_to_file('{"PID":1}\n', output_dir, 'ps', 'ndjson', compress=True)
+            result_file_name = os.listdir(output_dir)[0]
+
+            with gzip.open(os.path.join(output_dir, result_file_name), 'rt') as result_file:
+                result = result_file.read()
+
+        self.assertRegex(result_file_name, r'^ps_\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}\.ndjson\.gz$')
+        self.assertEqual(result, '{"PID":1}\n')
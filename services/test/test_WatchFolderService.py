@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+
+from models.ProcessingOptions import ProcessingOptions
+from services.WatchFolderService import WatchFolderService, move_processed_archive
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
+
+# Unit test class
+class TestWatchFolderService(unittest.TestCase):
+    # Archives are only processed once they stop changing, and are then moved to the done or error directory
+    def test_poll_processes_stable_archives(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            watch_dir = os.path.join(temp_dir, 'watch')
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(watch_dir)
+            os.mkdir(output_dir)
+
+            for file_name, archive_bytes in [('good.tar.gz', build_test_tar_gz_bytes()), ('bad.tar.gz', b'not a tar file'), ('other.txt', b'')]:
+                with open(os.path.join(watch_dir, file_name), 'wb') as archive_file:
+                    archive_file.write(archive_bytes)
+
+            with WatchFolderService(watch_dir, output_dir, max_workers=1, max_queue_depth=1, stable_poll_count=1) as watch_folder_service:
+                # First seen, so not yet known to be stable
+                watch_folder_service.poll()
+                self.assertEqual(watch_folder_service.submitted_count, 0)
+
+                # A partial upload grows between polls, so is left alone
+                with open(os.path.join(watch_dir, 'partial.tar.gz'), 'wb') as partial_file:
+                    partial_file.write(b'part')
+
+                watch_folder_service.poll()
+                # Finished archives are only collected by the next poll, so both are still submitted
+                self.assertEqual(watch_folder_service.submitted_count, 2)
+
+                with open(os.path.join(watch_dir, 'partial.tar.gz'), 'ab') as partial_file:
+                    partial_file.write(b'more')
+
+                results = watch_folder_service.poll() + watch_folder_service.drain()
+
+            self.assertEqual(sorted(os.listdir(watch_dir)), ['done', 'error', 'other.txt', 'partial.tar.gz'])
+            self.assertEqual(os.listdir(os.path.join(watch_dir, 'done')), ['good.tar.gz'])
+            self.assertEqual(os.listdir(os.path.join(watch_dir, 'error')), ['bad.tar.gz'])
+            self.assertEqual(len(os.listdir(os.path.join(output_dir, 'good'))), 2)
+
+        self.assertEqual(sorted((os.path.basename(result.input_tar_file_path), result.success) for result in results), [('bad.tar.gz', False), ('good.tar.gz', True)])
+        self.assertEqual([result.ps_txt_row_count for result in results if result.success], [1])
+
+    # An archive missing the powerlog DB is moved to the error directory, and each archive's metrics are appended to
+    # the metrics path as it finishes
+    def test_incomplete_archive_fails_and_metrics_are_appended(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            watch_dir = os.path.join(temp_dir, 'watch')
+            output_dir = os.path.join(temp_dir, 'out')
+            metrics_path = os.path.join(temp_dir, 'metrics.jsonl')
+            os.mkdir(watch_dir)
+            os.mkdir(output_dir)
+
+            with open(os.path.join(watch_dir, 'good.tar.gz'), 'wb') as archive_file:
+                archive_file.write(build_test_tar_gz_bytes())
+
+            ps_txt_bytes = b"USER PID COMMAND\nuser1 1234 command1\n"
+
+            with tarfile.open(os.path.join(watch_dir, 'ps_only.tar.gz'), 'w:gz') as tar_file_obj:
+                member_info = tarfile.TarInfo('sysdiagnose/ps.txt')
+                member_info.size = len(ps_txt_bytes)
+                tar_file_obj.addfile(member_info, io.BytesIO(ps_txt_bytes))
+
+            options = ProcessingOptions(collect_metrics=True, metrics_path=metrics_path)
+
+            with WatchFolderService(watch_dir, output_dir, options, max_workers=1, stable_poll_count=0) as watch_folder_service:
+                watch_folder_service.poll()
+                results = watch_folder_service.drain()
+
+            self.assertEqual(os.listdir(os.path.join(watch_dir, 'done')), ['good.tar.gz'])
+            self.assertEqual(os.listdir(os.path.join(watch_dir, 'error')), ['ps_only.tar.gz'])
+
+            with open(metrics_path) as metrics_file:
+                metrics_lines = [json.loads(metrics_line) for metrics_line in metrics_file]
+
+        self.assertEqual(
+            sorted((os.path.basename(result.input_tar_file_path), result.success, result.error) for result in results), 
+            [('good.tar.gz', True, None), ('ps_only.tar.gz', False, 'powerlog could not be processed')]
+        )
+        self.assertEqual(len(metrics_lines), 2)
+
+    # Stable archives past the queue depth stay in the directory until there is room
+    def test_poll_limits_queue_depth(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for archive_index in range(3):
+                with open(os.path.join(temp_dir, 'archive_' + str(archive_index) + '.tar.gz'), 'wb') as archive_file:
+                    archive_file.write(build_test_tar_gz_bytes())
+
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(output_dir)
+
+            with WatchFolderService(temp_dir, output_dir, max_workers=1, max_queue_depth=1, stable_poll_count=0) as watch_folder_service:
+                watch_folder_service.poll()
+                self.assertEqual(watch_folder_service.submitted_count, 2)
+
+                first_results = watch_folder_service.drain()
+                watch_folder_service.poll()
+                last_results = watch_folder_service.drain()
+
+            self.assertEqual(sorted(os.listdir(os.path.join(temp_dir, 'done'))), ['archive_0.tar.gz', 'archive_1.tar.gz', 'archive_2.tar.gz'])
+
+        self.assertEqual((len(first_results), len(last_results)), (2, 1))
+
+    # An archive of the same name that was processed before is kept
+    def test_move_processed_archive_keeps_existing_archive(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            done_dir = os.path.join(temp_dir, 'done')
+            moved_paths = []
+
+            for _ in range(2):
+                with open(os.path.join(temp_dir, 'archive.tar.gz'), 'wb') as archive_file:
+                    archive_file.write(b'archive')
+
+                moved_paths.append(move_processed_archive(os.path.join(temp_dir, 'archive.tar.gz'), done_dir))
+
+            self.assertEqual(len(os.listdir(done_dir)), 2)
+
+        self.assertEqual(moved_paths[0], os.path.join(done_dir, 'archive.tar.gz'))
+        self.assertTrue(os.path.basename(moved_paths[1]).startswith('archive_'))
+        self.assertTrue(moved_paths[1].endswith('.tar.gz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
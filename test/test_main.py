@@ -1,18 +1,23 @@
 import unittest
-from consts.FileProcessing import MAX_INPUT_TAR_FILE_SIZE_BYTES
 from main import process_tar_file
+from utils.test.TarTestHelper import build_test_tar_gz_bytes
 import argparse
 
+FINISHED_EXIT_MESSAGE = 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.'
+
 class TestMain(unittest.TestCase):
-    # Exits app with an error message if the input TAR file size exceeds 400MB
-    def test_input_tar_file_size_exceeds_400mb(self):
+    # Input TAR files over 400MB are no longer rejected, since large DB files are spooled to disk
+    def test_input_tar_file_size_over_400mb_is_processed(self):
         from unittest.mock import patch
 
-        with patch('os.path.getsize', return_value=MAX_INPUT_TAR_FILE_SIZE_BYTES + 1):
-            with self.assertRaises(SystemExit) as cm:
-                process_tar_file('dummy_input.tar.gz', 'dummy_output')
-        
-            self.assertEqual(cm.exception.code, 'Input TAR file size exceeds max allowed size of 400MB.')
+        with patch('os.path.getsize', return_value=400000001):
+            with patch('tarfile.open') as mock_tarfile_open:
+                mock_tarfile_open.return_value.__enter__.return_value.__iter__.return_value = iter([])
+
+                with self.assertRaises(SystemExit) as cm:
+                    process_tar_file('dummy_input.tar.gz', 'dummy_output')
+
+        self.assertEqual(cm.exception.code, FINISHED_EXIT_MESSAGE)
 
     # Check for the correct exit message on empty TAR file
     def test_empty_tar_file(self):
@@ -26,123 +31,151 @@ class TestMain(unittest.TestCase):
                             mock_tarfile_open.return_value.__enter__.return_value.getmembers.return_value = []
                             mock_tarfile_open.return_value.__enter__.return_value.__iter__.return_value = iter([])
                             process_tar_file('dummy_input.tar.gz', 'invalid_output')
-                            mock_sys_exit.assert_called_once_with('Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
+                            mock_sys_exit.assert_called_once_with(FINISHED_EXIT_MESSAGE)
 
-    # Handles the case where ps.txt file is not found in the TAR archive
-    def test_ps_txt_file_not_found_in_tar(self):
-        from unittest.mock import patch, MagicMock
+    # Writes the archive to a temporary file and processes it, returning the exit message and the results file names
+    def process_test_archive(self, tar_gz_bytes: bytes):
+        import os
+        import tempfile
 
-        # Mock the tarfile and its contents
-        mock_tarfile = MagicMock()
-        mock_tarfile.__enter__.return_value = mock_tarfile
-        mock_tarfile.getnames.return_value = ['powerlog.PLSQL']
-        mock_tarfile.extractfile.return_value = None
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'input.tar.gz')
 
-        with patch('tarfile.open', return_value=mock_tarfile):
-            with patch('os.path.getsize', return_value=100):
-                with patch('services.DBLogService.DBLogService.process_sqlite_db_file', return_value='{"db_log_events": []}'):
-                    with patch('services.DBLogService.DBLogService.write_db_results_to_file'):
-                        with self.assertRaises(SystemExit) as cm:
-                            process_tar_file('dummy_input.tar.gz', 'dummy_output')
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(tar_gz_bytes)
 
-                        self.assertEqual(str(cm.exception), 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(output_dir)
 
-    # Test ps.txt file extraction error
-    def test_ps_txt_file_extraction_failure(self):
-        from unittest.mock import patch, MagicMock
+            with self.assertRaises(SystemExit) as cm:
+                process_tar_file(input_tar_file_path, output_dir)
 
-        # Mock the tarfile and its contents
-        mock_tarfile = MagicMock()
-        mock_tarfile.__enter__.return_value = mock_tarfile
-        mock_tarfile.getnames.return_value = ['powerlog.PLSQL']
-        mock_tarfile.extractfile.return_value = None
+            return cm.exception.code, sorted(os.listdir(output_dir))
 
-        with patch('tarfile.open', return_value=mock_tarfile):
-            with patch('os.path.getsize', return_value=100):
-                with patch('services.DBLogService.DBLogService.process_sqlite_db_file', return_value='{"db_log_events": []}'):
-                    with patch('services.DBLogService.DBLogService.write_db_results_to_file'):
-                        with self.assertRaises(SystemExit) as cm:
-                            process_tar_file('dummy_input.tar.gz', 'dummy_output')
+    # Handles the case where ps.txt file is not found in the TAR archive - the powerlog DB is still processed
+    def test_ps_txt_file_not_found_in_tar(self):
+        from unittest.mock import patch
+        from services.TarFileService import process_ps_txt_file
 
-                        self.assertEqual(str(cm.exception), 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
+        with patch('services.TarFileService.process_ps_txt_file', wraps=process_ps_txt_file) as mock_process_ps_txt_file:
+            exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes(include_ps_txt=False))
 
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        mock_process_ps_txt_file.assert_not_called()
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('powerlog_2024-04-16_19-30_1234_'))
 
-    # Powerlog PLSQL file is not found in the TAR archive - exit with the correct message
+    # Test ps.txt file extraction error - ps.txt isn't processed, and the powerlog DB still is
+    def test_ps_txt_file_extraction_failure(self):
+        from unittest.mock import patch
+
+        with patch('services.TarFileService.extract_ps_txt_member', return_value=None), \
+             patch('services.TarFileService.process_ps_txt_file') as mock_process_ps_txt_file:
+            exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes())
+
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        mock_process_ps_txt_file.assert_not_called()
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('powerlog_2024-04-16_19-30_1234_'))
+
+    # Powerlog PLSQL file is not found in the TAR archive - ps.txt is still processed, and exits with the correct message
     def test_powerlog_plsql_file_not_found_in_tar(self):
-        from unittest import mock
-        with mock.patch('os.path.getsize', return_value=1000):
-            with mock.patch('tarfile.open') as mock_tar_open:
-                mock_tar_open.return_value.__enter__.return_value.extractfile.return_value = None
-                with self.assertRaises(SystemExit) as cm:
-                    process_tar_file('dummy_input.tar.gz', 'dummy_output')
-                self.assertEqual(cm.exception.code, 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
+        from unittest.mock import patch
+        from services.TarFileService import process_powerlog_db
+
+        with patch('services.TarFileService.process_powerlog_db', wraps=process_powerlog_db) as mock_process_powerlog_db:
+            exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes(include_powerlog=False))
+
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        mock_process_powerlog_db.assert_not_called()
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('ps_'))
 
-    # Handles exceptions during the processing of ps.txt file
+    # Handles a ps.txt file that can't be processed - no ps.txt results file is written, and the powerlog DB is still processed
     def test_handles_exceptions_during_processing_ps_txt_file(self):
-        from unittest.mock import patch, mock_open
-        from unittest.mock import MagicMock
-
-        # Mock the tarfile and its contents
-        mock_tarfile = MagicMock()
-        mock_tarfile.__enter__.return_value = mock_tarfile
-        mock_tarfile.getnames.return_value = ['ps.txt']
-        mock_tarfile.extractfile.return_value = mock_open(read_data=b'header\nrow1\nrow2').return_value
-
-        with patch('tarfile.open', return_value=mock_tarfile):
-            with patch('os.path.getsize', return_value=100):
-                with patch('services.TxtLogService.process_txt_file', side_effect=Exception('Error processing txt file')):
-                    with patch('services.TxtLogService.write_txt_results_to_file'):
-                        with patch('services.DBLogService.DBLogService.process_sqlite_db_file'):
-                            with patch('services.DBLogService.DBLogService.write_db_results_to_file'):
-                                with self.assertRaises(SystemExit) as cm:
-                                    process_tar_file('dummy_input.tar.gz', 'dummy_output')
-
-                                self.assertEqual(str(cm.exception), 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
-
-    # Powerlog PLSQL file extraction error
+        # Not valid UTF-8
+        exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes(ps_txt_bytes=b'USER PID COMMAND\n\xff\xfe 1 x\n'))
+
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('powerlog_2024-04-16_19-30_1234_'))
+
+    # Powerlog PLSQL file extraction error - the powerlog DB isn't processed, and ps.txt still is
     def test_powerlog_plsql_file_extraction_failure(self):
-        from unittest.mock import patch, MagicMock
-
-        mock_tarfile = MagicMock()
-        mock_tarfile.__enter__.return_value = mock_tarfile
-        mock_tarfile.getnames.return_value = ['ps.txt']
-        mock_tarfile.extractfile.return_value = None
-
-        with patch('tarfile.open', return_value=mock_tarfile):
-            with patch('os.path.getsize', return_value=100):
-                with patch('services.TxtLogService.process_txt_file', return_value='{"txt_log_events": []}'):
-                    with patch('services.TxtLogService.write_txt_results_to_file') as mock_write_txt:
-                        with patch('services.DBLogService.DBLogService.process_sqlite_db_file') as mock_process_sqlite_db:
-                            with patch('services.DBLogService.DBLogService.write_db_results_to_file') as mock_write_db:
-                                with self.assertRaises(SystemExit) as cm:
-                                    process_tar_file('dummy_input.tar.gz', 'dummy_output')
-                                self.assertEqual(cm.exception.code, 'Finished parsing log files from TAR. Successful results saved to JSON files in specified directory.')
-                                mock_write_txt.assert_not_called()
-                                mock_process_sqlite_db.assert_not_called()
-                                mock_write_db.assert_not_called()
-
-    # Handling of exceptions during the processing of the powerlog PLSQL file
+        from unittest.mock import patch
+
+        with patch('services.TarFileService.extract_powerlog_member', return_value=None), \
+             patch('services.TarFileService.process_powerlog_db') as mock_process_powerlog_db:
+            exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes())
+
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        mock_process_powerlog_db.assert_not_called()
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('ps_'))
+
+    # Handling of a powerlog PLSQL file that can't be processed - no powerlog results file is written, and ps.txt still is
     def test_handles_exceptions_during_processing_powerlog_plsql_file(self):
-        from unittest.mock import patch, mock_open, MagicMock
-
-        # Mock the tarfile and its contents
-        mock_tarfile = MagicMock()
-        mock_tarfile.__enter__.return_value = mock_tarfile
-        mock_tarfile.getnames.return_value = ['ps.txt', 'powerlog.PLSQL']
-        mock_tarfile.extractfile.side_effect = [
-            mock_open(read_data=b'header\nrow1\nrow2').return_value,
-            mock_open(read_data=b'sqlite_db_bytes').return_value
-        ]
-
-        with patch('tarfile.open', return_value=mock_tarfile):
-            with patch('os.path.getsize', return_value=100):
-                with patch('services.TxtLogService.process_txt_file', return_value='{"txt_log_events": []}'):
-                    with patch('services.TxtLogService.write_txt_results_to_file') as mock_write_txt:
-                        with self.assertRaises(SystemExit) as cm:
-                            with patch('services.DBLogService.DBLogService.process_sqlite_db_file', side_effect=Exception('Error processing SQLite DB file')):
-                                with patch('services.DBLogService.DBLogService.write_db_results_to_file') as mock_write_db:
-                                    process_tar_file('dummy_input.tar.gz', 'dummy_output')
-
-        # Assert that the write functions were not called due to exception
-        mock_write_txt.assert_not_called()
-        mock_write_db.assert_not_called()
\ No newline at end of file
+        exit_message, result_file_names = self.process_test_archive(build_test_tar_gz_bytes(powerlog_db_bytes=b'sqlite_db_bytes'))
+
+        self.assertEqual(exit_message, FINISHED_EXIT_MESSAGE)
+        self.assertEqual(len(result_file_names), 1)
+        self.assertTrue(result_file_names[0].startswith('ps_'))
+
+
+class TestProcessTarStream(unittest.TestCase):
+    # Both log files are found and written to the output directory from a single streamed pass
+    def test_process_tar_file_writes_both_results(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_tar_file_path = os.path.join(temp_dir, 'input.tar.gz')
+
+            with open(input_tar_file_path, 'wb') as input_tar_file:
+                input_tar_file.write(build_test_tar_gz_bytes())
+
+            output_dir = os.path.join(temp_dir, 'out')
+            os.mkdir(output_dir)
+
+            with self.assertRaises(SystemExit):
+                process_tar_file(input_tar_file_path, output_dir)
+
+            result_file_names = sorted(os.listdir(output_dir))
+
+            self.assertEqual(len(result_file_names), 2)
+            self.assertTrue(result_file_names[0].startswith('powerlog_2024-04-16_19-30_1234_'))
+            self.assertTrue(result_file_names[1].startswith('ps_'))
+
+    # Works on a non-seekable input, and stops reading once every target member has been found
+    def test_process_tar_stream_non_seekable_stops_early(self):
+        import io
+        import os
+        import tarfile
+        import tempfile
+
+        class NonSeekableReader(io.RawIOBase):
+            def __init__(self, data: bytes):
+                self._data = io.BytesIO(data)
+                self.bytes_read = 0
+
+            def readable(self):
+                return True
+
+            def readinto(self, buffer):
+                chunk = self._data.read(len(buffer))
+                buffer[:len(chunk)] = chunk
+                self.bytes_read += len(chunk)
+                return len(chunk)
+
+        tar_gz_bytes = build_test_tar_gz_bytes(os.urandom(4 * 1024 * 1024))
+        reader = NonSeekableReader(tar_gz_bytes)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            from main import process_tar_stream
+
+            with tarfile.open(fileobj=reader, mode='r|gz') as tar_file_obj:
+                process_tar_stream(tar_file_obj, output_dir)
+
+            self.assertEqual(len(os.listdir(output_dir)), 2)
+
+        self.assertLess(reader.bytes_read, len(tar_gz_bytes) // 2)
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Optional, Self
+
+
+class AsyncChunkPipe:
+    # Carries chunks of bytes from a coroutine on the event loop (eg: reading a request body) to a blocking reader
+    # on another thread (eg: tarfile), through a bounded asyncio queue
+    # The writer awaits while the queue is full, so a slow reader holds the writer back without blocking the loop,
+    # and the reader only ever holds a few chunks in memory
+    # The reader side is file-like (read and close), so it can be given to tarfile.open as a fileobj
+    # Must be created on the event loop's thread
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queued_chunks: int):
+        self._loop = loop
+        self._chunk_queue: asyncio.Queue[bytes] = asyncio.Queue(max_queued_chunks)
+        self._buffer: bytes = b''
+        self._buffer_position: int = 0
+        self._is_eof: bool = False
+        # Set once the reader has stopped reading, so the writer doesn't wait on a queue that will never be emptied
+        self._is_closed: bool = False
+
+    @property
+    def closed(self: Self) -> bool:
+        return self._is_closed
+
+    # Writer side, on the event loop
+    async def write(self: Self, chunk: bytes):
+        if chunk and not self._is_closed:
+            await self._chunk_queue.put(chunk)
+
+    # Writer side, on the event loop - must be called once every chunk has been written
+    async def write_eof(self: Self):
+        if not self._is_closed:
+            await self._chunk_queue.put(b'')
+
+    # Writer side, on the event loop - used instead of write_eof when the chunks can't all be written (eg: the
+    # upload was cut off), so the reader is never left waiting, even if the queue is full
+    # Chunks not yet read are dropped, so the reader sees a truncated stream
+    def abort(self: Self):
+        self._discard_queued_chunks()
+        self._chunk_queue.put_nowait(b'')
+
+    # Reader side, on another thread
+    # Returns up to size bytes (or the rest of the current chunk, if size isn't given), or b'' once every chunk has been read
+    def read(self: Self, size: Optional[int] = -1) -> bytes:
+        if self._buffer_position >= len(self._buffer):
+            if self._is_eof or self._is_closed:
+                return b''
+
+            # Waits on the event loop for the next chunk
+            self._buffer = asyncio.run_coroutine_threadsafe(self._chunk_queue.get(), self._loop).result()
+            self._buffer_position = 0
+
+            if not self._buffer:
+                self._is_eof = True
+                return b''
+
+        end_position: int = len(self._buffer) if size is None or size < 0 else self._buffer_position + size
+        chunk: bytes = self._buffer[self._buffer_position:end_position]
+        self._buffer_position += len(chunk)
+
+        return chunk
+
+    # Reader side, on another thread
+    def close(self: Self):
+        if self._is_closed:
+            return
+
+        self._is_closed = True
+        self._buffer = b''
+
+        # Frees a writer that is waiting on a full queue, as nothing will read the queue now
+        self._loop.call_soon_threadsafe(self._discard_queued_chunks)
+
+    def _discard_queued_chunks(self: Self):
+        while not self._chunk_queue.empty():
+            self._chunk_queue.get_nowait()
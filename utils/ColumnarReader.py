@@ -0,0 +1,62 @@
+import json
+import os
+from array import array
+from typing import Any, Dict, List
+
+from consts.OutputFile import COLUMNAR_MANIFEST_FILE_NAME
+from utils.ColumnarWriter import COLUMN_TYPE_DICTIONARY, DICTIONARY_ENCODING_JSON
+
+
+def read_columnar_manifest(directory_path: str) -> Dict[str, Any]:
+    with open(os.path.join(directory_path, COLUMNAR_MANIFEST_FILE_NAME)) as manifest_file:
+        return json.load(manifest_file)
+
+
+def read_columnar_array(directory_path: str, file_name: str, typecode: str) -> array:
+    column_array = array(typecode)
+
+    with open(os.path.join(directory_path, file_name), 'rb') as column_file:
+        column_array.frombytes(column_file.read())
+
+    return column_array
+
+
+# Reference reader for columnar output, which decodes every column back into a list of Python values (None for nulls)
+# Analysis jobs would normally load the typed arrays directly instead (eg: numpy.frombuffer / numpy.fromfile)
+def read_columnar_columns(directory_path: str) -> Dict[str, List[Any]]:
+    manifest: Dict[str, Any] = read_columnar_manifest(directory_path)
+    columns: Dict[str, List[Any]] = {}
+
+    for column in manifest['columns']:
+        column_values: List[Any] = read_columnar_array(directory_path, column['values'], column['typecode']).tolist()
+
+        if column['type'] == COLUMN_TYPE_DICTIONARY:
+            dictionary = column['dictionary']
+            dictionary_offsets: List[int] = read_columnar_array(directory_path, dictionary['offsets'], dictionary['offset_typecode']).tolist()
+
+            with open(os.path.join(directory_path, dictionary['data']), 'rb') as dictionary_data_file:
+                dictionary_data: bytes = dictionary_data_file.read()
+
+            dictionary_values: List[Any] = [
+                dictionary_data[dictionary_offsets[code]:dictionary_offsets[code + 1]].decode('utf-8')
+                for code in range(dictionary['size'])
+            ]
+
+            # Dictionaries holding values other than strings store each value as JSON, so it keeps its type
+            if dictionary.get('encoding') == DICTIONARY_ENCODING_JSON:
+                dictionary_values = [json.loads(dictionary_value) for dictionary_value in dictionary_values]
+
+            column_values = [dictionary_values[code] if code >= 0 else None for code in column_values]
+
+        if column['validity']:
+            with open(os.path.join(directory_path, column['validity']), 'rb') as validity_file:
+                validity_bitmap: bytes = validity_file.read()
+
+            column_values = [
+                value if validity_bitmap[row_index >> 3] >> (row_index & 7) & 1 else None
+                for row_index, value in enumerate(column_values)
+            ]
+
+        columns[column['name']] = column_values
+
+    return columns
@@ -0,0 +1,322 @@
+import json
+import os
+import re
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Self, Sequence, Tuple, Union, get_args
+
+from consts.OutputFile import COLUMNAR_FORMAT_VERSION, COLUMNAR_MANIFEST_FILE_NAME, OUTPUT_FORMAT_COLUMNAR
+
+# Column types, and the array typecode each column's values are stored with
+COLUMN_TYPE_INT64: str = 'int64'
+COLUMN_TYPE_FLOAT64: str = 'float64'
+COLUMN_TYPE_DICTIONARY: str = 'dictionary'
+
+# Dictionary codes are stored as int32 - the index of each value in the column's dictionary, or -1 for null
+DICTIONARY_CODE_TYPECODE: str = 'i'
+DICTIONARY_OFFSET_TYPECODE: str = 'q'
+
+# Dictionary values are stored as UTF-8 text when they are all strings, or else each as JSON, so numbers keep their types
+DICTIONARY_ENCODING_UTF8: str = 'utf-8'
+DICTIONARY_ENCODING_JSON: str = 'json'
+
+# Value classes each numeric column type holds - int values are stored as floats in float64 columns
+NUMERIC_COLUMN_VALUE_CLASSES: Dict[str, Tuple[type, ...]] = {
+    COLUMN_TYPE_INT64: (int, bool), 
+    COLUMN_TYPE_FLOAT64: (float, int, bool), 
+}
+
+# Column file names are built from the column index plus the column name with anything other than these characters
+# replaced, since column names (eg: from powerlog table exports) can hold path separators or other unsafe characters
+# The original name is kept in the manifest
+COLUMN_FILE_NAME_UNSAFE_CHARACTERS_REGEX: str = r'[^A-Za-z0-9_-]'
+COLUMN_FILE_NAME_MAX_NAME_LENGTH: int = 64
+
+# Largest integer a float64 holds exactly, so int64 columns with values past it aren't turned into float64 columns
+MAX_EXACT_FLOAT64_INT: int = 2 ** 53
+
+
+# Unwraps Optional[x] (and other unions) to the first non-None type
+def get_column_value_type(field_type: Any) -> Any:
+    for field_type_arg in get_args(field_type):
+        if field_type_arg is not type(None):
+            return field_type_arg
+
+    return field_type
+
+
+# eg: column 3 named "../RSS (KB)" has files named "3____RSS__KB_.values.bin" etc
+# The index keeps the file names unique, even when two names are the same once sanitised (or truncated)
+def build_column_file_prefix(column_index: int, column_name: str) -> str:
+    return str(column_index) + '_' + re.sub(COLUMN_FILE_NAME_UNSAFE_CHARACTERS_REGEX, '_', column_name)[:COLUMN_FILE_NAME_MAX_NAME_LENGTH]
+
+
+# Packs a validity mask (one byte per value, 1 = present) into a bitmap with one bit per value, least significant
+# bit first (the same layout Apache Arrow uses), so it can be read with numpy.unpackbits(..., bitorder='little')
+def pack_validity_bitmap(validity_mask: bytearray) -> bytes:
+    if not validity_mask:
+        return b''
+
+    # Each value becomes one binary digit, and reversing puts the first value in the lowest bit
+    validity_bits: str = validity_mask.translate(bytes.maketrans(b'\x00\x01', b'01')).decode('ascii')[::-1]
+
+    return int(validity_bits, 2).to_bytes((len(validity_mask) + 7) // 8, 'little')
+
+
+# Numeric column, stored as one contiguous typed array
+class NumericColumn:
+    def __init__(self, name: str, column_type: str):
+        self.name = name
+        self.column_type = column_type
+        self.values = array('q' if column_type == COLUMN_TYPE_INT64 else 'd')
+        self.value_classes = NUMERIC_COLUMN_VALUE_CLASSES[column_type]
+        self.validity_mask = bytearray()
+        self.null_count = 0
+
+    # Returns False, without appending, if the column can't hold the value (see widen_column)
+    # SQLite columns are dynamically typed, so eg: an INTEGER column can still hold a REAL or TEXT value
+    def append(self, value: Any) -> bool:
+        if value is None:
+            # Nulls are stored as 0, and marked in the validity bitmap
+            self.values.append(0)
+            self.validity_mask.append(0)
+            self.null_count += 1
+            return True
+
+        if value.__class__ not in self.value_classes:
+            return False
+
+        try:
+            self.values.append(value)
+        except OverflowError:
+            # eg: an int past the int64 range
+            return False
+
+        self.validity_mask.append(1)
+        return True
+
+    # Returns the column's values, with None for nulls
+    def get_values(self: Self) -> List[Any]:
+        return [value if is_valid else None for value, is_valid in zip(self.values, self.validity_mask)]
+
+    def write(self, directory_path: str, file_prefix: str) -> Dict[str, Any]:
+        values_file_name: str = file_prefix + '.values.bin'
+
+        with open(os.path.join(directory_path, values_file_name), 'wb') as values_file:
+            self.values.tofile(values_file)
+
+        return {
+            'name': self.name, 
+            'type': self.column_type, 
+            'typecode': self.values.typecode, 
+            'item_size': self.values.itemsize, 
+            'values': values_file_name, 
+            'validity': write_validity_bitmap(directory_path, file_prefix, self.validity_mask, self.null_count), 
+            'null_count': self.null_count
+        }
+
+
+# String (or other non-numeric) column, stored as an int32 code per value and a dictionary of the distinct values
+class DictionaryColumn:
+    def __init__(self, name: str):
+        self.name = name
+        self.column_type = COLUMN_TYPE_DICTIONARY
+        self.codes = array(DICTIONARY_CODE_TYPECODE)
+        # Strings are keyed by themselves, and other values by (class, value), since eg: 1, 1.0 and True are equal keys
+        self.dictionary: Dict[Any, int] = {}
+        self.dictionary_values: List[Any] = []
+        self.has_non_str_values = False
+        self.validity_mask = bytearray()
+        self.null_count = 0
+
+    # Dictionary columns hold values of any type, so always append the value
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.codes.append(-1)
+            self.validity_mask.append(0)
+            self.null_count += 1
+            return True
+
+        if value.__class__ is str:
+            dictionary_key: Any = value
+        else:
+            dictionary_key = (value.__class__, value)
+            self.has_non_str_values = True
+
+        code: Optional[int] = self.dictionary.get(dictionary_key)
+
+        if code is None:
+            code = len(self.dictionary)
+            self.dictionary[dictionary_key] = code
+            self.dictionary_values.append(value)
+
+        self.codes.append(code)
+        self.validity_mask.append(1)
+        return True
+
+    def write(self, directory_path: str, file_prefix: str) -> Dict[str, Any]:
+        codes_file_name: str = file_prefix + '.codes.bin'
+        dictionary_data_file_name: str = file_prefix + '.dictionary.bin'
+        dictionary_offsets_file_name: str = file_prefix + '.dictionary_offsets.bin'
+
+        with open(os.path.join(directory_path, codes_file_name), 'wb') as codes_file:
+            self.codes.tofile(codes_file)
+
+        # Dictionary values are concatenated as UTF-8, with the start offset of each value (plus the end offset)
+        # in a separate array, so value n is data[offsets[n]:offsets[n + 1]]
+        dictionary_offsets = array(DICTIONARY_OFFSET_TYPECODE, [0])
+        dictionary_data_size: int = 0
+        dictionary_encoding: str = DICTIONARY_ENCODING_JSON if self.has_non_str_values else DICTIONARY_ENCODING_UTF8
+
+        with open(os.path.join(directory_path, dictionary_data_file_name), 'wb') as dictionary_data_file:
+            # Values are in code order
+            for dictionary_value in self.dictionary_values:
+                dictionary_value_bytes: bytes = (
+                    json.dumps(dictionary_value, default=str) if self.has_non_str_values else dictionary_value
+                ).encode('utf-8')
+                dictionary_data_file.write(dictionary_value_bytes)
+                dictionary_data_size += len(dictionary_value_bytes)
+                dictionary_offsets.append(dictionary_data_size)
+
+        with open(os.path.join(directory_path, dictionary_offsets_file_name), 'wb') as dictionary_offsets_file:
+            dictionary_offsets.tofile(dictionary_offsets_file)
+
+        return {
+            'name': self.name, 
+            'type': self.column_type, 
+            'typecode': self.codes.typecode, 
+            'item_size': self.codes.itemsize, 
+            'values': codes_file_name, 
+            'validity': write_validity_bitmap(directory_path, file_prefix, self.validity_mask, self.null_count), 
+            'null_count': self.null_count, 
+            'dictionary': {
+                'size': len(self.dictionary), 
+                'encoding': dictionary_encoding, 
+                'data': dictionary_data_file_name, 
+                'offsets': dictionary_offsets_file_name, 
+                'offset_typecode': dictionary_offsets.typecode, 
+                'offset_item_size': dictionary_offsets.itemsize
+            }
+        }
+
+
+ColumnarColumn = Union[NumericColumn, DictionaryColumn]
+
+
+# Columns without nulls don't need a bitmap, so none is written
+def write_validity_bitmap(directory_path: str, file_prefix: str, validity_mask: bytearray, null_count: int) -> Optional[str]:
+    if not null_count:
+        return None
+
+    validity_file_name: str = file_prefix + '.validity.bin'
+
+    with open(os.path.join(directory_path, validity_file_name), 'wb') as validity_file:
+        validity_file.write(pack_validity_bitmap(validity_mask))
+
+    return validity_file_name
+
+
+# Returns a copy of the column that can also hold the value it couldn't append, with the value appended
+# int64 columns become float64 columns for a float value (as long as every int so far is exactly representable),
+# and anything else becomes a dictionary column, which keeps each value's own type
+def widen_column(column: ColumnarColumn, value: Any) -> ColumnarColumn:
+    if (
+        column.column_type == COLUMN_TYPE_INT64 and 
+        value.__class__ is float and 
+        all(-MAX_EXACT_FLOAT64_INT <= int_value <= MAX_EXACT_FLOAT64_INT for int_value in column.values) # type: ignore
+    ):
+        widened_column: ColumnarColumn = NumericColumn(column.name, COLUMN_TYPE_FLOAT64)
+        widened_column.values.fromlist([float(int_value) for int_value in column.values]) # type: ignore
+        widened_column.validity_mask = column.validity_mask
+        widened_column.null_count = column.null_count
+    else:
+        widened_column = DictionaryColumn(column.name)
+
+        for column_value in column.get_values(): # type: ignore
+            widened_column.append(column_value)
+
+    widened_column.append(value)
+
+    return widened_column
+
+
+def create_column(field_name: str, field_type: Any) -> ColumnarColumn:
+    column_value_type: Any = get_column_value_type(field_type)
+
+    if column_value_type is int:
+        return NumericColumn(field_name, COLUMN_TYPE_INT64)
+
+    if column_value_type is float:
+        return NumericColumn(field_name, COLUMN_TYPE_FLOAT64)
+
+    return DictionaryColumn(field_name)
+
+
+class ColumnarWriter:
+    # Writes rows to a directory of binary column files plus a JSON manifest describing them, so readers can load
+    # each column with memoryview / array.frombytes / numpy.frombuffer instead of parsing JSON text
+    # Column types come from the declared field types: int fields are int64 arrays, float fields are float64 arrays,
+    # and everything else is dictionary encoded
+    # A numeric column is widened (see widen_column) when it gets a value of another type, since SQLite doesn't
+    # enforce declared column types
+    # Columns are built up in memory as compact typed arrays, and written to disk when the writer is closed
+    def __init__(self, directory_path: str, field_names: Sequence[str], field_types: Sequence[Any]):
+        self._directory_path = directory_path
+        self._columns: List[ColumnarColumn] = [
+            create_column(field_name, field_type) for field_name, field_type in zip(field_names, field_types)
+        ]
+        self._is_open = False
+        self._item_count = 0
+
+    # Define context managers
+    # These manage the lifecycle when used in "with" statements
+    def __enter__(self: Self):
+        os.makedirs(self._directory_path)
+        self._is_open = True
+        return self
+
+    # Automatically write the columns and manifest on exit
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def file_name(self):
+        return self._directory_path
+
+    @property
+    def item_count(self):
+        return self._item_count
+
+    # Appends a row of values, in field order, to each column
+    def write_row(self, row: Tuple[Any, ...]):
+        if not self._is_open:
+            raise ValueError('ColumnarWriter - directory is not open')
+
+        columns: List[ColumnarColumn] = self._columns
+
+        for column_index, value in enumerate(row):
+            if not columns[column_index].append(value):
+                columns[column_index] = widen_column(columns[column_index], value)
+
+        self._item_count += 1
+
+    def close(self):
+        if not self._is_open:
+            return
+
+        self._is_open = False
+
+        manifest: Dict[str, Any] = {
+            'format': OUTPUT_FORMAT_COLUMNAR, 
+            'version': COLUMNAR_FORMAT_VERSION, 
+            # Arrays are written in the machine's native byte order
+            'byte_order': sys.byteorder, 
+            'row_count': self._item_count, 
+            'columns': [
+                column.write(self._directory_path, build_column_file_prefix(column_index, column.name))
+                for column_index, column in enumerate(self._columns)
+            ]
+        }
+
+        with open(os.path.join(self._directory_path, COLUMNAR_MANIFEST_FILE_NAME), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
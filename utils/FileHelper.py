@@ -1,5 +1,18 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
 import re
-from typing import List, Optional
+import shutil
+import tempfile
+from typing import IO, Any, List, Optional
+
+from consts.FileProcessing import SYSDIAGNOSE_ARCHIVE_NAME_PATTERN
+from consts.OutputFile import GZIP_COMPRESS_LEVEL, GZIP_OUTPUT_FILE_EXTENSION, OUTPUT_FILE_EXTENSIONS, OUTPUT_FORMAT_COLUMNAR, OUTPUT_FORMAT_JSON
+from models.ArchiveIdentifiers import ArchiveIdentifiers
+from models.PowerlogTableExport import PowerlogTableExport
+from utils.TimeHelper import get_current_timestamp_utc
 
 def find_file_path(pathList: List[str], fileNameRegExp: str) -> Optional[str] :
     # All file paths that match the given file name regular expression    
@@ -13,7 +26,142 @@ def find_file_path(pathList: List[str], fileNameRegExp: str) -> Optional[str] :
         return fileMatches[0]
 
 
-def write_to_json_file(json_string: str, file_name: str): 
+def is_file_path_match(path: str, fileNameRegExp: str) -> bool:
+    # Used when scanning a stream of paths one at a time, rather than a complete list
+    return re.search(fileNameRegExp, path, re.IGNORECASE) is not None
+
+
+def find_tar_file_paths(input_directory_path: str, fileNameGlob: str) -> List[str]:
+    # Sorted, so batch runs always process archives in the same order
+    return sorted(
+        path for path in glob.glob(os.path.join(input_directory_path, fileNameGlob))
+        if os.path.isfile(path)
+    )
+
+
+def get_archive_name(archive_path: str) -> str:
+    # eg: input/sysdiagnose_2024.04.16.tar.gz becomes sysdiagnose_2024.04.16
+    archive_name: str = os.path.basename(archive_path)
+
+    for archive_extension in ('.tar.gz', '.tgz', '.tar'):
+        if archive_name.lower().endswith(archive_extension):
+            return archive_name[:-len(archive_extension)]
+
+    return archive_name
+
+
+# eg: sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236.tar.gz has a device model of iPhone and OS build 21E236
+def get_archive_identifiers(archive_path: str) -> ArchiveIdentifiers:
+    archive_name: str = get_archive_name(archive_path)
+    archive_name_match: Optional[re.Match] = re.match(SYSDIAGNOSE_ARCHIVE_NAME_PATTERN, archive_name)
+
+    if not archive_name_match:
+        return ArchiveIdentifiers(archive_name)
+
+    return ArchiveIdentifiers(archive_name, **archive_name_match.groupdict())
+
+
+# Copies a (possibly non-seekable) file object to a temporary file in bounded chunks, and returns its path
+# The caller is responsible for removing the temporary file
+def spool_file_to_temp_file(source_file: IO[bytes], chunk_size: int, suffix: str = '') -> str:
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        try:
+            shutil.copyfileobj(source_file, temp_file, chunk_size)
+        except Exception:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+
+        return temp_file.name
+
+
+# SHA-256 of a file's contents, read in bounded chunks
+def hash_file(file_path: str, chunk_size: int) -> str:
+    file_hash = hashlib.sha256()
+
+    with open(file_path, 'rb') as hashed_file:
+        for file_chunk in iter(lambda: hashed_file.read(chunk_size), b''):
+            file_hash.update(file_chunk)
+
+    return file_hash.hexdigest()
+
+
+# Copies a results file (or columnar results directory) to the destination path
+# Files are copied rather than hard linked, so editing a results file can never change the cached copy it came from
+# An existing file at the destination (eg: from processing the same archive into the same directory before) is
+# replaced atomically, by copying to a temporary file next to it and renaming that over it, and is left alone if it
+# already is the source file
+def copy_result_file(source_path: str, destination_path: str):
+    if os.path.isdir(source_path):
+        os.makedirs(destination_path, exist_ok=True)
+
+        for file_name in os.listdir(source_path):
+            copy_result_file(os.path.join(source_path, file_name), os.path.join(destination_path, file_name))
+
+        return
+
+    if os.path.exists(destination_path) and os.path.samefile(source_path, destination_path):
+        return
+
+    temp_file_descriptor, temp_file_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(destination_path) + '.', 
+        dir=os.path.dirname(destination_path) or '.'
+    )
+
+    try:
+        with os.fdopen(temp_file_descriptor, 'wb') as temp_file, open(source_path, 'rb') as source_file:
+            shutil.copyfileobj(source_file, temp_file)
+
+        shutil.copystat(source_path, temp_file_path)
+        os.replace(temp_file_path, destination_path)
+    except Exception:
+        os.remove(temp_file_path)
+        raise
+
+
+# Builds a results file name (with the current timestamp appended to make it unique)
+# eg: output/ps_2024-04-16T19-30-52-123.ndjson.gz
+def build_result_file_name(
+    result_output_path: str, 
+    file_name: str, 
+    output_format: str = OUTPUT_FORMAT_JSON, 
+    compress: bool = False
+) -> str:
+    return (
+        result_output_path + '/' + file_name + 
+        '_' + get_current_timestamp_utc() + OUTPUT_FILE_EXTENSIONS[output_format] + 
+        (GZIP_OUTPUT_FILE_EXTENSION if compress and output_format != OUTPUT_FORMAT_COLUMNAR else '')
+    )
+
+
+# Removes a results file, or a results directory (for columnar output), if it exists
+def remove_result_file(resulting_file_name: str):
+    if os.path.isdir(resulting_file_name):
+        shutil.rmtree(resulting_file_name)
+    elif os.path.exists(resulting_file_name):
+        os.remove(resulting_file_name)
+
+
+def write_to_json_file(json_string: str, file_name: str, compress: bool = False): 
+    if compress:
+        with gzip.open(file_name, 'wt', compresslevel=GZIP_COMPRESS_LEVEL, encoding='utf-8') as json_file:
+            json_file.write(json_string)
+
+        return
+
     with open(file_name, 'w') as json_file:
         json_file.write(json_string)
-        json_file.close()
\ No newline at end of file
+        json_file.close()
+
+
+# Reads the powerlog tables to export from a JSON file, which holds a list of table names
+# and/or {"table": ..., "query": ...} objects (the query is optional)
+def read_powerlog_table_exports_file(file_path: str) -> List[PowerlogTableExport]:
+    with open(file_path) as table_exports_file:
+        table_export_items: List[Any] = json.load(table_exports_file)
+
+    return [
+        PowerlogTableExport(table_export_item) if isinstance(table_export_item, str)
+        else PowerlogTableExport(table_export_item['table'], table_export_item.get('query'))
+        for table_export_item in table_export_items
+    ]
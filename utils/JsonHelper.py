@@ -1,44 +1,136 @@
-import dataclasses
 import json
-from typing import Any, List, Optional
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from models.DBLogEvent import DBLogEvent
-from models.TxtLogEvent import TxtLogEvent
+from consts.OutputFile import OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_JSON_MINIFIED, OUTPUT_FORMAT_NDJSON
+from models.JsonOutputLayout import JsonOutputLayout
 
-def serialise_process_events(process_events: List[DBLogEvent]) -> Optional[List[dict[str, DBLogEvent]]]:
-    process_events_serialisable: List[dict[str, DBLogEvent]] = []
-    
+def convert_object_to_json_string(object: Any, indent: int) -> Optional[str]:
     try:
-        if process_events:
-            process_events_serialisable = (
-                [dataclasses.asdict(process_event) for process_event in process_events]
-            )
-
-        return process_events_serialisable
-    except Exception as serialise_process_events_error:
-        print('Error serialising process events object: ', serialise_process_events_error)
+        return json.dumps(object, indent=indent)
+    except Exception as json_dumps_error:
+        print('Error converting object to JSON string: ', json_dumps_error)
         return None
-    
 
 
-def serialise_process_log_items(process_log_items: List[TxtLogEvent]) -> Optional[List[dict[str, TxtLogEvent]]]:
-    process_log_items_serialisable: List[dict[str, TxtLogEvent]] = []
-    
-    try:
-        if process_log_items:
-            process_log_items_serialisable = (
-                [dataclasses.asdict(process_log_item) for process_log_item in process_log_items]
-            )
-        
-        return process_log_items_serialisable
-    except Exception as serialise_process_log_items_error:
-        print('Error serialising process log items object: ', serialise_process_log_items_error)
-        return None
+# Encodes a float the same way json.dumps does (including NaN and Infinity)
+def _encode_json_float(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == float('-inf'):
+        return '-Infinity'
+    return float.__repr__(value)
 
 
-def convert_object_to_json_string(object: Any, indent: int) -> Optional[str]:
+# Scalar value encoders, looked up by exact type to avoid a chain of isinstance checks per value
+_JSON_VALUE_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_json_float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+}
+
+
+def _encode_json_value(value: Any) -> str:
+    value_encoder = _JSON_VALUE_ENCODERS.get(type(value))
+
+    if value_encoder is None:
+        return json.dumps(value)
+
+    return value_encoder(value)
+
+
+# Layout of each output format, for a list of objects
+JSON_OUTPUT_LAYOUTS: Dict[str, JsonOutputLayout] = {
+    # Same as json.dumps(list_of_objects, indent=2)
+    OUTPUT_FORMAT_JSON: JsonOutputLayout('[', '\n  ', ',\n  ', '\n]', ']', 2, (',', ': ')),
+    # Same as json.dumps(list_of_objects, separators=(',', ':'))
+    OUTPUT_FORMAT_JSON_MINIFIED: JsonOutputLayout('[', '', ',', ']', ']', None, (',', ':')),
+    # One minified object per line
+    OUTPUT_FORMAT_NDJSON: JsonOutputLayout('', '', '\n', '\n', '', None, (',', ':')),
+}
+
+
+def get_json_output_layout(output_format: str) -> JsonOutputLayout:
+    if output_format not in JSON_OUTPUT_LAYOUTS:
+        raise ValueError('Unsupported output format: ' + str(output_format))
+
+    return JSON_OUTPUT_LAYOUTS[output_format]
+
+
+# Builds a function that turns a tuple of row values straight into the JSON text of an object,
+# with the given field names as keys, without building an intermediate dict per row
+# Output is identical to json.dumps(dict(zip(field_names, row)), indent=indent, separators=separators) for a row
+# nested indent_level levels deep (eg: indent_level=1 for an object inside a top-level array)
+def make_json_row_encoder(
+    field_names: Sequence[str], 
+    indent: Optional[int] = 2, 
+    indent_level: int = 0, 
+    separators: Optional[Tuple[str, str]] = None
+) -> Callable[[Tuple[Any, ...]], str]:
+    # Same defaults as json.dumps
+    item_separator, key_separator = separators or ((', ', ': ') if indent is None else (',', ': '))
+
+    if indent is None:
+        field_prefixes: List[str] = [
+            ('{' if field_index == 0 else item_separator) + encode_basestring_ascii(field_name) + key_separator
+            for field_index, field_name in enumerate(field_names)
+        ]
+        object_suffix: str = '}'
+    else:
+        field_indent: str = '\n' + ' ' * (indent * (indent_level + 1))
+        field_prefixes = [
+            ('{' if field_index == 0 else item_separator) + field_indent + encode_basestring_ascii(field_name) + key_separator
+            for field_index, field_name in enumerate(field_names)
+        ]
+        object_suffix = '\n' + ' ' * (indent * indent_level) + '}'
+
+    if not field_prefixes:
+        return lambda row: '{}'
+
+    value_encoders: Dict[type, Callable[[Any], str]] = _JSON_VALUE_ENCODERS
+
+    def encode_json_row(row: Tuple[Any, ...]) -> str:
+        return ''.join([
+            field_prefix + (value_encoders.get(type(value)) or _encode_json_value)(value)
+            for field_prefix, value in zip(field_prefixes, row)
+        ]) + object_suffix
+
+    return encode_json_row
+
+
+# Row encoder for objects written as list items in the given output format
+def make_json_output_row_encoder(field_names: Sequence[str], output_format: str = OUTPUT_FORMAT_JSON) -> Callable[[Tuple[Any, ...]], str]:
+    json_output_layout: JsonOutputLayout = get_json_output_layout(output_format)
+
+    return make_json_row_encoder(field_names, json_output_layout.indent, 1, json_output_layout.separators)
+
+
+# Encodes rows as JSON objects, joined with the separator used between list items in the given output format
+# (without the opening and closing of the list), so blocks of rows can be encoded separately and written out in order
+def encode_json_rows(rows: Sequence[Tuple[Any, ...]], field_names: Sequence[str], output_format: str = OUTPUT_FORMAT_JSON) -> str:
+    encode_json_row = make_json_output_row_encoder(field_names, output_format)
+
+    return get_json_output_layout(output_format).item_separator.join([encode_json_row(row) for row in rows])
+
+
+# In-memory equivalent of JsonStreamWriter.write_row, for a whole list of row value tuples
+# For the default format, output is identical to json.dumps([dict(zip(field_names, row)) for row in rows], indent=2)
+def convert_rows_to_json_string(rows: Sequence[Tuple[Any, ...]], field_names: Sequence[str], output_format: str = OUTPUT_FORMAT_JSON) -> Optional[str]:
     try:
-        return json.dumps(object, indent=indent)
-    except Exception as json_dumps_error:
-        print('Error converting object to JSON string: ', json_dumps_error)
-        return None
\ No newline at end of file
+        json_output_layout: JsonOutputLayout = get_json_output_layout(output_format)
+
+        if not rows:
+            return json_output_layout.opening + json_output_layout.empty_closing
+
+        return (
+            json_output_layout.opening + json_output_layout.first_item_prefix + 
+            encode_json_rows(rows, field_names, output_format) + 
+            json_output_layout.closing
+        )
+    except Exception as convert_rows_error:
+        print('Error converting rows to JSON string: ', convert_rows_error)
+        return None
@@ -0,0 +1,102 @@
+import gzip
+import json
+from typing import IO, Any, Optional, Self, Sequence, Tuple
+
+from consts.OutputFile import GZIP_COMPRESS_LEVEL, OUTPUT_FORMAT_JSON
+from models.JsonOutputLayout import JsonOutputLayout
+from utils.JsonHelper import get_json_output_layout, make_json_output_row_encoder
+
+# Buffer size used for the output file, so rows are flushed to disk in large blocks
+JSON_STREAM_WRITER_BUFFER_SIZE_BYTES: int = 1024 * 1024
+
+
+class JsonStreamWriter:
+    # Writes a list of JSON objects to a file one element at a time, so the whole list never has to be held in memory
+    # For the default format, output is identical to json.dumps(list_of_items, indent=2)
+    # If field_names are given, rows can also be written as plain value tuples with write_row (the fast path)
+    # If compress is set, the output is written through gzip
+    def __init__(
+        self, 
+        file_name: str, 
+        field_names: Optional[Sequence[str]] = None, 
+        output_format: str = OUTPUT_FORMAT_JSON, 
+        compress: bool = False
+    ):
+        self._file_name = file_name
+        self._compress = compress
+        self._layout: JsonOutputLayout = get_json_output_layout(output_format)
+        self._encoder = json.JSONEncoder(indent=self._layout.indent, separators=self._layout.separators)
+        self._row_encoder = make_json_output_row_encoder(field_names, output_format) if field_names is not None else None
+        # Nested lines of an item are indented one level inside the list
+        self._item_line_indent = '\n' + (' ' * self._layout.indent) if self._layout.indent else '\n'
+        self._file: Optional[IO[str]] = None
+        self._item_count = 0
+
+    # Define context managers
+    # These manage the lifecycle when used in "with" statements
+    def __enter__(self: Self):
+        if self._compress:
+            self._file = gzip.open(self._file_name, 'wt', compresslevel=GZIP_COMPRESS_LEVEL, encoding='utf-8')
+        else:
+            self._file = open(self._file_name, 'w', buffering=JSON_STREAM_WRITER_BUFFER_SIZE_BYTES)
+
+        self._file.write(self._layout.opening)
+        return self
+
+    # Automatically close the list and file on exit
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    @property
+    def item_count(self):
+        return self._item_count
+
+    def _get_item_prefix(self) -> str:
+        return self._layout.first_item_prefix if self._item_count == 0 else self._layout.item_separator
+
+    def write_item(self, item: Any):
+        if self._file is None:
+            raise ValueError('JsonStreamWriter - file is not open')
+
+        item_json: str = self._encoder.encode(item)
+
+        if self._layout.indent:
+            item_json = item_json.replace('\n', self._item_line_indent)
+
+        self._file.write(self._get_item_prefix() + item_json)
+        self._item_count += 1
+
+    # Writes a row of values as a JSON object keyed by the writer's field names, without building a dict
+    def write_row(self, row: Tuple[Any, ...]):
+        if self._file is None:
+            raise ValueError('JsonStreamWriter - file is not open')
+
+        if self._row_encoder is None:
+            raise ValueError('JsonStreamWriter - field_names are required to write rows')
+
+        self._file.write(self._get_item_prefix() + self._row_encoder(row))
+        self._item_count += 1
+
+    # Writes a block of rows that were already encoded with encode_json_rows (using the same output format)
+    def write_encoded_rows(self, encoded_rows: str, row_count: int):
+        if self._file is None:
+            raise ValueError('JsonStreamWriter - file is not open')
+
+        if not row_count:
+            return
+
+        self._file.write(self._get_item_prefix() + encoded_rows)
+        self._item_count += row_count
+
+    def close(self):
+        if self._file is None:
+            return
+
+        # json.dumps writes an empty list as "[]", and a non-empty list with the closing bracket on its own line
+        self._file.write(self._layout.closing if self._item_count else self._layout.empty_closing)
+        self._file.close()
+        self._file = None
@@ -0,0 +1,187 @@
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Self, Tuple
+
+from models.StageMetrics import StageMetrics
+from utils.ProfileHelper import record_allocation_sites
+from utils.TimeHelper import call_and_measure_seconds
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak RSS isn't measured
+    resource = None
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+
+    peak_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports KiB, and macOS reports bytes
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def get_rate_per_second(count: Optional[int], seconds: float) -> Optional[float]:
+    if count is None or seconds <= 0:
+        return None
+
+    return round(count / seconds, 1)
+
+
+class MetricsRecorder:
+    # Collects the metrics of every stage measured while it is active (see start_metrics_recording)
+    # Stages can be measured from several threads at once (eg: ps.txt and the powerlog DB)
+    def __init__(self, trace_memory: bool = False):
+        self._trace_memory = trace_memory
+        self._stages: List[StageMetrics] = []
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self._started_tracemalloc = False
+
+    @property
+    def trace_memory(self: Self):
+        return self._trace_memory
+
+    @property
+    def stages(self: Self):
+        return self._stages
+
+    def start(self: Self):
+        self._start_time = time.perf_counter()
+
+        # tracemalloc slows down allocation-heavy code several times over, so it is only used when asked for
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self: Self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def add_stage(self: Self, stage_metrics: StageMetrics):
+        with self._lock:
+            self._stages.append(stage_metrics)
+
+    # Machine-readable summary, with throughput worked out for each stage
+    def to_dict(self: Self) -> Dict[str, Any]:
+        stages: List[Dict[str, Any]] = []
+
+        for stage_metrics in self.stages:
+            stage: Dict[str, Any] = asdict(stage_metrics)
+            stage['rows_per_second'] = get_rate_per_second(stage_metrics.row_count, stage_metrics.wall_seconds)
+            stage['bytes_per_second'] = get_rate_per_second(stage_metrics.byte_count, stage_metrics.wall_seconds)
+            stages.append(stage)
+
+        traced_memory_peaks: List[int] = [
+            stage_metrics.peak_traced_memory_bytes for stage_metrics in self.stages
+            if stage_metrics.peak_traced_memory_bytes is not None
+        ]
+
+        return {
+            'total_wall_seconds': round(time.perf_counter() - self._start_time, 6),
+            'peak_rss_bytes': get_peak_rss_bytes(),
+            'peak_traced_memory_bytes': max(traced_memory_peaks) if traced_memory_peaks else None,
+            'stages': stages,
+        }
+
+
+# Recorder for the archive currently being processed in this process
+# Set for the length of one archive, so stage measurements don't have to be passed through every function
+_active_metrics_recorder: Optional[MetricsRecorder] = None
+
+
+def start_metrics_recording(trace_memory: bool = False) -> MetricsRecorder:
+    global _active_metrics_recorder
+
+    _active_metrics_recorder = MetricsRecorder(trace_memory)
+    _active_metrics_recorder.start()
+
+    return _active_metrics_recorder
+
+
+def stop_metrics_recording() -> Optional[Dict[str, Any]]:
+    global _active_metrics_recorder
+
+    metrics_recorder: Optional[MetricsRecorder] = _active_metrics_recorder
+    _active_metrics_recorder = None
+
+    if metrics_recorder is None:
+        return None
+
+    metrics: Dict[str, Any] = metrics_recorder.to_dict()
+    metrics_recorder.stop()
+
+    return metrics
+
+
+# Measures the wall time, CPU time and memory use of the code in the "with" block, as one stage
+# Row and byte counts can be given up front, or set on the yielded StageMetrics once they are known
+# Does nothing (beyond yielding a StageMetrics) when metrics aren't being recorded
+# Allocation sites are also recorded at the end of the stage, if allocations are being profiled (see utils/ProfileHelper.py)
+# tracemalloc's peak is shared by the whole process and reset as each stage starts, so the peaks of overlapping
+# stages (nested, or running on other threads) are only approximate
+@contextmanager
+def measure_stage(stage_name: str, row_count: Optional[int] = None, byte_count: Optional[int] = None) -> Iterator[StageMetrics]:
+    stage_metrics: StageMetrics = StageMetrics(stage_name, row_count=row_count, byte_count=byte_count)
+    metrics_recorder: Optional[MetricsRecorder] = _active_metrics_recorder
+
+    if metrics_recorder is None:
+        yield stage_metrics
+        record_allocation_sites(stage_name)
+        return
+
+    is_tracing_memory: bool = tracemalloc.is_tracing()
+
+    if is_tracing_memory:
+        tracemalloc.reset_peak()
+
+    start_wall_time: float = time.perf_counter()
+    start_cpu_time: float = time.thread_time()
+
+    try:
+        yield stage_metrics
+    finally:
+        stage_metrics.wall_seconds = round(time.perf_counter() - start_wall_time, 6)
+        stage_metrics.cpu_seconds = round(time.thread_time() - start_cpu_time, 6)
+
+        if is_tracing_memory and tracemalloc.is_tracing():
+            stage_metrics.peak_traced_memory_bytes = tracemalloc.get_traced_memory()[1]
+
+        stage_metrics.peak_rss_bytes = get_peak_rss_bytes()
+
+        metrics_recorder.add_stage(stage_metrics)
+
+    # Taken after the stage has been measured, so the time taken by the snapshot isn't counted in the stage
+    record_allocation_sites(stage_name)
+
+
+# Same as call_and_measure_seconds, but also measures the call as one stage
+# The function's result is used as the stage's row count, when it returns one
+def call_and_measure_stage(stage_name: str, function: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    with measure_stage(stage_name) as stage_metrics:
+        result, seconds = call_and_measure_seconds(function, *args)
+
+        if isinstance(result, int):
+            stage_metrics.row_count = result
+
+    return result, seconds
+
+
+def write_metrics_file(metrics: Any, file_name: str):
+    with open(file_name, 'w') as metrics_file:
+        json.dump(metrics, metrics_file, indent=2)
+
+
+# Appends the metrics as one line of JSON, for processes that keep adding archives (eg: watch mode), where
+# rewriting a single JSON list every time would get slower the longer they run
+def append_metrics_line(metrics: Any, file_name: str):
+    with open(file_name, 'a') as metrics_file:
+        metrics_file.write(json.dumps(metrics) + '\n')
@@ -0,0 +1,149 @@
+import cProfile
+import json
+import pstats
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Self, Tuple
+
+from consts.Profiling import ALLOCATION_PROFILE_STAGE_NAMES, ALLOCATION_PROFILE_TOP_SITES
+
+# Allocations made by tracemalloc itself (and by imports) are left out of the recorded sites
+# They are left out of the grouped statistics, since filtering the snapshot's traces one by one is very slow
+ALLOCATION_SITE_EXCLUDED_FILE_NAMES: Tuple[str, ...] = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<unknown>')
+
+
+class ProfileSession:
+    # Profiles the processing of one archive (see start_profiling)
+    # cProfile only profiles the thread it was enabled on, so threads that process part of the archive
+    # (eg: ps.txt and the powerlog DB) each get their own profiler via profile_thread_call, and the
+    # stats of every profiler are merged when written
+    def __init__(self, profile_calls: bool = False, profile_allocations: bool = False):
+        self._profile_calls = profile_calls
+        self._profile_allocations = profile_allocations
+        self._profilers: List[cProfile.Profile] = []
+        self._allocation_sites: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    @property
+    def profile_calls(self: Self):
+        return self._profile_calls
+
+    @property
+    def profile_allocations(self: Self):
+        return self._profile_allocations
+
+    @property
+    def allocation_sites(self: Self):
+        return self._allocation_sites
+
+    def start(self: Self):
+        if self.profile_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        if self.profile_calls:
+            self._profilers.append(cProfile.Profile())
+            self._profilers[0].enable()
+
+    def stop(self: Self):
+        if self.profile_calls:
+            self._profilers[0].disable()
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def add_profiler(self: Self, profiler: cProfile.Profile):
+        with self._lock:
+            self._profilers.append(profiler)
+
+    def add_allocation_sites(self: Self, stage_allocation_sites: Dict[str, Any]):
+        with self._lock:
+            self._allocation_sites.append(stage_allocation_sites)
+
+    def write_profile_stats(self: Self, file_name: str):
+        profile_stats: pstats.Stats = pstats.Stats(self._profilers[0])
+
+        for thread_profiler in self._profilers[1:]:
+            profile_stats.add(thread_profiler)
+
+        profile_stats.dump_stats(file_name)
+
+    def write_allocation_sites(self: Self, file_name: str):
+        with open(file_name, 'w') as allocations_file:
+            json.dump(self.allocation_sites, allocations_file, indent=2)
+
+
+# Profile session for the archive currently being processed in this process
+_active_profile_session: Optional[ProfileSession] = None
+
+
+def start_profiling(profile_calls: bool = False, profile_allocations: bool = False) -> ProfileSession:
+    global _active_profile_session
+
+    _active_profile_session = ProfileSession(profile_calls, profile_allocations)
+    _active_profile_session.start()
+
+    return _active_profile_session
+
+
+def stop_profiling() -> Optional[ProfileSession]:
+    global _active_profile_session
+
+    profile_session: Optional[ProfileSession] = _active_profile_session
+    _active_profile_session = None
+
+    if profile_session:
+        profile_session.stop()
+
+    return profile_session
+
+
+# Calls the given function, profiling it on the current thread if calls are being profiled
+# Used for work submitted to other threads, which the profiler on the starting thread can't see
+def profile_thread_call(function: Callable[..., Any], *args: Any) -> Any:
+    profile_session: Optional[ProfileSession] = _active_profile_session
+
+    if profile_session is None or not profile_session.profile_calls:
+        return function(*args)
+
+    thread_profiler: cProfile.Profile = cProfile.Profile()
+    thread_profiler.enable()
+
+    try:
+        return function(*args)
+    finally:
+        thread_profiler.disable()
+        profile_session.add_profiler(thread_profiler)
+
+
+# Records the top allocation sites of memory that is still allocated at the end of the given stage
+# Does nothing unless allocations are being profiled, and the stage is one of ALLOCATION_PROFILE_STAGE_NAMES
+def record_allocation_sites(stage_name: str):
+    profile_session: Optional[ProfileSession] = _active_profile_session
+
+    if profile_session is None or not profile_session.profile_allocations or stage_name not in ALLOCATION_PROFILE_STAGE_NAMES:
+        return
+
+    if not tracemalloc.is_tracing():
+        return
+
+    allocation_statistics: List[tracemalloc.Statistic] = [
+        statistic for statistic in tracemalloc.take_snapshot().statistics('lineno')
+        if statistic.traceback[0].filename not in ALLOCATION_SITE_EXCLUDED_FILE_NAMES
+    ]
+
+    profile_session.add_allocation_sites({
+        'stage': stage_name,
+        'traced_memory_bytes': tracemalloc.get_traced_memory()[0],
+        'top_allocation_sites': [
+            {
+                'file': statistic.traceback[0].filename,
+                'line': statistic.traceback[0].lineno,
+                'size_bytes': statistic.size,
+                'count': statistic.count,
+            }
+            for statistic in allocation_statistics[:ALLOCATION_PROFILE_TOP_SITES]
+        ],
+    })
@@ -0,0 +1,23 @@
+from typing import Any, Sequence, Union
+
+from consts.OutputFile import OUTPUT_FORMAT_COLUMNAR
+from utils.ColumnarWriter import ColumnarWriter
+from utils.JsonStreamWriter import JsonStreamWriter
+
+# Both writers are context managers with write_row, item_count and file_name
+ResultWriter = Union[JsonStreamWriter, ColumnarWriter]
+
+
+# Creates the writer for a results file in the given output format
+def create_result_writer(
+    resulting_file_name: str, 
+    field_names: Sequence[str], 
+    field_types: Sequence[Any], 
+    output_format: str, 
+    compress: bool = False
+) -> ResultWriter:
+    if output_format == OUTPUT_FORMAT_COLUMNAR:
+        # Column files are left uncompressed, so they can be memory mapped and loaded without decoding
+        return ColumnarWriter(resulting_file_name, field_names, field_types)
+
+    return JsonStreamWriter(resulting_file_name, field_names, output_format, compress)
@@ -0,0 +1,35 @@
+from typing import Any, Optional, Sequence, Tuple
+
+
+def quote_sqlite_identifier(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+# Field type of a column, from its declared type in the table, following SQLite's type affinity rules
+# (eg: "BIGINT" has INTEGER affinity, and "DOUBLE" has REAL affinity)
+def get_field_type_from_declared_column_type(declared_column_type: str) -> Any:
+    declared_column_type = declared_column_type.upper()
+
+    if 'INT' in declared_column_type:
+        return Optional[int]
+
+    if 'CHAR' in declared_column_type or 'CLOB' in declared_column_type or 'TEXT' in declared_column_type:
+        return Optional[str]
+
+    if 'REAL' in declared_column_type or 'FLOA' in declared_column_type or 'DOUB' in declared_column_type:
+        return Optional[float]
+
+    # BLOB and NUMERIC affinity columns can hold values of any type
+    return Optional[Any]
+
+
+# Joins (condition, parameters) pairs into one parameterised WHERE clause and its parameters
+# Returns an empty clause if there are no conditions, so it can always be added to a query
+def build_where_clause(conditions: Sequence[Tuple[str, Tuple[Any, ...]]]) -> Tuple[str, Tuple[Any, ...]]:
+    if not conditions:
+        return '', ()
+
+    return (
+        ' WHERE ' + ' AND '.join(['(' + condition + ')' for condition, _ in conditions]), 
+        tuple(parameter for _, condition_parameters in conditions for parameter in condition_parameters)
+    )
@@ -1,4 +1,8 @@
+import time
 from datetime import datetime, timezone
+from typing import Any, Callable, Tuple
+
+from consts.SQLiteDB import ROLLUP_INTERVAL_SECONDS_BY_NAME, ROLLUP_INTERVAL_UNIT_SECONDS
 
 
 def get_current_timestamp_utc() -> str:
@@ -7,4 +11,52 @@ def get_current_timestamp_utc() -> str:
     current_utc_date_formatted: str = current_utc_date.strftime('%Y-%m-%dT%H-%M-%S-%f')[:-3]
     
     return current_utc_date_formatted
-    
\ No newline at end of file
+
+
+# Calls the given function, and returns its result along with how long it took (wall clock seconds)
+def call_and_measure_seconds(function: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    start_time: float = time.perf_counter()
+
+    result: Any = function(*args)
+
+    return result, time.perf_counter() - start_time
+
+
+# Parses a point in time given as Unix seconds (eg: 1713292252) or an ISO 8601 date/time (eg: 2024-04-16T19:30:52+01:00)
+# Date/times without a UTC offset are taken as UTC
+# Raises ValueError if the value is neither
+def parse_timestamp(timestamp_value: str) -> float:
+    try:
+        return float(timestamp_value)
+    except ValueError:
+        pass
+
+    parsed_date: datetime = datetime.fromisoformat(timestamp_value)
+
+    if parsed_date.tzinfo is None:
+        parsed_date = parsed_date.replace(tzinfo=timezone.utc)
+
+    return parsed_date.timestamp()
+
+
+# Parses a rollup interval given by name (minute, hour or day), as whole seconds (eg: 300), or as a number with a unit
+# (eg: 5m, 2h) - see consts/SQLiteDB.py
+# Raises ValueError if the value is none of these, or isn't at least one second
+def parse_interval_seconds(interval_value: str) -> int:
+    interval_value = interval_value.strip().lower()
+
+    if interval_value in ROLLUP_INTERVAL_SECONDS_BY_NAME:
+        return ROLLUP_INTERVAL_SECONDS_BY_NAME[interval_value]
+
+    unit_seconds: int = 1
+
+    if interval_value[-1:] in ROLLUP_INTERVAL_UNIT_SECONDS:
+        unit_seconds = ROLLUP_INTERVAL_UNIT_SECONDS[interval_value[-1]]
+        interval_value = interval_value[:-1]
+
+    interval_seconds: int = int(interval_value) * unit_seconds
+
+    if interval_seconds < 1:
+        raise ValueError('Interval must be at least one second')
+
+    return interval_seconds
@@ -1,6 +1,55 @@
 import re
-from typing import List, Optional
-from models.TxtLogEvent import TxtLogEvent
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from models.TxtLogEvent import TXT_LOG_EVENT_FIELD_NAMES, TxtLogEvent
+
+# Converts a block of ps.txt rows, returning the converted events and the number of malformed rows
+TxtRowsConverter = Callable[[Iterable[str]], Tuple[List[TxtLogEvent], int]]
+
+# Other names that some versions of ps use in the header for TxtLogEvent columns
+TXT_HEADER_COLUMN_NAME_ALIASES: Dict[str, str] = {
+    '%CPU': 'CPU',
+    '%MEM': 'MEM',
+    'PCPU': 'CPU',
+    'PMEM': 'MEM',
+    'TTY': 'TT',
+    'START': 'STARTED',
+    'CMD': 'COMMAND',
+    'COMM': 'COMMAND',
+    'ARGS': 'COMMAND',
+}
+
+# A header column name with one of these after a known name (eg: USER_NAME, RSS(KB)) is that known column, with a
+# suffix some tools add (a unit or a label). Only the part before the separator is matched, wherever the column is
+# in the header, so a decorated column is never confused with another column just because of its position
+TXT_HEADER_COLUMN_NAME_SUFFIX_SEPARATOR_REGEX: str = r'[_(\[]'
+
+# Start of the first argument in a ps.txt COMMAND value that can't be part of the executable path: an option, or
+# another absolute path (see build_txt_rows_process_name_filter)
+TXT_COMMAND_FIRST_ARGUMENT_REGEX: str = r' [-/]'
+
+# Converts each ps.txt column from its string value to the TxtLogEvent field type, in column order
+# Splitting on whitespace never produces empty strings, so string columns need no conversion at all
+TXT_LOG_EVENT_COLUMN_CONVERTERS: Tuple[Callable[[str], Any], ...] = (
+    str,    # USER
+    int,    # UID
+    str,    # PRSNA
+    int,    # PID
+    int,    # PPID
+    str,    # F
+    float,  # CPU
+    float,  # MEM
+    int,    # PRI
+    int,    # NI
+    int,    # VSZ
+    int,    # RSS
+    str,    # WCHAN
+    str,    # TT
+    str,    # STAT
+    str,    # STARTED
+    str,    # TIME
+    str,    # COMMAND
+)
 
 def convert_txt_row_to_txt_log_event(txt_row: str, num_of_columns: int, delimiter_regex: str) -> Optional[TxtLogEvent]:
     if not txt_row:
@@ -80,4 +129,234 @@ def map_row_parts_to_txt_log_event(row_string:str, row_parts: List[str], num_of_
     except Exception as convert_row_to_process_log_item_error:
         print('TxtConverter - map_row_parts_to_process_item - ',
               'Error parsing row: ', row_string, ' - Error: ', convert_row_to_process_log_item_error)
-        return None
\ No newline at end of file
+        return None
+
+
+# Fast path for converting a whole block of ps.txt rows at once
+# Rows are split with str.split (no regex), and converted with the column converter table
+# Malformed rows are counted rather than printed one by one, so the caller can report them in bulk
+# Returns the converted events and the number of malformed rows skipped (blank rows are ignored)
+def convert_txt_rows_to_txt_log_events(
+    txt_rows: Iterable[str], 
+    column_converters: Tuple[Callable[[str], Any], ...] = TXT_LOG_EVENT_COLUMN_CONVERTERS
+) -> Tuple[List[TxtLogEvent], int]:
+    txt_log_events: List[TxtLogEvent] = []
+    malformed_row_count: int = 0
+
+    num_of_columns: int = len(column_converters)
+
+    # The last column ("COMMAND") may contain whitespace, so limit the number of splits
+    max_number_of_splits: int = num_of_columns - 1
+
+    # Only the non-string columns need converting, so the row parts list is converted in place and
+    # passed straight to TxtLogEvent (string columns are used as-is)
+    typed_column_converters: Tuple[Tuple[int, Callable[[str], Any]], ...] = tuple(
+        (column_index, convert) for column_index, convert in enumerate(column_converters) if convert is not str
+    )
+
+    # Local name avoids an attribute lookup inside the loop
+    append_txt_log_event = txt_log_events.append
+
+    for txt_row in txt_rows:
+        # Leading whitespace is skipped by split, but trailing whitespace (including line endings)
+        # would otherwise be kept in the last column
+        row_parts: List[str] = txt_row.rstrip().split(None, max_number_of_splits)
+
+        if len(row_parts) != num_of_columns:
+            if row_parts:
+                malformed_row_count += 1
+            continue
+
+        try:
+            for column_index, convert in typed_column_converters:
+                row_parts[column_index] = convert(row_parts[column_index])
+        except ValueError:
+            malformed_row_count += 1
+            continue
+
+        append_txt_log_event(TxtLogEvent(*row_parts))
+
+    return txt_log_events, malformed_row_count
+
+
+
+# Maps a header column name to its TxtLogEvent field name, or None if it is not a known column
+# Names are matched whole first, then by the known name before a suffix (see TXT_HEADER_COLUMN_NAME_SUFFIX_SEPARATOR_REGEX)
+def get_txt_log_event_field_name(header_column_name: str) -> Optional[str]:
+    for column_name in (header_column_name.upper(), re.split(TXT_HEADER_COLUMN_NAME_SUFFIX_SEPARATOR_REGEX, header_column_name.upper(), 1)[0]):
+        column_name = TXT_HEADER_COLUMN_NAME_ALIASES.get(column_name, column_name)
+
+        if column_name in TXT_LOG_EVENT_FIELD_NAMES:
+            return column_name
+
+    return None
+
+
+# Returns the converter for rows under the given ps.txt header row
+# Converters are built once per distinct header (whitespace-normalised), and cached
+# If process names are given, only rows for those processes are converted (see build_txt_rows_process_name_filter)
+def get_txt_rows_converter(header_row: str, process_names: Tuple[str, ...] = ()) -> TxtRowsConverter:
+    if process_names:
+        return build_filtered_txt_rows_converter(' '.join(header_row.split()), process_names)
+
+    return build_txt_rows_converter(' '.join(header_row.split()))
+
+
+@lru_cache(maxsize=32)
+def build_txt_rows_converter(header_row: str) -> TxtRowsConverter:
+    header_column_names: List[str] = header_row.split()
+    field_names: List[Optional[str]] = [get_txt_log_event_field_name(column_name) for column_name in header_column_names]
+
+    # The known layout keeps the existing column converter table
+    # Headers without a COMMAND column, or with one that isn't last (and so can't safely hold whitespace), can't be
+    # split into columns reliably, so also fall back to it, as every ps.txt was assumed to use that layout
+    # Any other header is mapped by the position of each known column in it (unknown columns are skipped)
+    if (
+        tuple(field_names) == TXT_LOG_EVENT_FIELD_NAMES or 
+        not field_names or 
+        field_names[-1] != 'COMMAND'
+    ):
+        return convert_txt_rows_to_txt_log_events
+
+    return generate_txt_rows_converter(field_names)
+
+
+# Index of the COMMAND column in rows under the given (whitespace-normalised) header row, or None if it has none
+# Headers that the converters fall back to the known layout for use the known layout's COMMAND column too
+def get_txt_command_column_index(header_row: str) -> Optional[int]:
+    if build_txt_rows_converter(header_row) is convert_txt_rows_to_txt_log_events:
+        return TXT_LOG_EVENT_FIELD_NAMES.index('COMMAND')
+
+    field_names: List[Optional[str]] = [get_txt_log_event_field_name(column_name) for column_name in header_row.split()]
+
+    return len(field_names) - 1 if 'COMMAND' in field_names else None
+
+
+# Returns a filter over raw ps.txt rows, keeping only the rows whose process is one of the given names
+# A row's process is the file name of the executable at the start of its COMMAND column
+# (eg: "/usr/libexec/locationd -d" is "locationd"), which is also how powerlog names processes
+# Most rows are rejected by a plain substring check, without being split into columns
+def build_txt_rows_process_name_filter(command_column_index: Optional[int], process_names: Tuple[str, ...]) -> Callable[[Iterable[str]], List[str]]:
+    # The executable path can itself contain spaces (eg: an app in "Some App.app"), so rather than splitting the command
+    # on every space, the executable is taken to end at the first argument that is an option (" -") or an absolute
+    # path (" /"), and is matched against the name alone or the end of a path, followed by a space or its end
+    # Names that only appear in an argument (eg: "/usr/bin/foo --config /var/db/locationd") never match
+    command_prefixes: Tuple[str, ...] = tuple(process_name + ' ' for process_name in process_names)
+    command_path_suffixes: Tuple[str, ...] = tuple('/' + process_name + ' ' for process_name in process_names)
+    first_argument_regex: re.Pattern = re.compile(TXT_COMMAND_FIRST_ARGUMENT_REGEX)
+
+    def filter_txt_rows(txt_rows: Iterable[str]) -> List[str]:
+        filtered_txt_rows: List[str] = []
+
+        if command_column_index is None:
+            return filtered_txt_rows
+
+        for txt_row in txt_rows:
+            if not any(process_name in txt_row for process_name in process_names):
+                continue
+
+            row_parts: List[str] = txt_row.split(None, command_column_index)
+
+            if len(row_parts) <= command_column_index:
+                continue
+
+            command: str = row_parts[command_column_index].rstrip()
+            first_argument_match: Optional[re.Match] = first_argument_regex.search(command)
+
+            # Trailing space, so a name at the very end of the executable matches the same way as one followed by arguments
+            executable: str = (command[:first_argument_match.start()] if first_argument_match else command) + ' '
+
+            if executable.startswith(command_prefixes) or any(command_path_suffix in executable for command_path_suffix in command_path_suffixes):
+                filtered_txt_rows.append(txt_row)
+
+        return filtered_txt_rows
+
+    return filter_txt_rows
+
+
+# Rows for other processes are filtered out before conversion, so they never become TxtLogEvents
+# Filtered out rows are not counted as malformed
+@lru_cache(maxsize=32)
+def build_filtered_txt_rows_converter(header_row: str, process_names: Tuple[str, ...]) -> TxtRowsConverter:
+    convert_txt_rows: TxtRowsConverter = build_txt_rows_converter(header_row)
+    filter_txt_rows: Callable[[Iterable[str]], List[str]] = build_txt_rows_process_name_filter(
+        get_txt_command_column_index(header_row), 
+        process_names
+    )
+
+    def convert_filtered_txt_rows(txt_rows: Iterable[str]) -> Tuple[List[TxtLogEvent], int]:
+        return convert_txt_rows(filter_txt_rows(txt_rows))
+
+    return convert_filtered_txt_rows
+
+
+# Generates and compiles a converter specialised for one column layout
+# Each TxtLogEvent argument is either a direct conversion of its column, or None if the layout doesn't have that
+# column, so a row only pays for the columns it actually has (no per-column loop or lookups at run time)
+# Columns that aren't TxtLogEvent fields (None field names) are split off but never read, and a column repeated in
+# the header is read from its first position
+def generate_txt_rows_converter(field_names: List[Optional[str]]) -> TxtRowsConverter:
+    column_converters_by_field_name: Dict[str, Callable[[str], Any]] = dict(zip(TXT_LOG_EVENT_FIELD_NAMES, TXT_LOG_EVENT_COLUMN_CONVERTERS))
+    column_indexes_by_field_name: Dict[str, int] = {}
+
+    for column_index, field_name in enumerate(field_names):
+        if field_name is not None and field_name not in column_indexes_by_field_name:
+            column_indexes_by_field_name[field_name] = column_index
+
+    txt_log_event_arguments: List[str] = []
+
+    for field_name in TXT_LOG_EVENT_FIELD_NAMES:
+        if field_name not in column_indexes_by_field_name:
+            txt_log_event_arguments.append('None')
+            continue
+
+        column_value: str = 'row_parts[' + str(column_indexes_by_field_name[field_name]) + ']'
+        convert: Callable[[str], Any] = column_converters_by_field_name[field_name]
+
+        txt_log_event_arguments.append(column_value if convert is str else convert.__name__ + '(' + column_value + ')')
+
+    # Only known field names, column indexes and int/float are written into the generated code
+    converter_source: str = '\n'.join([
+        'def convert_txt_rows(txt_rows):',
+        '    txt_log_events = []',
+        '    append_txt_log_event = txt_log_events.append',
+        '    malformed_row_count = 0',
+        '    for txt_row in txt_rows:',
+        '        row_parts = txt_row.rstrip().split(None, ' + str(len(field_names) - 1) + ')',
+        '        if len(row_parts) != ' + str(len(field_names)) + ':',
+        '            if row_parts:',
+        '                malformed_row_count += 1',
+        '            continue',
+        '        try:',
+        '            append_txt_log_event(TxtLogEvent(' + ', '.join(txt_log_event_arguments) + '))',
+        '        except ValueError:',
+        '            malformed_row_count += 1',
+        '    return txt_log_events, malformed_row_count',
+    ])
+
+    converter_namespace: Dict[str, Any] = {'TxtLogEvent': TxtLogEvent, 'int': int, 'float': float}
+
+    exec(compile(converter_source, '<txt_rows_converter: ' + ' '.join(field_name or '-' for field_name in field_names) + '>', 'exec'), converter_namespace)
+
+    return converter_namespace['convert_txt_rows']
+
+
+
+# Splits text into (at most) chunk_count chunks of roughly equal size, each ending on a line boundary
+# so no row is split across two chunks
+def split_txt_rows_into_chunks(txt_rows: str, chunk_count: int) -> List[str]:
+    txt_rows_chunks: List[str] = []
+
+    # Rounded up, so there are never more than chunk_count chunks
+    target_chunk_size: int = max(1, -(-len(txt_rows) // max(1, chunk_count)))
+    chunk_start: int = 0
+
+    while chunk_start < len(txt_rows):
+        # Extend each chunk to the end of the line that the target size falls in
+        chunk_end: int = txt_rows.find('\n', chunk_start + target_chunk_size)
+        chunk_end = len(txt_rows) if chunk_end == -1 else chunk_end + 1
+
+        txt_rows_chunks.append(txt_rows[chunk_start:chunk_end])
+        chunk_start = chunk_end
+
+    return txt_rows_chunks
@@ -0,0 +1,36 @@
+from operator import attrgetter
+from typing import Any, Dict, Optional, Self, Sequence, Tuple
+
+from models.TxtLogEvent import TxtLogEvent
+
+# ps.txt fields that powerlog process events are annotated with, in the order they are added to each row
+TXT_LOG_PID_INDEX_FIELD_NAMES: Tuple[str, ...] = ('USER', 'RSS', 'COMMAND')
+TXT_LOG_PID_INDEX_FIELD_TYPES: Tuple[Any, ...] = (Optional[str], Optional[int], Optional[str])
+
+# Added to rows whose PID isn't in the index
+MISSING_TXT_LOG_PID_INDEX_VALUES: Tuple[Any, ...] = (None,) * len(TXT_LOG_PID_INDEX_FIELD_NAMES)
+
+
+class TxtLogPidIndex:
+    # Hash index of a ps.txt snapshot by PID, built up a block of events at a time as the file is parsed, so powerlog
+    # rows can be joined to it with one dict lookup per row
+    # Indexes of separate chunks (eg: from parse workers) can be merged into one
+    def __init__(self):
+        self._values_by_pid: Dict[int, Tuple[Any, ...]] = {}
+
+    def __len__(self: Self) -> int:
+        return len(self._values_by_pid)
+
+    def add_txt_log_events(self: Self, txt_log_events: Sequence[TxtLogEvent]):
+        # PIDs are unique within one snapshot
+        self._values_by_pid.update(zip(
+            map(attrgetter('PID'), txt_log_events), 
+            map(attrgetter(*TXT_LOG_PID_INDEX_FIELD_NAMES), txt_log_events)
+        ))
+
+    def merge(self: Self, other_pid_index: 'TxtLogPidIndex'):
+        self._values_by_pid.update(other_pid_index._values_by_pid)
+
+    # Returns the indexed ps.txt values for the PID, in TXT_LOG_PID_INDEX_FIELD_NAMES order (all None if not indexed)
+    def get_values(self: Self, pid: Optional[int]) -> Tuple[Any, ...]:
+        return self._values_by_pid.get(pid, MISSING_TXT_LOG_PID_INDEX_VALUES) # type: ignore
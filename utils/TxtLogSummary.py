@@ -0,0 +1,141 @@
+import heapq
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Self, Sequence, Tuple
+
+from consts.LogTextFile import TXT_LOG_SUMMARY_GROUP_FIELD_NAMES, TXT_LOG_SUMMARY_METRIC_FIELD_NAMES
+from models.TxtLogEvent import TxtLogEvent
+
+# Kept alongside each metric value in the top processes heaps, which compare the value first
+TOP_PROCESS_FIELD_NAMES: Tuple[str, ...] = ('PID', 'USER', 'COMMAND')
+get_top_process_values: Callable[[TxtLogEvent], Tuple[Any, ...]] = attrgetter(*TOP_PROCESS_FIELD_NAMES)
+
+
+class TxtLogSummary:
+    # Resource totals for a ps.txt snapshot, built up a block of events at a time as the file is parsed, so the
+    # results file never has to be read back to summarise it
+    # Events are grouped by USER, COMMAND and PRSNA in dicts of per-group totals, and the top processes per metric
+    # are kept in bounded min-heaps, so memory use depends on the number of groups rather than the number of rows
+    # Summaries of separate chunks (eg: from parse workers) can be merged into one
+    def __init__(self, top_n: int):
+        self._top_n = top_n
+        self._row_count = 0
+        self._totals: List[float] = [0] * len(TXT_LOG_SUMMARY_METRIC_FIELD_NAMES)
+        # Per group field, group value -> [process count, then a total per metric]
+        self._groups: Dict[str, Dict[Any, List[float]]] = {group_field_name: {} for group_field_name in TXT_LOG_SUMMARY_GROUP_FIELD_NAMES}
+        # Per metric, a min-heap of (value, PID, USER, COMMAND) holding the largest top_n values seen
+        self._top_processes: Dict[str, List[Tuple[Any, ...]]] = {metric_field_name: [] for metric_field_name in TXT_LOG_SUMMARY_METRIC_FIELD_NAMES}
+
+    @property
+    def top_n(self: Self):
+        return self._top_n
+
+    @property
+    def row_count(self: Self):
+        return self._row_count
+
+    # Each block is read a column at a time, which is much faster than reading every field of each event in turn
+    def add_txt_log_events(self: Self, txt_log_events: Sequence[TxtLogEvent]):
+        self._row_count += len(txt_log_events)
+
+        # Missing values (eg: from a ps.txt without that column) count as zero
+        metric_columns: List[List[Any]] = [
+            [metric_value or 0 for metric_value in map(attrgetter(metric_field_name), txt_log_events)]
+            for metric_field_name in TXT_LOG_SUMMARY_METRIC_FIELD_NAMES
+        ]
+
+        self._totals = [total + sum(metric_column) for total, metric_column in zip(self._totals, metric_columns)]
+
+        cpu_column, mem_column, rss_column, vsz_column = metric_columns
+
+        for group_field_name, groups in self._groups.items():
+            # Hash group-by, unrolled for the four metrics, since this loop runs for every row
+            for group_value, cpu_value, mem_value, rss_value, vsz_value in zip(
+                map(attrgetter(group_field_name), txt_log_events), cpu_column, mem_column, rss_column, vsz_column
+            ):
+                group_totals: List[float] | None = groups.get(group_value)
+
+                if group_totals is None:
+                    groups[group_value] = [1, cpu_value, mem_value, rss_value, vsz_value]
+                else:
+                    group_totals[0] += 1
+                    group_totals[1] += cpu_value
+                    group_totals[2] += mem_value
+                    group_totals[3] += rss_value
+                    group_totals[4] += vsz_value
+
+        for metric_field_name, metric_column in zip(TXT_LOG_SUMMARY_METRIC_FIELD_NAMES, metric_columns):
+            # Only the block's own top rows are built into heap entries, and then merged into the heap
+            top_row_indexes: List[int] = heapq.nlargest(self.top_n, range(len(metric_column)), key=metric_column.__getitem__)
+
+            self.add_top_processes(metric_field_name, [
+                (metric_column[row_index], *get_top_process_values(txt_log_events[row_index]))
+                for row_index in top_row_indexes
+            ])
+
+    # Keeps the largest top_n of the heap and the given (value, PID, USER, COMMAND) entries
+    def add_top_processes(self: Self, metric_field_name: str, top_processes: List[Tuple[Any, ...]]):
+        top_process_heap: List[Tuple[Any, ...]] = self._top_processes[metric_field_name]
+
+        for top_process in top_processes:
+            if len(top_process_heap) < self.top_n:
+                heapq.heappush(top_process_heap, top_process)
+            elif top_process[0] > top_process_heap[0][0]:
+                heapq.heapreplace(top_process_heap, top_process)
+
+    def merge(self: Self, other_summary: 'TxtLogSummary'):
+        self._row_count += other_summary._row_count
+        self._totals = [total + other_total for total, other_total in zip(self._totals, other_summary._totals)]
+
+        for group_field_name, other_groups in other_summary._groups.items():
+            groups: Dict[Any, List[float]] = self._groups[group_field_name]
+
+            for group_value, other_group_totals in other_groups.items():
+                group_totals: List[float] | None = groups.get(group_value)
+
+                if group_totals is None:
+                    groups[group_value] = list(other_group_totals)
+                else:
+                    groups[group_value] = [total + other_total for total, other_total in zip(group_totals, other_group_totals)]
+
+        for metric_field_name, other_top_process_heap in other_summary._top_processes.items():
+            self.add_top_processes(metric_field_name, other_top_process_heap)
+
+    # Only the top groups per metric are included, since there can be a group per row (eg: COMMAND includes arguments)
+    def to_dict(self: Self) -> Dict[str, Any]:
+        return {
+            'row_count': self.row_count, 
+            'totals': dict(zip(TXT_LOG_SUMMARY_METRIC_FIELD_NAMES, [round_total(total) for total in self._totals])), 
+            'top_processes': {
+                metric_field_name: [
+                    {**dict(zip(TOP_PROCESS_FIELD_NAMES, top_process[1:])), metric_field_name: top_process[0]}
+                    for top_process in sorted(top_process_heap, reverse=True)
+                ]
+                for metric_field_name, top_process_heap in self._top_processes.items()
+            }, 
+            'groups': {
+                group_field_name: {
+                    'group_count': len(groups), 
+                    'top': {
+                        metric_field_name: [
+                            build_group_dict(group_field_name, group_value, group_totals)
+                            for group_value, group_totals in heapq.nlargest(self.top_n, groups.items(), key=lambda group: group[1][metric_index + 1])
+                        ]
+                        for metric_index, metric_field_name in enumerate(TXT_LOG_SUMMARY_METRIC_FIELD_NAMES)
+                    }, 
+                }
+                for group_field_name, groups in self._groups.items()
+            }, 
+        }
+
+
+# Float totals are rounded, so repeated addition doesn't leave long fractions (eg: 12.300000000000002)
+def round_total(total: float) -> float:
+    return round(total, 4) if isinstance(total, float) else total
+
+
+def build_group_dict(group_field_name: str, group_value: Any, group_totals: List[float]) -> Dict[str, Any]:
+    return {
+        group_field_name: group_value, 
+        'process_count': group_totals[0], 
+        **dict(zip(TXT_LOG_SUMMARY_METRIC_FIELD_NAMES, [round_total(total) for total in group_totals[1:]])), 
+    }
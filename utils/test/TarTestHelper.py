@@ -0,0 +1,61 @@
+import io
+import os
+import sqlite3
+import tarfile
+import tempfile
+from typing import List, Optional, Tuple
+
+
+# Builds a small .tar.gz in memory with a ps.txt file, a powerlog PLSQL DB, and an optional trailing member
+# Either log file can be left out, or given other contents (eg: to test files that can't be processed)
+def build_test_tar_gz_bytes(
+    trailing_member_bytes: bytes = b'', 
+    include_ps_txt: bool = True, 
+    include_powerlog: bool = True, 
+    ps_txt_bytes: Optional[bytes] = None, 
+    powerlog_db_bytes: Optional[bytes] = None
+) -> bytes:
+    default_ps_txt_bytes = (
+        "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n"
+        "user1 1000 pr1 1234 5678 - 0.1 0.2 20 0 10000 2000 - tty1 S 2023-10-01 00:00:01 command1\n"
+    ).encode('utf-8')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'powerlog.PLSQL')
+        db_conn = sqlite3.connect(db_path)
+        db_conn.execute(
+            'CREATE TABLE PLProcessMonitorAgent_EventForward_ProcessID '
+            '(ID INTEGER PRIMARY KEY, timestamp REAL, BundleID TEXT, CoalitionID INTEGER, PID INTEGER, ProcessName TEXT)'
+        )
+        db_conn.execute(
+            'INSERT INTO PLProcessMonitorAgent_EventForward_ProcessID VALUES (1, 1638316800.0, "com.example.bundle", 123, 1234, "ExampleProcess")'
+        )
+        db_conn.commit()
+        db_conn.close()
+
+        with open(db_path, 'rb') as db_file:
+            default_powerlog_db_bytes = db_file.read()
+
+    tar_bytes = io.BytesIO()
+
+    with tarfile.open(fileobj=tar_bytes, mode='w:gz') as tar_file_obj:
+        members: List[Tuple[str, bytes]] = []
+
+        if include_ps_txt:
+            members.append(('sysdiagnose/ps.txt', default_ps_txt_bytes if ps_txt_bytes is None else ps_txt_bytes))
+
+        if include_powerlog:
+            members.append((
+                'sysdiagnose/logs/powerlogs/powerlog_2024-04-16_19-30_1234.PLSQL', 
+                default_powerlog_db_bytes if powerlog_db_bytes is None else powerlog_db_bytes
+            ))
+
+        if trailing_member_bytes:
+            members.append(('sysdiagnose/trailing.bin', trailing_member_bytes))
+
+        for member_name, member_bytes in members:
+            member_info = tarfile.TarInfo(member_name)
+            member_info.size = len(member_bytes)
+            tar_file_obj.addfile(member_info, io.BytesIO(member_bytes))
+
+    return tar_bytes.getvalue()
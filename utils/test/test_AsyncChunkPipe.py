@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from utils.AsyncChunkPipe import AsyncChunkPipe
+
+
+# Unit test class
+class TestAsyncChunkPipe(unittest.TestCase):
+    # Chunks written on the event loop are read back in order on another thread, in reads of any size
+    def test_write_and_read(self):
+        async def write_and_read():
+            archive_pipe = AsyncChunkPipe(asyncio.get_running_loop(), 2)
+            read_future = asyncio.get_running_loop().run_in_executor(
+                None, 
+                lambda: [archive_pipe.read(3), archive_pipe.read(), archive_pipe.read(100), archive_pipe.read(), archive_pipe.read()]
+            )
+
+            for chunk in [b'abcde', b'', b'fg', b'hij']:
+                await archive_pipe.write(chunk)
+
+            await archive_pipe.write_eof()
+
+            return await read_future
+
+        self.assertEqual(asyncio.run(write_and_read()), [b'abc', b'de', b'fg', b'hij', b''])
+
+    # Once the reader has closed the pipe, a write waiting on a full queue is freed, and later writes are dropped
+    def test_close_frees_writer(self):
+        async def write_past_close():
+            archive_pipe = AsyncChunkPipe(asyncio.get_running_loop(), 1)
+            await archive_pipe.write(b'abc')
+
+            # The queue is full, so this write waits until the reader closes the pipe
+            blocked_write_task = asyncio.ensure_future(archive_pipe.write(b'def'))
+            await asyncio.sleep(0)
+            await asyncio.get_running_loop().run_in_executor(None, archive_pipe.close)
+            await asyncio.wait_for(blocked_write_task, timeout=5)
+
+            for _ in range(3):
+                await asyncio.wait_for(archive_pipe.write(b'ghi'), timeout=5)
+
+            await asyncio.wait_for(archive_pipe.write_eof(), timeout=5)
+
+            return archive_pipe.closed, archive_pipe.read()
+
+        self.assertEqual(asyncio.run(write_past_close()), (True, b''))
+
+    # Aborting ends the stream for the reader, even with a full queue
+    def test_abort(self):
+        async def abort_full_pipe():
+            archive_pipe = AsyncChunkPipe(asyncio.get_running_loop(), 1)
+            await archive_pipe.write(b'abc')
+            archive_pipe.abort()
+
+            return await asyncio.get_running_loop().run_in_executor(None, archive_pipe.read)
+
+        self.assertEqual(asyncio.run(abort_full_pipe()), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
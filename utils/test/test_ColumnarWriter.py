@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import Any, Optional
+
+from utils.ColumnarReader import read_columnar_columns, read_columnar_manifest
+from utils.ColumnarWriter import ColumnarWriter, pack_validity_bitmap
+
+# Unit test class
+class TestColumnarWriter(unittest.TestCase):
+    field_names = ('PID', 'CPU', 'COMMAND')
+    field_types = (int, Optional[float], Optional[str])
+    rows = [
+        (1, 0.5, '/sbin/launchd'),
+        (2, None, 'café'),
+        (3, 1.5, '/sbin/launchd'),
+        (4, 2.0, None),
+    ]
+
+    # Every column reads back as the original values, with nulls restored from the validity bitmaps
+    def test_columns_round_trip(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory_path = os.path.join(temp_dir, 'ps.columnar')
+
+            with ColumnarWriter(directory_path, self.field_names, self.field_types) as columnar_writer:
+                for row in self.rows:
+                    columnar_writer.write_row(row)
+
+            columns = read_columnar_columns(directory_path)
+            manifest = read_columnar_manifest(directory_path)
+
+        self.assertEqual(columnar_writer.item_count, 4)
+        self.assertEqual(columns, {field_name: [row[field_index] for row in self.rows] for field_index, field_name in enumerate(self.field_names)})
+        self.assertEqual(manifest['row_count'], 4)
+        self.assertEqual([column['type'] for column in manifest['columns']], ['int64', 'float64', 'dictionary'])
+        # Columns without nulls have no bitmap, and repeated strings share one dictionary entry
+        self.assertIsNone(manifest['columns'][0]['validity'])
+        self.assertEqual(manifest['columns'][1]['null_count'], 1)
+        self.assertEqual(manifest['columns'][2]['dictionary']['size'], 2)
+
+    # Numeric columns are plain contiguous arrays, which load without any parsing
+    def test_numeric_column_is_contiguous_array(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory_path = os.path.join(temp_dir, 'ps.columnar')
+
+            with ColumnarWriter(directory_path, self.field_names, self.field_types) as columnar_writer:
+                for row in self.rows:
+                    columnar_writer.write_row(row)
+
+            with open(os.path.join(directory_path, 'manifest.json')) as manifest_file:
+                pid_column = json.load(manifest_file)['columns'][0]
+
+            with open(os.path.join(directory_path, pid_column['values']), 'rb') as values_file:
+                pid_values = memoryview(values_file.read()).cast('q')
+
+        self.assertEqual(pid_values.tolist(), [1, 2, 3, 4])
+
+    # Numeric columns holding values of another type are widened rather than failing, keeping every value
+    def test_mixed_type_columns_are_widened(self):
+        field_names = ('ID', 'CoalitionID', 'PID', 'Value')
+        field_types = (int, Optional[int], Optional[int], Optional[Any])
+        rows = [
+            (1, 10, 100, 'text'), 
+            (2, None, 2 ** 70, 5), 
+            (3, 1.5, 'unknown', 5.0), 
+            (4, 20, None, True), 
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory_path = os.path.join(temp_dir, 'powerlog.columnar')
+
+            with ColumnarWriter(directory_path, field_names, field_types) as columnar_writer:
+                for row in rows:
+                    columnar_writer.write_row(row)
+
+            columns = read_columnar_columns(directory_path)
+            manifest = read_columnar_manifest(directory_path)
+
+        self.assertEqual([column['type'] for column in manifest['columns']], ['int64', 'float64', 'dictionary', 'dictionary'])
+        self.assertEqual(columns['ID'], [1, 2, 3, 4])
+        self.assertEqual(columns['CoalitionID'], [10.0, None, 1.5, 20.0])
+        self.assertEqual(columns['PID'], [100, 2 ** 70, 'unknown', None])
+        # Dictionary values keep their own types, and equal values of different types aren't merged
+        self.assertEqual([(value, type(value)) for value in columns['Value']], [('text', str), (5, int), (5.0, float), (True, bool)])
+        self.assertEqual(manifest['columns'][3]['dictionary']['encoding'], 'json')
+
+    # Column names that aren't safe file names (eg: from powerlog table exports) are kept in the manifest, and
+    # their files are named by position, so they stay inside the directory and never clash
+    def test_unsafe_column_names_stay_inside_directory(self):
+        field_names = ('../escaped', 'a/b', 'a?b', 'RSS (KB)')
+        field_types = (int, Optional[str], Optional[str], Optional[int])
+        rows = [(1, 'x', 'y', None), (2, 'z', None, 10)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory_path = os.path.join(temp_dir, 'table.columnar')
+
+            with ColumnarWriter(directory_path, field_names, field_types) as columnar_writer:
+                for row in rows:
+                    columnar_writer.write_row(row)
+
+            columns = read_columnar_columns(directory_path)
+            manifest = read_columnar_manifest(directory_path)
+            temp_dir_file_names = os.listdir(temp_dir)
+            column_file_names = sorted(os.listdir(directory_path))
+
+        self.assertEqual(temp_dir_file_names, ['table.columnar'])
+        self.assertEqual([column['name'] for column in manifest['columns']], list(field_names))
+        self.assertEqual(manifest['columns'][0]['values'], '0____escaped.values.bin')
+        self.assertEqual(manifest['columns'][3]['validity'], '3_RSS__KB_.validity.bin')
+        # "a/b" and "a?b" are the same once sanitised, but have separate files
+        self.assertIn('1_a_b.codes.bin', column_file_names)
+        self.assertIn('2_a_b.codes.bin', column_file_names)
+        self.assertEqual(columns, {'../escaped': [1, 2], 'a/b': ['x', 'z'], 'a?b': ['y', None], 'RSS (KB)': [None, 10]})
+
+    # Validity bitmaps have one bit per value, least significant bit first
+    def test_pack_validity_bitmap(self):
+        self.assertEqual(pack_validity_bitmap(bytearray([1, 0, 0, 0, 0, 0, 0, 0, 1, 1])), b'\x01\x03')
+        self.assertEqual(pack_validity_bitmap(bytearray([0, 0, 0])), b'\x00')
+        self.assertEqual(pack_validity_bitmap(bytearray()), b'')
+
+    # Writing before the directory is created raises an error
+    def test_write_row_without_open_directory(self):
+        columnar_writer = ColumnarWriter('unused.columnar', self.field_names, self.field_types)
+
+        with self.assertRaises(ValueError):
+            columnar_writer.write_row(self.rows[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
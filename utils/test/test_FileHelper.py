@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import mock_open, patch
 
-from utils.FileHelper import find_file_path, write_to_json_file
+from utils.FileHelper import find_file_path, find_tar_file_paths, get_archive_name, spool_file_to_temp_file, write_to_json_file
 
 # Unit test class
 class TestFileHelper(unittest.TestCase):
@@ -29,6 +29,62 @@ class TestFileHelper(unittest.TestCase):
         
         self.assertEqual(result, '/path/to/FiLe1.txt')
 
+    def test_find_tar_file_paths_sorted_and_filtered(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for file_name in ['b.tar.gz', 'a.tar.gz', 'notes.txt']:
+                open(os.path.join(temp_dir, file_name), 'w').close()
+
+            os.mkdir(os.path.join(temp_dir, 'dir.tar.gz'))
+
+            result = find_tar_file_paths(temp_dir, '*.tar.gz')
+
+        self.assertEqual(result, [os.path.join(temp_dir, 'a.tar.gz'), os.path.join(temp_dir, 'b.tar.gz')])
+
+    def test_get_archive_name(self):
+        self.assertEqual(get_archive_name('input/sysdiagnose_2024.04.16_iPhone.tar.gz'), 'sysdiagnose_2024.04.16_iPhone')
+        self.assertEqual(get_archive_name('archive.TGZ'), 'archive')
+        self.assertEqual(get_archive_name('archive.zip'), 'archive.zip')
+
+    def test_spool_file_to_temp_file(self):
+        import io
+        import os
+
+        source_bytes = os.urandom(10000)
+        temp_file_path = spool_file_to_temp_file(io.BytesIO(source_bytes), 1024, '.PLSQL')
+
+        try:
+            self.assertTrue(temp_file_path.endswith('.PLSQL'))
+
+            with open(temp_file_path, 'rb') as temp_file:
+                self.assertEqual(temp_file.read(), source_bytes)
+        finally:
+            os.remove(temp_file_path)
+
+class TestGetArchiveIdentifiers(unittest.TestCase):
+    # Capture time, platform, device model and OS build are parsed from sysdiagnose archive names
+    def test_sysdiagnose_archive_name(self):
+        from utils.FileHelper import get_archive_identifiers
+
+        archive_identifiers = get_archive_identifiers('input/sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236.tar.gz')
+
+        self.assertEqual(archive_identifiers.archive_name, 'sysdiagnose_2024.04.16_19-30-52+0100_iPhone-OS_iPhone_21E236')
+        self.assertEqual(archive_identifiers.captured_at, '2024.04.16_19-30-52+0100')
+        self.assertEqual(archive_identifiers.platform, 'iPhone-OS')
+        self.assertEqual(archive_identifiers.device_model, 'iPhone')
+        self.assertEqual(archive_identifiers.os_build, '21E236')
+
+    # Other archive names only have the archive name
+    def test_other_archive_name(self):
+        from utils.FileHelper import get_archive_identifiers
+
+        archive_identifiers = get_archive_identifiers('input/logs.tar.gz')
+
+        self.assertEqual(archive_identifiers.archive_name, 'logs')
+        self.assertIsNone(archive_identifiers.device_model)
+
 class TestWriteToJsonFile(unittest.TestCase):
     def test_write_to_json_file(self):
         json_string = '{"key": "value"}'
@@ -40,6 +96,27 @@ class TestWriteToJsonFile(unittest.TestCase):
             mock_open_instance.assert_called_once_with(file_name, 'w')
             mock_open_instance().write.assert_called_once_with(json_string)
             mock_open_instance().close.assert_called_once()
+class TestReadPowerlogTableExportsFile(unittest.TestCase):
+    # Tables can be listed by name, or with their own query
+    def test_read_powerlog_table_exports_file(self):
+        import json
+        import os
+        import tempfile
+        from models.PowerlogTableExport import PowerlogTableExport
+        from utils.FileHelper import read_powerlog_table_exports_file
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            table_exports_file_path = os.path.join(temp_dir, 'tables.json')
+
+            with open(table_exports_file_path, 'w') as table_exports_file:
+                json.dump(['PLBatteryAgent_EventBackward_Battery', {'table': 'PLAppTimeService', 'query': 'SELECT ID FROM PLAppTimeService'}], table_exports_file)
+
+            table_exports = read_powerlog_table_exports_file(table_exports_file_path)
+
+        self.assertEqual(table_exports, [
+            PowerlogTableExport('PLBatteryAgent_EventBackward_Battery'), 
+            PowerlogTableExport('PLAppTimeService', 'SELECT ID FROM PLAppTimeService')
+        ])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
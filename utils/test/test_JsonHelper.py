@@ -1,113 +1,14 @@
+import dataclasses
 import unittest
 from unittest.mock import patch
 import json
 
 from models.DBLogEvent import DBLogEvent
 from models.TxtLogEvent import TxtLogEvent
-from utils.JsonHelper import convert_object_to_json_string, serialise_process_events, serialise_process_log_items
+from utils.JsonHelper import convert_object_to_json_string, convert_rows_to_json_string, make_json_row_encoder
 
 # Unit test class
 class TestJsonHelper(unittest.TestCase):
-    def test_serialise_process_events_success(self):
-        events = [
-            DBLogEvent(ID=1, timestamp=1625563200.0, BundleID="com.example", CoalitionID=42, PID=1234, ProcessName="example_process"),
-            DBLogEvent(ID=2, timestamp=None, BundleID=None, CoalitionID=None, PID=None, ProcessName=None)
-        ]
-        expected_result = [
-            {
-                'ID': 1,
-                'timestamp': 1625563200.0,
-                'BundleID': 'com.example',
-                'CoalitionID': 42,
-                'PID': 1234,
-                'ProcessName': 'example_process'
-            },
-            {
-                'ID': 2,
-                'timestamp': None,
-                'BundleID': None,
-                'CoalitionID': None,
-                'PID': None,
-                'ProcessName': None
-            }
-        ]
-        result = serialise_process_events(events)
-        self.assertEqual(result, expected_result)
-
-    def test_serialise_process_events_empty_list(self):
-        events = []
-        expected_result = []
-        result = serialise_process_events(events)
-        self.assertEqual(result, expected_result)
-
-    def test_serialise_process_events_error(self):
-        with patch('dataclasses.asdict', side_effect=Exception('Test Exception')):
-            events = [DBLogEvent(ID=1, timestamp=1625563200.0, BundleID="com.example", CoalitionID=42, PID=1234, ProcessName="example_process")]
-            result = serialise_process_events(events)
-            self.assertIsNone(result)
-
-    def test_serialise_process_log_items_success(self):
-        logs = [
-            TxtLogEvent(USER="user1", UID=1001, PRSNA="example", PID=1234, PPID=5678, F=None, CPU=12.5, MEM=45.6, PRI=20, NI=0, VSZ=2048, RSS=1024, WCHAN=None, TT="tt", STAT="R", STARTED="12:00", TIME="0:01", COMMAND="command"),
-            TxtLogEvent(USER="user2", UID=1002, PRSNA="example2", PID=1235, PPID=5679, F=None, CPU=None, MEM=None, PRI=None, NI=None, VSZ=None, RSS=None, WCHAN=None, TT=None, STAT=None, STARTED=None, TIME=None, COMMAND=None)
-        ]
-        expected_result = [
-            {
-                'USER': 'user1',
-                'UID': 1001,
-                'PRSNA': 'example',
-                'PID': 1234,
-                'PPID': 5678,
-                'F': None,
-                'CPU': 12.5,
-                'MEM': 45.6,
-                'PRI': 20,
-                'NI': 0,
-                'VSZ': 2048,
-                'RSS': 1024,
-                'WCHAN': None,
-                'TT': 'tt',
-                'STAT': 'R',
-                'STARTED': '12:00',
-                'TIME': '0:01',
-                'COMMAND': 'command'
-            },
-            {
-                'USER': 'user2',
-                'UID': 1002,
-                'PRSNA': 'example2',
-                'PID': 1235,
-                'PPID': 5679,
-                'F': None,
-                'CPU': None,
-                'MEM': None,
-                'PRI': None,
-                'NI': None,
-                'VSZ': None,
-                'RSS': None,
-                'WCHAN': None,
-                'TT': None,
-                'STAT': None,
-                'STARTED': None,
-                'TIME': None,
-                'COMMAND': None
-            }
-        ]
-        result = serialise_process_log_items(logs)
-        self.assertEqual(result, expected_result)
-
-    def test_serialise_process_log_items_empty_list(self):
-        logs = []
-        expected_result = []
-        result = serialise_process_log_items(logs)
-        self.assertEqual(result, expected_result)
-
-    def test_serialise_process_log_items_error(self):
-        with patch('dataclasses.asdict', side_effect=Exception('Test Exception')):
-            logs = [TxtLogEvent(USER="user1", UID=1001, PRSNA="example", PID=1234, PPID=5678, F=None, CPU=12.5, MEM=45.6, PRI=20, NI=0, VSZ=2048, RSS=1024, WCHAN=None, TT="tt", STAT="R", STARTED="12:00", TIME="0:01", COMMAND="command")]
-            result = serialise_process_log_items(logs)
-            self.assertIsNone(result)
-
     def test_convert_object_to_json_string_success(self):
         obj = {'key': 'value', 'list': [1, 2, 3]}
         expected_result = json.dumps(obj, indent=4)
@@ -120,5 +21,45 @@ class TestJsonHelper(unittest.TestCase):
             result = convert_object_to_json_string(obj, indent=4)
             self.assertIsNone(result)
 
+    def test_make_json_row_encoder_matches_json_dumps(self):
+        field_names = ('USER', 'PID', 'CPU', 'WCHAN', 'COMMAND')
+        rows = [
+            ('user "1"', 1234, 1.5e-07, None, '/usr/bin/caf\u00e9 --flag\n'),
+            ('user2', -1, float('nan'), True, None),
+        ]
+
+        for indent in (None, 2, 4):
+            for row in rows:
+                encode_json_row = make_json_row_encoder(field_names, indent)
+                self.assertEqual(encode_json_row(row), json.dumps(dict(zip(field_names, row)), indent=indent))
+
+    def test_convert_rows_to_json_string_matches_json_dumps(self):
+        events = [
+            DBLogEvent(ID=1, timestamp=1625563200.0, BundleID="com.example", CoalitionID=42, PID=1234, ProcessName="example_process"),
+            DBLogEvent(ID=2, timestamp=None, BundleID=None, CoalitionID=None, PID=None, ProcessName=None)
+        ]
+        field_names = ('ID', 'timestamp', 'BundleID', 'CoalitionID', 'PID', 'ProcessName')
+        rows = [tuple(getattr(event, field_name) for field_name in field_names) for event in events]
+
+        result = convert_rows_to_json_string(rows, field_names)
+
+        self.assertEqual(result, json.dumps([dataclasses.asdict(event) for event in events], indent=2))
+        self.assertEqual(convert_rows_to_json_string([], field_names), '[]')
+
+    # Minified JSON and NDJSON match json.dumps with compact separators
+    def test_convert_rows_to_json_string_other_output_formats(self):
+        field_names = ('ID', 'BundleID', 'timestamp')
+        rows = [(1, 'com.example', 1625563200.0), (2, None, None)]
+        items = [dict(zip(field_names, row)) for row in rows]
+
+        self.assertEqual(convert_rows_to_json_string(rows, field_names, 'json-min'), json.dumps(items, separators=(',', ':')))
+        self.assertEqual(
+            convert_rows_to_json_string(rows, field_names, 'ndjson'), 
+            ''.join(json.dumps(item, separators=(',', ':')) + '\n' for item in items)
+        )
+        self.assertEqual(convert_rows_to_json_string([], field_names, 'json-min'), '[]')
+        self.assertEqual(convert_rows_to_json_string([], field_names, 'ndjson'), '')
+        self.assertIsNone(convert_rows_to_json_string(rows, field_names, 'xml'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from utils.JsonStreamWriter import JsonStreamWriter
+
+# Unit test class
+class TestJsonStreamWriter(unittest.TestCase):
+    # Streamed output is identical to json.dumps of the full list with the same indent
+    def test_output_matches_json_dumps(self):
+        items = [
+            {'USER': 'user1', 'PID': 1, 'CPU': 0.1, 'COMMAND': 'a "quoted"\ncommand'},
+            {'USER': 'user2', 'PID': 2, 'CPU': None, 'COMMAND': None},
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, 'result.json')
+
+            with JsonStreamWriter(file_name) as json_stream_writer:
+                for item in items:
+                    json_stream_writer.write_item(item)
+
+            with open(file_name) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(result, json.dumps(items, indent=2))
+        self.assertEqual(json_stream_writer.item_count, 2)
+
+    # Rows written as value tuples give the same output as the equivalent dicts
+    def test_write_row_matches_write_item(self):
+        field_names = ('ID', 'BundleID', 'timestamp')
+        rows = [(1, 'com.example', 1625563200.0), (2, None, None)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, 'result.json')
+
+            with JsonStreamWriter(file_name, field_names=field_names) as json_stream_writer:
+                for row in rows:
+                    json_stream_writer.write_row(row)
+
+            with open(file_name) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(result, json.dumps([dict(zip(field_names, row)) for row in rows], indent=2))
+
+    # An empty stream is written as an empty JSON array
+    def test_empty_output(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, 'result.json')
+
+            with JsonStreamWriter(file_name):
+                pass
+
+            with open(file_name) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(result, '[]')
+
+    # NDJSON output has one minified object per line, and can be gzip compressed as it is written
+    def test_ndjson_gzip_output(self):
+        field_names = ('ID', 'BundleID')
+        rows = [(1, 'com.example'), (2, None)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, 'result.ndjson.gz')
+
+            with JsonStreamWriter(file_name, field_names, 'ndjson', compress=True) as json_stream_writer:
+                json_stream_writer.write_row(rows[0])
+                json_stream_writer.write_item(dict(zip(field_names, rows[1])))
+
+            with gzip.open(file_name, 'rt') as result_file:
+                result = result_file.read()
+
+        self.assertEqual(result, '{"ID":1,"BundleID":"com.example"}\n{"ID":2,"BundleID":null}\n')
+
+    # Minified JSON output matches json.dumps with compact separators
+    def test_minified_output_matches_json_dumps(self):
+        items = [{'USER': 'user1', 'PID': 1, 'ARGS': ['a', 'b']}, {'USER': 'user2', 'PID': 2, 'ARGS': []}]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, 'result.json')
+
+            with JsonStreamWriter(file_name, output_format='json-min') as json_stream_writer:
+                for item in items:
+                    json_stream_writer.write_item(item)
+
+            with open(file_name) as result_file:
+                result = result_file.read()
+
+        self.assertEqual(result, json.dumps(items, separators=(',', ':')))
+
+    # Writing before the file is opened raises an error
+    def test_write_item_without_open_file(self):
+        json_stream_writer = JsonStreamWriter('unused.json')
+
+        with self.assertRaises(ValueError):
+            json_stream_writer.write_item({'key': 'value'})
+
+
+if __name__ == '__main__':
+    unittest.main()
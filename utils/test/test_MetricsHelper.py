@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from utils.MetricsHelper import call_and_measure_stage, measure_stage, start_metrics_recording, stop_metrics_recording, write_metrics_file
+
+# Unit test class
+class TestMetricsHelper(unittest.TestCase):
+    def tearDown(self):
+        stop_metrics_recording()
+
+    # Stages aren't recorded anywhere when metrics recording hasn't been started
+    def test_measure_stage_without_recording(self):
+        with measure_stage('stage', row_count=10) as stage_metrics:
+            pass
+
+        self.assertEqual(stage_metrics.row_count, 10)
+        self.assertEqual(stage_metrics.wall_seconds, 0.0)
+        self.assertIsNone(stop_metrics_recording())
+
+    # Each stage is recorded with its timings and throughput worked out from its row and byte counts
+    def test_measure_stage_records_stage(self):
+        start_metrics_recording()
+
+        with measure_stage('parse', byte_count=1000) as stage_metrics:
+            sum(range(100000))
+            stage_metrics.row_count = 100
+
+        metrics = stop_metrics_recording()
+
+        self.assertEqual(len(metrics['stages']), 1)
+
+        stage = metrics['stages'][0]
+
+        self.assertEqual(stage['name'], 'parse')
+        self.assertEqual(stage['row_count'], 100)
+        self.assertGreater(stage['wall_seconds'], 0)
+        self.assertGreaterEqual(stage['cpu_seconds'], 0)
+        self.assertAlmostEqual(stage['rows_per_second'], 100 / stage['wall_seconds'], delta=1)
+        self.assertIsNotNone(stage['bytes_per_second'])
+        self.assertIsNone(stage['peak_traced_memory_bytes'])
+        self.assertGreater(metrics['total_wall_seconds'], 0)
+
+    # Peak traced memory is measured per stage when memory tracing is enabled
+    def test_measure_stage_traces_memory(self):
+        start_metrics_recording(trace_memory=True)
+
+        with measure_stage('allocate'):
+            allocated_bytes = bytearray(1024 * 1024)
+
+        metrics = stop_metrics_recording()
+
+        self.assertGreaterEqual(metrics['stages'][0]['peak_traced_memory_bytes'], len(allocated_bytes))
+        self.assertEqual(metrics['peak_traced_memory_bytes'], metrics['stages'][0]['peak_traced_memory_bytes'])
+
+    # Stages measured on other threads are recorded too, and the call result is used as the row count
+    def test_call_and_measure_stage_on_thread(self):
+        start_metrics_recording()
+
+        call_thread = threading.Thread(target=call_and_measure_stage, args=('process', len, [1, 2, 3]))
+        call_thread.start()
+        call_thread.join()
+
+        metrics = stop_metrics_recording()
+
+        self.assertEqual(metrics['stages'][0]['name'], 'process')
+        self.assertEqual(metrics['stages'][0]['row_count'], 3)
+
+    def test_write_metrics_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metrics_file_path = os.path.join(temp_dir, 'metrics.json')
+
+            write_metrics_file({'stages': []}, metrics_file_path)
+
+            with open(metrics_file_path) as metrics_file:
+                self.assertEqual(json.load(metrics_file), {'stages': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
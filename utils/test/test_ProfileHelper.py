@@ -0,0 +1,74 @@
+import json
+import os
+import pstats
+import tempfile
+import threading
+import unittest
+
+from utils.ProfileHelper import profile_thread_call, record_allocation_sites, start_profiling, stop_profiling
+
+
+def build_allocations():
+    return [str(index) * 10 for index in range(10000)]
+
+
+# Unit test class
+class TestProfileHelper(unittest.TestCase):
+    def tearDown(self):
+        stop_profiling()
+
+    # Calls made on other threads are included in the written stats
+    def test_profile_thread_call_stats_are_merged(self):
+        profile_session = start_profiling(profile_calls=True)
+
+        profile_thread = threading.Thread(target=profile_thread_call, args=(build_allocations,))
+        profile_thread.start()
+        profile_thread.join()
+
+        stop_profiling()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_file_path = os.path.join(temp_dir, 'profile.pstats')
+
+            profile_session.write_profile_stats(profile_file_path)
+
+            profiled_function_names = [function_key[2] for function_key in pstats.Stats(profile_file_path).stats]
+
+        self.assertIn('build_allocations', profiled_function_names)
+
+    # Allocation sites are only recorded for the main pipeline stages
+    def test_record_allocation_sites(self):
+        profile_session = start_profiling(profile_allocations=True)
+
+        allocations = build_allocations()
+
+        record_allocation_sites('ps_txt_parse')
+        record_allocation_sites('tar_scan')
+
+        stop_profiling()
+
+        self.assertEqual(len(allocations), 10000)
+        self.assertEqual([allocation_sites['stage'] for allocation_sites in profile_session.allocation_sites], ['ps_txt_parse'])
+
+        top_allocation_sites = profile_session.allocation_sites[0]['top_allocation_sites']
+
+        self.assertTrue(any(allocation_site['file'] == __file__ for allocation_site in top_allocation_sites))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            allocations_file_path = os.path.join(temp_dir, 'allocations.json')
+
+            profile_session.write_allocation_sites(allocations_file_path)
+
+            with open(allocations_file_path) as allocations_file:
+                self.assertEqual(json.load(allocations_file)[0]['stage'], 'ps_txt_parse')
+
+    # Nothing is recorded, and calls are passed straight through, when profiling hasn't been started
+    def test_without_profiling(self):
+        record_allocation_sites('ps_txt_parse')
+
+        self.assertEqual(len(profile_thread_call(build_allocations)), 10000)
+        self.assertIsNone(stop_profiling())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ from datetime import date
 import unittest
 from unittest.mock import patch
 
-from utils.TimeHelper import get_current_timestamp_utc
+from utils.TimeHelper import get_current_timestamp_utc, parse_interval_seconds, parse_timestamp
 
 # Unit test class
 class TestTimeHelper(unittest.TestCase):
@@ -20,6 +20,26 @@ class TestTimeHelper(unittest.TestCase):
 
             self.assertEqual(result, test_expected_result)
 
+    def test_parse_timestamp_unix_seconds_and_iso_8601(self):
+        self.assertEqual(parse_timestamp('1713292252'), 1713292252.0)
+        self.assertEqual(parse_timestamp('1713292252.5'), 1713292252.5)
+        self.assertEqual(parse_timestamp('2024-04-16T19:30:52+01:00'), 1713292252.0)
+        # No UTC offset is taken as UTC
+        self.assertEqual(parse_timestamp('2024-04-16T18:30:52'), 1713292252.0)
+
+        with self.assertRaises(ValueError):
+            parse_timestamp('yesterday')
+
+    def test_parse_interval_seconds(self):
+        self.assertEqual(parse_interval_seconds('minute'), 60)
+        self.assertEqual(parse_interval_seconds('Hour'), 3600)
+        self.assertEqual(parse_interval_seconds('300'), 300)
+        self.assertEqual(parse_interval_seconds('5m'), 300)
+        self.assertEqual(parse_interval_seconds('2h'), 7200)
+
+        for invalid_interval in ['0', '-1m', 'fortnight', '']:
+            with self.assertRaises(ValueError):
+                parse_interval_seconds(invalid_interval)
 
 
 if __name__ == '__main__':
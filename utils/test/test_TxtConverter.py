@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 from consts.LogTextFile import NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE, PROCESS_LOG_TXT_FILE_DELIMITER_REGEX
 from models.TxtLogEvent import TxtLogEvent
-from utils.TxtConverter import convert_txt_row_to_txt_log_event, map_row_parts_to_txt_log_event
+from utils.TxtConverter import convert_txt_row_to_txt_log_event, convert_txt_rows_to_txt_log_events, get_txt_rows_converter, map_row_parts_to_txt_log_event, split_txt_rows_into_chunks
 
 # Unit test class
 class TestTxtConverter(unittest.TestCase):
@@ -117,6 +117,152 @@ class TestTxtConverter(unittest.TestCase):
 
         self.assertEqual(result, None)
 
+    def test_convert_txt_rows_to_txt_log_events_matches_row_converter(self):
+        test_txt_rows = [
+            "test_user                 1   PRSNA_1 1     1  1   1.0  1.0   1  1        1      1 -        1  1s    9:00PM   0:00.00 test_command --flag  \n",
+            "  user2 1001 pr2 1235 5679 - 0.2 0.3 21 1 11000 2100 - tty2 R 2023-10-02 00:00:02 command2",
+        ]
+
+        result, malformed_row_count = convert_txt_rows_to_txt_log_events(test_txt_rows)
+
+        expected_result = [
+            convert_txt_row_to_txt_log_event(test_txt_row, NUMBER_OF_COLUMNS_IN_TXT_PROCESS_LOG_TXT_FILE, PROCESS_LOG_TXT_FILE_DELIMITER_REGEX)
+            for test_txt_row in test_txt_rows
+        ]
+
+        self.assertEqual(result, expected_result)
+        self.assertEqual(result[0].COMMAND, "test_command --flag")
+        self.assertEqual(malformed_row_count, 0)
+
+    def test_convert_txt_rows_to_txt_log_events_counts_malformed_rows(self):
+        test_txt_rows = [
+            "user1 1000 pr1 1234 5678 - 0.1 0.2 20 0 10000 2000 - tty1 S 2023-10-01 00:00:01 command1",
+            "invalid row",
+            "",
+            "user2 not_a_number pr2 1235 5679 - 0.2 0.3 21 1 11000 2100 - tty2 R 2023-10-02 00:00:02 command2",
+        ]
+
+        with patch('builtins.print') as mock_print:
+            result, malformed_row_count = convert_txt_rows_to_txt_log_events(test_txt_rows)
+
+        self.assertEqual([txt_log_event.USER for txt_log_event in result], ["user1"])
+        self.assertEqual(malformed_row_count, 2)
+        mock_print.assert_not_called()
+
+    def test_get_txt_rows_converter_known_layout_uses_default_converter(self):
+        header_row = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n"
+
+        self.assertIs(get_txt_rows_converter(header_row), convert_txt_rows_to_txt_log_events)
+
+    def test_get_txt_rows_converter_uninterpretable_header_uses_default_converter(self):
+        for header_row in [
+            "USER PID COMMAND CPU",
+            "USER PID PID",
+            "Invalid content",
+            "",
+        ]:
+            self.assertIs(get_txt_rows_converter(header_row), convert_txt_rows_to_txt_log_events)
+
+    def test_get_txt_rows_converter_skips_unknown_columns(self):
+        header_row = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS LABEL WCHAN TT STAT STARTED TIME COMMAND"
+        row = "root 0 - 1 0 4004 0.0 0.1 37 0 100 20 some_label - ?? Ss 9:00PM 0:01.00 /sbin/launchd --flag"
+
+        convert_txt_rows = get_txt_rows_converter(header_row)
+
+        result, malformed_row_count = convert_txt_rows([row])
+
+        self.assertEqual(result, [
+            TxtLogEvent("root", 0, "-", 1, 0, "4004", 0.0, 0.1, 37, 0, 100, 20, "-", "??", "Ss", "9:00PM", "0:01.00", "/sbin/launchd --flag")
+        ])
+        self.assertEqual(malformed_row_count, 0)
+
+    def test_get_txt_rows_converter_matches_decorated_column_names(self):
+        header_row = "USER_NAME UID PRSNA PID PPID F %CPU MEM PRI NI VSZ RSS(KB) WCHAN TT STAT STARTED TIME COMMAND"
+
+        self.assertIs(get_txt_rows_converter(header_row), convert_txt_rows_to_txt_log_events)
+
+        # Decorated names are matched by name, not position, so a reordered header is still read correctly
+        convert_txt_rows = get_txt_rows_converter("RSS(KB) LABEL USER_NAME PID COMMAND")
+
+        result, malformed_row_count = convert_txt_rows(["20480 some_label root 1 /sbin/launchd"])
+
+        self.assertEqual([(txt_log_event.RSS, txt_log_event.USER, txt_log_event.PID) for txt_log_event in result], [(20480, "root", 1)])
+        self.assertEqual(malformed_row_count, 0)
+
+    def test_get_txt_rows_converter_maps_reordered_columns_by_position(self):
+        # Standard columns in another order, with an unknown column, are never read as the standard layout
+        convert_txt_rows = get_txt_rows_converter("UID USER PRSNA PID PPID F CPU MEM PRI NI VSZ RSS LABEL TT STAT STARTED TIME COMMAND")
+
+        result, malformed_row_count = convert_txt_rows(["0 root - 1 0 4004 0.0 0.1 37 0 100 20 some_label ?? Ss 9:00PM 0:01.00 /sbin/launchd"])
+
+        self.assertIsNot(convert_txt_rows, convert_txt_rows_to_txt_log_events)
+        self.assertEqual([(txt_log_event.UID, txt_log_event.USER, txt_log_event.WCHAN) for txt_log_event in result], [(0, "root", None)])
+        self.assertEqual(malformed_row_count, 0)
+
+    def test_get_txt_rows_converter_generates_converter_for_other_layout(self):
+        header_row = "USER   PID  %CPU %MEM      RSS TTY COMMAND"
+
+        convert_txt_rows = get_txt_rows_converter(header_row)
+
+        result, malformed_row_count = convert_txt_rows([
+            "root     1   0.5  1.2    20480 ??  /sbin/launchd --flag\n",
+            "mobile   not_a_pid 0.0 0.0 1 ?? broken",
+            "short row",
+        ])
+
+        self.assertIsNot(convert_txt_rows, convert_txt_rows_to_txt_log_events)
+        self.assertEqual(result, [
+            TxtLogEvent("root", None, None, 1, None, None, 0.5, 1.2, None, None, None, 20480, None, "??", None, None, None, "/sbin/launchd --flag") # type: ignore
+        ])
+        self.assertEqual(malformed_row_count, 2)
+
+    def test_get_txt_rows_converter_is_cached_per_header(self):
+        convert_txt_rows = get_txt_rows_converter("USER PID %CPU COMMAND")
+
+        self.assertIs(get_txt_rows_converter("USER  PID  %CPU  COMMAND\n"), convert_txt_rows)
+        self.assertIsNot(get_txt_rows_converter("USER PID %MEM COMMAND"), convert_txt_rows)
+
+    def test_get_txt_rows_converter_filters_rows_by_process_name(self):
+        header_row = "USER UID PRSNA PID PPID F CPU MEM PRI NI VSZ RSS WCHAN TT STAT STARTED TIME COMMAND\n"
+        row_prefix = "root 0 - 1 0 4004 0.0 0.1 37 0 100 20 - ?? Ss 9:00PM 0:01.00 "
+
+        convert_txt_rows = get_txt_rows_converter(header_row, ("launchd", "Some App"))
+
+        result, malformed_row_count = convert_txt_rows([
+            row_prefix + "/sbin/launchd\n",
+            row_prefix + "launchd --flag\n",
+            row_prefix + "/private/var/Some App.app/Some App -psn\n",
+            row_prefix + "/sbin/launchd_helper\n",
+            row_prefix + "/usr/bin/other /sbin/launchd-log\n",
+            row_prefix + "/usr/bin/foo --config /var/db/launchd /x\n",
+            row_prefix + "/usr/bin/foo /var/db/launchd\n",
+            "malformed launchd row",
+        ])
+
+        self.assertEqual([txt_log_event.COMMAND for txt_log_event in result], [
+            "/sbin/launchd", "launchd --flag", "/private/var/Some App.app/Some App -psn"
+        ])
+        # Filtered out rows aren't counted as malformed
+        self.assertEqual(malformed_row_count, 0)
+
+        convert_txt_rows = get_txt_rows_converter("USER PID %CPU COMMAND", ("launchd",))
+
+        result, _ = convert_txt_rows(["root 1 0.5 /sbin/launchd", "root 2 0.5 /usr/libexec/logd"])
+
+        self.assertEqual([txt_log_event.PID for txt_log_event in result], [1])
+
+    def test_split_txt_rows_into_chunks_on_line_boundaries(self):
+        test_txt_rows = ''.join('row ' + str(row_index) + '\n' for row_index in range(100)) + 'last row without newline'
+
+        for chunk_count in (1, 3, 7, 1000):
+            result = split_txt_rows_into_chunks(test_txt_rows, chunk_count)
+
+            self.assertEqual(''.join(result), test_txt_rows)
+            self.assertLessEqual(len(result), chunk_count)
+            self.assertTrue(all(chunk.endswith('\n') for chunk in result[:-1]))
+
+        self.assertEqual(split_txt_rows_into_chunks('', 4), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from models.TxtLogEvent import TxtLogEvent
+from utils.TxtLogSummary import TxtLogSummary
+
+
+def build_txt_log_event(user: str, pid: int, cpu, mem, rss, vsz, command: str) -> TxtLogEvent:
+    return TxtLogEvent(user, 0, '-', pid, 1, None, cpu, mem, None, None, vsz, rss, None, None, None, None, None, command)
+
+
+TEST_TXT_LOG_EVENTS = [
+    build_txt_log_event('root', 1, 1.5, 0.1, 1000, 5000, '/sbin/launchd'),
+    build_txt_log_event('mobile', 2, 10.0, 2.0, 8000, 9000, '/usr/libexec/locationd'),
+    build_txt_log_event('mobile', 3, 0.5, 0.3, 3000, 7000, '/usr/libexec/locationd'),
+    build_txt_log_event('root', 4, None, None, None, None, '/usr/sbin/syslogd'),
+]
+
+
+# Unit test class
+class TestTxtLogSummary(unittest.TestCase):
+    def test_totals_groups_and_top_processes(self):
+        txt_log_summary = TxtLogSummary(2)
+        txt_log_summary.add_txt_log_events(TEST_TXT_LOG_EVENTS)
+
+        result = txt_log_summary.to_dict()
+
+        self.assertEqual(result['row_count'], 4)
+        self.assertEqual(result['totals'], {'CPU': 12.0, 'MEM': 2.4, 'RSS': 12000, 'VSZ': 21000})
+        self.assertEqual(result['top_processes']['RSS'], [
+            {'PID': 2, 'USER': 'mobile', 'COMMAND': '/usr/libexec/locationd', 'RSS': 8000},
+            {'PID': 3, 'USER': 'mobile', 'COMMAND': '/usr/libexec/locationd', 'RSS': 3000},
+        ])
+        self.assertEqual(result['groups']['USER']['group_count'], 2)
+        self.assertEqual(result['groups']['USER']['top']['CPU'], [
+            {'USER': 'mobile', 'process_count': 2, 'CPU': 10.5, 'MEM': 2.3, 'RSS': 11000, 'VSZ': 16000},
+            {'USER': 'root', 'process_count': 2, 'CPU': 1.5, 'MEM': 0.1, 'RSS': 1000, 'VSZ': 5000},
+        ])
+        self.assertEqual(result['groups']['COMMAND']['group_count'], 3)
+        self.assertEqual([group['COMMAND'] for group in result['groups']['COMMAND']['top']['VSZ']], [
+            '/usr/libexec/locationd', '/sbin/launchd'
+        ])
+        self.assertEqual(result['groups']['PRSNA']['top']['MEM'][0]['process_count'], 4)
+
+    # Summaries of separate blocks (eg: from parse workers) merge into the same summary as one pass over every event
+    def test_merged_summaries_match_single_summary(self):
+        txt_log_summary = TxtLogSummary(2)
+        txt_log_summary.add_txt_log_events(TEST_TXT_LOG_EVENTS)
+
+        merged_txt_log_summary = TxtLogSummary(2)
+        merged_txt_log_summary.add_txt_log_events(TEST_TXT_LOG_EVENTS[:1])
+
+        for txt_log_events_block in [TEST_TXT_LOG_EVENTS[1:3], TEST_TXT_LOG_EVENTS[3:]]:
+            block_txt_log_summary = TxtLogSummary(2)
+            block_txt_log_summary.add_txt_log_events(txt_log_events_block)
+            merged_txt_log_summary.merge(block_txt_log_summary)
+
+        self.assertEqual(merged_txt_log_summary.to_dict(), txt_log_summary.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()